@@ -0,0 +1,232 @@
+import atexit
+import hashlib
+import json
+import os
+import time
+import numpy as np
+import torchaudio
+from torchaudio.functional import resample
+from pathlib import Path
+from tracing import count, span
+
+"""
+audio_cache.py
+
+Content-addressed cache for decoded audio.
+Decoding and resampling every clip on every run is wasted work when the corpus hasn't changed,
+so we store each clip as a 16kHz mono float32 .npy file keyed by the SHA-256 of the source file.
+Cached arrays are memory-mapped on load, the cache is bounded in size with LRU eviction,
+and an edited source file gets a new hash (and therefore a fresh entry) automatically.
+The index is saved in batches (and on exit), merged with what other processes saved in the meantime.
+"""
+
+DEFAULT_CACHE_DIR = Path(__file__).resolve().parent / ".cache" / "audio"
+
+def file_sha256(file_path, block_size=1 << 20):
+    """
+    Hashes a file's contents without reading it into memory all at once.
+
+    Args:
+        file_path (str): Path to the file.
+        block_size (int): Number of bytes read at a time.
+
+    Returns:
+        str: The hex SHA-256 digest.
+    """
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as file:
+        for block in iter(lambda: file.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+class AudioCache:
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=2 * 1024 ** 3, sample_rate=16000, flush_every=64):
+        """
+        Args:
+            cache_dir (str): Directory holding the cached .npy files and their index.
+            max_bytes (int): Total size the cached arrays may take up before old entries are evicted.
+            sample_rate (int): Sample rate of the cached audio.
+            flush_every (int): Number of index changes after which the index is saved; it's also saved on exit.
+        """
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.sample_rate = sample_rate
+        self.flush_every = flush_every
+        self._pending = 0
+        self._removed = set()
+        self.index_path = self.cache_dir / "index.json"
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+        # entries: cache key -> size and last access time
+        # sources: source path -> stat signature and content hash, so unchanged files aren't rehashed
+        self.index = {"entries": {}, "sources": {}}
+        if self.index_path.exists():
+            with open(self.index_path, "r") as file:
+                self.index = json.load(file)
+        atexit.register(self.flush)
+
+    def source_hash(self, file_path):
+        """
+        Returns the content hash of a source file, rehashing it only when its size or mtime changed.
+
+        Args:
+            file_path (str): Path to the source audio file.
+
+        Returns:
+            str: The hex SHA-256 digest of the file.
+        """
+        source = str(Path(file_path).resolve())
+        stat = os.stat(source)
+        signature = [stat.st_size, stat.st_mtime_ns]
+
+        known = self.index["sources"].get(source)
+        if known and known["signature"] == signature:
+            return known["sha256"]
+
+        sha256 = file_sha256(source)
+        self.index["sources"][source] = {"signature": signature, "sha256": sha256}
+        self._changed()
+
+        # The file changed, so drop its stale entry unless another source shares the same content
+        if known and known["sha256"] != sha256:
+            stale_key = self._key(known["sha256"])
+            if not any(entry["sha256"] == known["sha256"] for entry in self.index["sources"].values()):
+                self._remove(stale_key)
+        return sha256
+
+    def load(self, file_path):
+        """
+        Returns the decoded mono audio of a file at the cache's sample rate.
+
+        Args:
+            file_path (str): Path to the source audio file.
+
+        Returns:
+            np.ndarray: A read-only, memory-mapped float32 array of samples.
+        """
+        key = self._key(self.source_hash(file_path))
+        npy_path = self.cache_dir / f"{key}.npy"
+
+        with span("audio_load", clip=Path(file_path).name):
+            if key not in self.index["entries"] or not npy_path.exists():
+                count("audio_cache_miss")
+                audio = self.decode(file_path)
+                # Write to a temporary file first so an interrupted or concurrent writer never leaves a truncated entry
+                tmp_path = npy_path.with_suffix(f".{os.getpid()}.tmp")
+                with open(tmp_path, "wb") as file:
+                    np.save(file, audio)
+                os.replace(tmp_path, npy_path)
+                self.index["entries"][key] = {"size": npy_path.stat().st_size, "last_used": time.time()}
+                self._removed.discard(key)
+                self._evict(keep=key)
+            else:
+                count("audio_cache_hit")
+                self.index["entries"][key]["last_used"] = time.time()
+
+            self._changed()
+            return np.load(npy_path, mmap_mode="r")
+
+    def decode(self, file_path):
+        """
+        Decodes an audio file into mono float32 samples at the cache's sample rate, bypassing the cache.
+
+        Args:
+            file_path (str): Path to the source audio file.
+
+        Returns:
+            np.ndarray: The decoded samples.
+        """
+        with span("audio_decode", clip=Path(file_path).name):
+            audio, sr = torchaudio.load(file_path)
+            audio = audio.mean(dim=0)
+        if sr != self.sample_rate:
+            with span("resample", clip=Path(file_path).name, source_rate=sr):
+                audio = resample(audio, sr, self.sample_rate)
+        return audio.numpy().astype(np.float32)
+
+    def _key(self, sha256):
+        return f"{sha256}_{self.sample_rate}"
+
+    def _remove(self, key):
+        self.index["entries"].pop(key, None)
+        self._removed.add(key)
+        npy_path = self.cache_dir / f"{key}.npy"
+        if npy_path.exists():
+            os.remove(npy_path)
+
+    def _evict(self, keep=None):
+        # Drop the least recently used entries until we're back under the size bound
+        entries = self.index["entries"]
+        total = sum(entry["size"] for entry in entries.values())
+        for key in sorted(entries, key=lambda k: entries[k]["last_used"]):
+            if total <= self.max_bytes:
+                break
+            if key == keep:
+                continue
+            total -= entries[key]["size"]
+            self._remove(key)
+
+    def _changed(self):
+        # Rewriting the whole index on every load would cost O(N) per clip, so save in batches
+        self._pending += 1
+        if self._pending >= self.flush_every:
+            self.flush()
+
+    def _merge_saved_index(self):
+        # Keep the entries other processes saved since we loaded the index, unless we removed them
+        try:
+            with open(self.index_path, "r") as file:
+                saved = json.load(file)
+        except (OSError, json.JSONDecodeError):
+            return
+        entries = self.index["entries"]
+        for key, entry in saved.get("entries", {}).items():
+            if key in self._removed:
+                continue
+            if key not in entries:
+                if (self.cache_dir / f"{key}.npy").exists():
+                    entries[key] = entry
+            elif entry["last_used"] > entries[key]["last_used"]:
+                entries[key]["last_used"] = entry["last_used"]
+        for source, known in saved.get("sources", {}).items():
+            self.index["sources"].setdefault(source, known)
+
+    def flush(self):
+        """
+        Saves the index if it changed, merged with the entries other processes saved in the meantime.
+        """
+        if not self._pending:
+            return
+        self._merge_saved_index()
+        # Write to a temporary file first so a crash never leaves a half-written index
+        tmp_path = self.index_path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp_path, "w") as file:
+            json.dump(self.index, file)
+        os.replace(tmp_path, self.index_path)
+        self._pending = 0
+
+_default_cache = None
+
+def default_cache():
+    """
+    Returns the shared on-disk audio cache, creating it on first use.
+
+    Returns:
+        AudioCache: The cache under src/.cache/audio.
+    """
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = AudioCache()
+    return _default_cache
+
+def load_audio(file_path):
+    """
+    Loads an audio file as 16kHz mono float32 samples through the shared on-disk cache.
+
+    Args:
+        file_path (str): Path to the source audio file.
+
+    Returns:
+        np.ndarray: A read-only, memory-mapped float32 array of samples.
+    """
+    return default_cache().load(file_path)
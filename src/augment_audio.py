@@ -0,0 +1,211 @@
+import argparse
+import json
+import sys
+from pathlib import Path
+import numpy as np
+from jiwer import wer
+from corpus_loader import load_corpus
+from manifest import load_manifest
+from text_normalizer import get_normalizer
+
+# Make the model helpers in src/make_transcripts importable
+sys.path.append(str(Path(__file__).resolve().parent / "make_transcripts"))
+from stt_models import apply_thread_profile, transcribe_arrays
+
+"""
+augment_audio.py
+
+Robustness sweep over radio-style conditions (noise, band-limiting, speed changes, clipping).
+Clips are read as views of the memory-mapped packed corpus (corpus_loader.py), augmented in memory in padded
+(batch, samples) arrays with vectorized NumPy transforms, and passed straight to the models, so a sweep of
+dozens of conditions writes no intermediate WAVs. Every (condition, batch) gets its own seeded random generator, so a sweep is reproducible
+no matter which conditions or models run. The result is a WER-vs-condition matrix per model.
+
+Usage:
+    python augment_audio.py --models whisper_tiny moonshine --batch-size 8
+"""
+
+SAMPLE_RATE = 16000
+
+def _valid_mask(audio, lengths):
+    return np.arange(audio.shape[1])[None, :] < lengths[:, None]
+
+def add_noise(audio, lengths, rng, snr_db):
+    """
+    Adds white noise at a target signal-to-noise ratio, relative to each clip's own power.
+
+    Args:
+        audio (np.ndarray): (batch, samples) float32 audio, zero-padded past each clip's length.
+        lengths (np.ndarray): (batch,) number of valid samples of each clip.
+        rng (np.random.Generator): Seeded random generator.
+        snr_db (float): Signal-to-noise ratio in dB.
+
+    Returns:
+        tuple: The augmented audio and the (unchanged) lengths.
+    """
+    mask = _valid_mask(audio, lengths)
+    power = (audio ** 2).sum(axis=1) / np.maximum(lengths, 1)
+    noise_std = np.sqrt(power / 10 ** (snr_db / 10))
+    noise = rng.standard_normal(audio.shape, dtype=np.float32)
+    return (audio + noise * noise_std[:, None].astype(np.float32) * mask).astype(np.float32), lengths
+
+def band_limit(audio, lengths, rng, low_hz=300, high_hz=3400):
+    """
+    Keeps only the frequencies between low_hz and high_hz, like a narrowband radio channel.
+
+    Args:
+        audio (np.ndarray): (batch, samples) float32 audio.
+        lengths (np.ndarray): (batch,) number of valid samples of each clip.
+        rng (np.random.Generator): Unused; every transform takes one.
+        low_hz (float): Lowest frequency kept.
+        high_hz (float): Highest frequency kept.
+
+    Returns:
+        tuple: The augmented audio and the (unchanged) lengths.
+    """
+    spectrum = np.fft.rfft(audio, axis=1)
+    frequencies = np.fft.rfftfreq(audio.shape[1], d=1 / SAMPLE_RATE)
+    spectrum[:, (frequencies < low_hz) | (frequencies > high_hz)] = 0
+    filtered = np.fft.irfft(spectrum, n=audio.shape[1], axis=1).astype(np.float32)
+    return filtered * _valid_mask(audio, lengths), lengths
+
+def change_speed(audio, lengths, rng, factor):
+    """
+    Speeds clips up (factor > 1) or slows them down (factor < 1) by resampling the time axis, pitch included.
+
+    Args:
+        audio (np.ndarray): (batch, samples) float32 audio.
+        lengths (np.ndarray): (batch,) number of valid samples of each clip.
+        rng (np.random.Generator): Unused; every transform takes one.
+        factor (float): Playback speed.
+
+    Returns:
+        tuple: The augmented audio and the new lengths.
+    """
+    new_lengths = np.maximum((lengths / factor).astype(np.int64), 1)
+    positions = np.arange(new_lengths.max())[None, :] * factor
+    # Linear interpolation for every clip at once: gather the two neighbouring samples of each output position
+    left = np.minimum(np.floor(positions).astype(np.int64), audio.shape[1] - 1)
+    right = np.minimum(left + 1, audio.shape[1] - 1)
+    weight = (positions - left).astype(np.float32)
+    rows = np.arange(audio.shape[0])[:, None]
+    stretched = audio[rows, left] * (1 - weight) + audio[rows, right] * weight
+    mask = np.arange(stretched.shape[1])[None, :] < new_lengths[:, None]
+    return (stretched * mask).astype(np.float32), new_lengths
+
+def clip_peaks(audio, lengths, rng, threshold):
+    """
+    Hard-clips each clip at a fraction of its own peak, like an overdriven microphone.
+
+    Args:
+        audio (np.ndarray): (batch, samples) float32 audio.
+        lengths (np.ndarray): (batch,) number of valid samples of each clip.
+        rng (np.random.Generator): Unused; every transform takes one.
+        threshold (float): Fraction of the peak amplitude kept, e.g. 0.3.
+
+    Returns:
+        tuple: The augmented audio and the (unchanged) lengths.
+    """
+    limit = (np.abs(audio).max(axis=1, keepdims=True) * threshold).astype(np.float32)
+    return np.clip(audio, -limit, limit), lengths
+
+TRANSFORMS = {"noise": add_noise, "band_limit": band_limit, "speed": change_speed, "clip": clip_peaks}
+
+def condition_grid():
+    """
+    Lists the default conditions of a sweep: each transform at several strengths, plus combined radio channels.
+
+    Returns:
+        dict: condition name -> list of (transform name, parameters), applied in order.
+    """
+    conditions = {"clean": []}
+    for snr_db in [30, 20, 15, 10, 5, 0]:
+        conditions[f"noise_{snr_db}db"] = [("noise", {"snr_db": snr_db})]
+    for low_hz, high_hz in [(300, 3400), (500, 2500), (100, 6000)]:
+        conditions[f"band_{low_hz}_{high_hz}hz"] = [("band_limit", {"low_hz": low_hz, "high_hz": high_hz})]
+    for factor in [0.8, 0.9, 1.1, 1.2, 1.3]:
+        conditions[f"speed_{factor}x"] = [("speed", {"factor": factor})]
+    for threshold in [0.5, 0.3, 0.1]:
+        conditions[f"clip_{threshold}"] = [("clip", {"threshold": threshold})]
+    for snr_db in [20, 10, 5]:
+        conditions[f"radio_{snr_db}db"] = [
+            ("band_limit", {"low_hz": 300, "high_hz": 3400}), ("noise", {"snr_db": snr_db}), ("clip", {"threshold": 0.5}),
+        ]
+    return conditions
+
+def augment_batch(audio, lengths, transforms, rng):
+    for name, params in transforms:
+        audio, lengths = TRANSFORMS[name](audio, lengths, rng, **params)
+    return audio, lengths
+
+def pad_batch(clips):
+    lengths = np.array([len(clip) for clip in clips], dtype=np.int64)
+    audio = np.zeros((len(clips), lengths.max()), dtype=np.float32)
+    for i, clip in enumerate(clips):
+        audio[i, :len(clip)] = clip
+    return audio, lengths
+
+def augmentation_sweep(model_names, records, conditions=None, batch_size=8, seed=0, normalizer=None):
+    """
+    Transcribes every clip under every condition and scores each model per condition.
+
+    Args:
+        model_names (list of str): Keys of MODEL_IDS. The process uses the first one's thread profile.
+        records (list of dict): Manifest records with "audio_path" and "reference".
+        conditions (dict): condition name -> transforms, e.g. from condition_grid().
+        batch_size (int): Clips augmented and transcribed together.
+        seed (int): Base seed; each (condition, batch) derives its own generator from it.
+        normalizer (TextNormalizer): Optional normalizer applied before scoring.
+
+    Returns:
+        dict: model -> condition -> corpus WER.
+    """
+    conditions = conditions or condition_grid()
+    # Every model shares the process's thread counts, tuned for the first one
+    apply_thread_profile(model_names[0])
+    corpus = load_corpus()
+    clips = [corpus[record["id"]] for record in records]
+    references = [record["reference"] for record in records]
+    if normalizer is not None:
+        references = [normalizer.normalize(reference) for reference in references]
+
+    matrix = {model_name: {} for model_name in model_names}
+    for condition_index, (condition, transforms) in enumerate(conditions.items()):
+        hypotheses = {model_name: [] for model_name in model_names}
+        for batch_index, start in enumerate(range(0, len(clips), batch_size)):
+            rng = np.random.default_rng([seed, condition_index, batch_index])
+            audio, lengths = augment_batch(*pad_batch(clips[start:start + batch_size]), transforms, rng)
+            batch = [audio[i, :lengths[i]] for i in range(len(lengths))]
+            for model_name in model_names:
+                hypotheses[model_name] += transcribe_arrays(model_name, batch)
+
+        for model_name in model_names:
+            stt_transcripts = hypotheses[model_name]
+            if normalizer is not None:
+                stt_transcripts = [normalizer.normalize(transcript) for transcript in stt_transcripts]
+            matrix[model_name][condition] = wer(references, stt_transcripts)
+        print(f"{condition}: " + ", ".join(f"{model_name} {matrix[model_name][condition]:.2%}" for model_name in model_names))
+    return matrix
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="WER of every model under radio-style audio conditions.")
+    parser.add_argument("--models", nargs="+", default=["whisper_base", "whisper_tiny", "moonshine"])
+    parser.add_argument("--batch-size", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--normalize", action="store_true", help="Normalize case, punctuation and numbers before scoring")
+    args = parser.parse_args()
+
+    records = list(load_manifest().filter(has_reference=True))
+    normalizer = get_normalizer() if args.normalize else None
+    matrix = augmentation_sweep(args.models, records, batch_size=args.batch_size, seed=args.seed, normalizer=normalizer)
+
+    conditions = list(next(iter(matrix.values())))
+    print(f"\n{'condition':<22}" + "".join(f"{model_name:>14}" for model_name in args.models))
+    for condition in conditions:
+        print(f"{condition:<22}" + "".join(f"{100 * matrix[model_name][condition]:>13.2f}%" for model_name in args.models))
+
+    # Store the matrix next to the WER results
+    output_path = Path(__file__).resolve().parent / "wer" / "augmentation_wer.json"
+    with open(output_path, "w") as file:
+        json.dump({"seed": args.seed, "conditions": condition_grid(), "wer": matrix}, file, indent=2)
@@ -0,0 +1,269 @@
+import argparse
+import json
+import multiprocessing
+import sys
+import time
+from pathlib import Path
+import numpy as np
+import torch
+
+# Make the model helpers in src/make_transcripts and the shared helpers in src/ importable
+sys.path.append(str(Path(__file__).resolve().parent.parent / "make_transcripts"))
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from audio_cache import default_cache
+from precision_report import peak_rss_mb
+from stt_models import host_key, load_moonshine, load_whisper
+
+"""
+benchmark_stt.py
+
+End-to-end performance benchmark of every featured model over audio/16kHz.
+Each model runs in its own fresh process (so model load time and peak RSS aren't shared between models),
+and every clip is timed stage by stage, bypassing the audio cache and feature store:
+- load: loading the model and its processor/tokenizer.
+- decode: reading the file and resampling it to 16kHz mono.
+- features: Whisper's log-mel feature extraction (Moonshine takes raw audio, so it has no feature stage).
+- encoder: the encoder forward pass, timed with hooks inside generate().
+- decoder: the rest of generate(), i.e. autoregressive decoding.
+
+Results (real-time factor, p50/p95/p99 latency, clips/sec, peak RSS) are written to benchmark_results.json
+and compared against baseline.json, flagging any metric that got worse by more than --tolerance.
+
+Usage:
+    python benchmark_stt.py                  # benchmark and compare against the baseline
+    python benchmark_stt.py --save-baseline  # benchmark and store the results as the new baseline
+"""
+
+BENCHMARK_DIR = Path(__file__).resolve().parent
+DEFAULT_RESULTS_PATH = BENCHMARK_DIR / "benchmark_results.json"
+DEFAULT_BASELINE_PATH = BENCHMARK_DIR / "baseline.json"
+
+# Metrics compared against the baseline, and whether higher values are better
+COMPARED_METRICS = {
+    "load_seconds": False,
+    "decode_mean": False,
+    "features_mean": False,
+    "encoder_mean": False,
+    "decoder_mean": False,
+    "p50_latency": False,
+    "p95_latency": False,
+    "p99_latency": False,
+    "real_time_factor": False,
+    "clips_per_second": True,
+    "peak_rss_mb": False,
+}
+
+class StageTimer:
+    def __init__(self, module):
+        """
+        Accumulates the time spent in a module's forward passes.
+
+        Args:
+            module: A torch module (e.g., the model's encoder), or None to time nothing.
+        """
+        self.seconds = 0.0
+        self.enabled = module is not None
+        self._start = None
+        if self.enabled:
+            module.register_forward_pre_hook(self._before)
+            module.register_forward_hook(self._after)
+
+    def _before(self, module, inputs):
+        self._start = time.perf_counter()
+
+    def _after(self, module, inputs, outputs):
+        self.seconds += time.perf_counter() - self._start
+
+    def reset(self):
+        seconds, self.seconds = self.seconds, 0.0
+        return seconds
+
+def find_encoder(model):
+    # Whisper exposes get_encoder(); Moonshine's remote code only has an "encoder" submodule
+    if hasattr(model, "get_encoder"):
+        return model.get_encoder()
+    for name, module in model.named_modules():
+        if name.split(".")[-1] == "encoder":
+            return module
+    return None
+
+def benchmark_model(model_name, audio_files):
+    """
+    Times every stage of one model over every clip. Meant to run in a fresh process.
+
+    Args:
+        model_name (str): A key of MODEL_IDS.
+        audio_files (list of str): Paths to the audio files.
+
+    Returns:
+        dict: The model load time, per-clip stage timings, clip durations and peak RSS.
+    """
+    start = time.perf_counter()
+    if model_name.startswith("whisper"):
+        model, processor = load_whisper(model_name)
+    else:
+        model, tokenizer = load_moonshine(model_name)
+    load_seconds = time.perf_counter() - start
+    encoder_timer = StageTimer(find_encoder(model))
+
+    def run_clip(audio_file):
+        stages = {}
+        start = time.perf_counter()
+        audio = default_cache().decode(audio_file)
+        stages["decode"] = time.perf_counter() - start
+
+        with torch.no_grad():
+            start = time.perf_counter()
+            if model_name.startswith("whisper"):
+                inputs = processor.feature_extractor(audio, sampling_rate=16000, return_tensors="pt").input_features
+                stages["features"] = time.perf_counter() - start
+                start = time.perf_counter()
+                predicted_ids = model.generate(inputs)
+                processor.tokenizer.batch_decode(predicted_ids, skip_special_tokens=True)
+            else:
+                stages["features"] = None
+                tokens = model(torch.from_numpy(audio).unsqueeze(0))
+                tokenizer.decode(tokens[0], skip_special_tokens=True)
+            generate_seconds = time.perf_counter() - start
+
+        encoder_seconds = encoder_timer.reset()
+        stages["encoder"] = encoder_seconds if encoder_timer.enabled else None
+        stages["decoder"] = generate_seconds - encoder_seconds
+        stages["total"] = stages["decode"] + (stages["features"] or 0.0) + generate_seconds
+        return stages, len(audio) / 16000
+
+    # Warm up (first-call allocations, lazy initialization) outside of the timed clips
+    run_clip(audio_files[0])
+
+    clips = []
+    for audio_file in audio_files:
+        stages, duration = run_clip(audio_file)
+        clips.append({"audio_file": str(audio_file), "duration": duration, **stages})
+    return {"load_seconds": load_seconds, "clips": clips, "peak_rss_mb": peak_rss_mb()}
+
+def summarize(model_name, result):
+    """
+    Turns per-clip timings into the benchmark metrics.
+
+    Args:
+        model_name (str): A key of MODEL_IDS.
+        result (dict): The output of benchmark_model.
+
+    Returns:
+        dict: Stage means, latency percentiles, real-time factor, clips/sec and peak RSS.
+    """
+    clips = result["clips"]
+    latencies = np.array([clip["total"] for clip in clips])
+    summary = {"model": model_name, "num_clips": len(clips), "load_seconds": result["load_seconds"]}
+    for stage in ["decode", "features", "encoder", "decoder"]:
+        values = [clip[stage] for clip in clips if clip[stage] is not None]
+        summary[f"{stage}_mean"] = float(np.mean(values)) if values else None
+    summary.update({
+        "p50_latency": float(np.percentile(latencies, 50)),
+        "p95_latency": float(np.percentile(latencies, 95)),
+        "p99_latency": float(np.percentile(latencies, 99)),
+        "real_time_factor": float(latencies.sum() / sum(clip["duration"] for clip in clips)),
+        "clips_per_second": float(len(clips) / latencies.sum()),
+        "peak_rss_mb": result["peak_rss_mb"],
+    })
+    return summary
+
+def run_benchmark(model_names, audio_files):
+    """
+    Benchmarks every model, each in a separate process.
+
+    Args:
+        model_names (list of str): Keys of MODEL_IDS.
+        audio_files (list of str): Paths to the audio files.
+
+    Returns:
+        dict: Host information and one summary per model.
+    """
+    summaries = {}
+    context = multiprocessing.get_context("spawn")
+    for model_name in model_names:
+        with context.Pool(1) as pool:
+            result = pool.apply(benchmark_model, (model_name, audio_files))
+        summaries[model_name] = summarize(model_name, result)
+    return {
+        "host": host_key(),
+        "torch_version": torch.__version__,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "models": summaries,
+    }
+
+def compare_to_baseline(results, baseline, tolerance=0.1):
+    """
+    Flags every metric that got worse than the baseline by more than the tolerance.
+
+    Args:
+        results (dict): The output of run_benchmark.
+        baseline (dict): A previous output of run_benchmark.
+        tolerance (float): Allowed relative slowdown, e.g. 0.1 for 10%.
+
+    Returns:
+        list of dict: One entry per regression.
+    """
+    if results["host"] != baseline["host"]:
+        print(f"Warning: the baseline was measured on {baseline['host']}, not {results['host']}")
+
+    regressions = []
+    for model_name, summary in results["models"].items():
+        baseline_summary = baseline["models"].get(model_name)
+        if baseline_summary is None:
+            continue
+        for metric, higher_is_better in COMPARED_METRICS.items():
+            value, baseline_value = summary.get(metric), baseline_summary.get(metric)
+            if value is None or not baseline_value:
+                continue
+            change = (value - baseline_value) / baseline_value
+            if (-change if higher_is_better else change) > tolerance:
+                regressions.append({
+                    "model": model_name, "metric": metric,
+                    "baseline": baseline_value, "value": value, "change": change,
+                })
+    return regressions
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Benchmark the STT pipeline and compare against a baseline.")
+    parser.add_argument("--models", nargs="+", default=["whisper_base", "whisper_tiny", "moonshine"])
+    parser.add_argument("--output", default=DEFAULT_RESULTS_PATH)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE_PATH)
+    parser.add_argument("--tolerance", type=float, default=0.1, help="Allowed relative regression (0.1 = 10%%)")
+    parser.add_argument("--save-baseline", action="store_true", help="Store these results as the new baseline")
+    args = parser.parse_args()
+
+    # Access the parent (src/) directory via Pathlib
+    parent_dir = BENCHMARK_DIR.parent
+    audio_files = sorted((parent_dir / "audio/16kHz").glob("audio_*.wav"), key=lambda path: int(path.stem.split("_")[1]))
+
+    results = run_benchmark(args.models, [str(path) for path in audio_files])
+    print(f"{'model':<14}{'load s':>8}{'decode':>8}{'feats':>8}{'enc':>8}{'dec':>8}{'p50':>8}{'p95':>8}{'p99':>8}{'RTF':>7}{'clips/s':>9}{'RSS MB':>8}")
+    for summary in results["models"].values():
+        stage_columns = "".join(
+            f"{summary[f'{stage}_mean']:>8.3f}" if summary[f"{stage}_mean"] is not None else f"{'-':>8}"
+            for stage in ["decode", "features", "encoder", "decoder"]
+        )
+        print(
+            f"{summary['model']:<14}{summary['load_seconds']:>8.2f}{stage_columns}{summary['p50_latency']:>8.3f}"
+            f"{summary['p95_latency']:>8.3f}{summary['p99_latency']:>8.3f}{summary['real_time_factor']:>7.3f}"
+            f"{summary['clips_per_second']:>9.2f}{summary['peak_rss_mb']:>8.0f}"
+        )
+
+    with open(args.output, "w") as file:
+        json.dump(results, file, indent=2)
+    if args.save_baseline:
+        with open(args.baseline, "w") as file:
+            json.dump(results, file, indent=2)
+        print(f"Saved the baseline to {args.baseline}")
+    elif Path(args.baseline).exists():
+        with open(args.baseline, "r") as file:
+            regressions = compare_to_baseline(results, json.load(file), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression['model']} {regression['metric']}: {regression['baseline']:.4g} -> {regression['value']:.4g} ({regression['change']:+.1%})")
+        if regressions:
+            sys.exit(1)
+        print("No regressions against the baseline.")
+    else:
+        print(f"No baseline at {args.baseline}; run with --save-baseline to create one.")
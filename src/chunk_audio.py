@@ -1,6 +1,11 @@
 import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from pydub import AudioSegment
+import soundfile as sf
+import torch
+import torchaudio
 
 def split_audio_to_wav(file_path, output_dir, chunk_length=30):
     # Load the audio file
@@ -23,6 +28,73 @@ def split_audio_to_wav(file_path, output_dir, chunk_length=30):
 
     return len(chunks)  # Return the number of chunks created
 
+def stream_audio_chunks(file_path, chunk_length=30, target_sample_rate=16000):
+    """
+    Lazily reads an audio file one chunk at a time and yields mono chunks at the target sample rate.
+    Only a single chunk is held in memory, so multi-hour recordings stream with flat memory usage.
+
+    Args:
+        file_path (str): Path to the input audio file (any format libsndfile can read).
+        chunk_length (int): Length of each chunk in seconds.
+        target_sample_rate (int): Sample rate of the yielded chunks.
+
+    Yields:
+        tuple: The chunk index and a float32 tensor of shape (1, num_samples).
+    """
+    with sf.SoundFile(file_path) as audio_file:
+        sample_rate = audio_file.samplerate
+        chunk_frames = int(chunk_length * sample_rate)
+
+        # Build the resampler once so its kernel is reused for every chunk
+        resampler = None
+        if sample_rate != target_sample_rate:
+            resampler = torchaudio.transforms.Resample(orig_freq=sample_rate, new_freq=target_sample_rate)
+
+        # Read the file block-by-block instead of decoding it all at once
+        blocks = audio_file.blocks(blocksize=chunk_frames, dtype="float32", always_2d=True)
+        for idx, block in enumerate(blocks):
+            chunk = torch.from_numpy(block.mean(axis=1)).unsqueeze(0)
+            if resampler is not None:
+                chunk = resampler(chunk)
+            yield idx, chunk
+
+def stream_audio_to_wav(file_path, output_dir, chunk_length=30, target_sample_rate=16000, num_workers=4):
+    """
+    Streams an audio file into fixed-length .wav chunks, writing them with a pool of writer threads.
+    At most 2 * num_workers chunks are in flight, so memory stays bounded regardless of input length.
+
+    Args:
+        file_path (str): Path to the input audio file.
+        output_dir (str): Directory to store the chunked .wav files.
+        chunk_length (int): Length of each chunk in seconds.
+        target_sample_rate (int): Sample rate of the written chunks.
+        num_workers (int): Number of writer threads.
+
+    Returns:
+        int: The number of chunks created.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    base_name = os.path.splitext(os.path.basename(file_path))[0]
+
+    def write_chunk(idx, chunk):
+        output_path = os.path.join(output_dir, f"{base_name}_chunk{idx + 1}.wav")
+        sf.write(output_path, chunk.squeeze(0).numpy(), target_sample_rate)
+        print(f"Saved: {output_path}")
+
+    num_chunks = 0
+    pending = deque()
+    with ThreadPoolExecutor(max_workers=num_workers) as executor:
+        for idx, chunk in stream_audio_chunks(file_path, chunk_length, target_sample_rate):
+            # Wait on the oldest write before reading further ahead
+            if len(pending) >= 2 * num_workers:
+                pending.popleft().result()
+            pending.append(executor.submit(write_chunk, idx, chunk))
+            num_chunks += 1
+        while pending:
+            pending.popleft().result()
+
+    return num_chunks
+
 if __name__ == "__main__":
     
     # Access the current directory (src/)
@@ -31,4 +103,4 @@ if __name__ == "__main__":
     # Access the audio file you'd like to chunk
     input_path = curr_dir / "chunk" / "crete_persia.wav"
     output_path = curr_dir / "chunk"
-    num_chunks = split_audio_to_wav(file_path=input_path, output_dir=output_path)
\ No newline at end of file
+    num_chunks = stream_audio_to_wav(file_path=input_path, output_dir=output_path)
@@ -0,0 +1,190 @@
+import hashlib
+import json
+import os
+import re
+import numpy as np
+import soundfile as sf
+import torch
+from pathlib import Path
+from torchaudio.functional import resample
+from audio_cache import default_cache
+
+"""
+corpus_loader.py
+
+Packs a folder of clips (e.g., audio/16kHz) into one contiguous float32 file plus an offset/length index.
+The packed file is memory-mapped, so every clip is handed out as a zero-copy view instead of a freshly
+allocated tensor, and parallel worker processes share the same pages through the OS page cache
+instead of each holding their own copy of the audio.
+Every packing writes a new data file named after its content (<corpus>.<sha>.f32) and then swaps in the index
+that points at it, so replacing the index is the single commit point: readers see either the old index and data
+or the new ones, and processes that still map the old corpus keep reading it intact.
+augment_audio.py reads its clips through load_corpus.
+"""
+
+DEFAULT_AUDIO_DIR = Path(__file__).resolve().parent / "audio" / "16kHz"
+DEFAULT_CORPUS_PATH = Path(__file__).resolve().parent / ".cache" / "corpus" / "audio_16kHz"
+
+def natural_sort_key(path):
+    # Sort audio_2.wav before audio_10.wav
+    return [int(part) if part.isdigit() else part for part in re.split(r"(\d+)", Path(path).name)]
+
+def read_clip(audio_path, sample_rate):
+    # Read straight from the source rather than through the audio cache, which would keep a second copy on disk
+    samples, sr = sf.read(audio_path, dtype="float32", always_2d=True)
+    samples = samples.mean(axis=1)
+    if sr != sample_rate:
+        samples = resample(torch.from_numpy(samples), sr, sample_rate).numpy()
+    return np.ascontiguousarray(samples, dtype=np.float32)
+
+def pack_corpus(audio_dir=DEFAULT_AUDIO_DIR, corpus_path=DEFAULT_CORPUS_PATH):
+    """
+    Decodes every .wav file in a folder and packs the samples into a single float32 file.
+    Clips are appended one at a time, so packing never holds more than one clip in memory.
+    The samples go to a new content-addressed data file, and replacing the index is what publishes it.
+
+    Args:
+        audio_dir (str): Folder of .wav files to pack.
+        corpus_path (str): Output path without extension. Writes <corpus_path>.<sha>.f32 and <corpus_path>.json.
+
+    Returns:
+        dict: The corpus index.
+    """
+    cache = default_cache()
+    corpus_path = Path(corpus_path)
+    os.makedirs(corpus_path.parent, exist_ok=True)
+
+    index = {"sample_rate": cache.sample_rate, "clips": {}}
+    offset = 0
+    index_path = corpus_path.with_suffix(".json")
+    tmp_data_path = corpus_path.with_suffix(f".f32.{os.getpid()}.tmp")
+    tmp_index_path = corpus_path.with_suffix(f".json.{os.getpid()}.tmp")
+    digest = hashlib.sha256()
+    with open(tmp_data_path, "wb") as file:
+        for audio_path in sorted(Path(audio_dir).glob("*.wav"), key=natural_sort_key):
+            samples = read_clip(audio_path, cache.sample_rate)
+            file.write(samples.tobytes())
+            digest.update(samples.tobytes())
+            index["clips"][audio_path.stem] = {
+                "offset": offset,
+                "length": len(samples),
+                "source": str(audio_path.resolve()),
+                "sha256": cache.source_hash(audio_path),
+            }
+            offset += len(samples)
+    index["total_samples"] = offset
+
+    # Never overwrite a published data file: processes that have it memory-mapped would crash or read garbage
+    data_path = corpus_path.with_name(f"{corpus_path.name}.{digest.hexdigest()[:16]}.f32")
+    os.replace(tmp_data_path, data_path)
+    index["data_file"] = data_path.name
+
+    previous_data_file = None
+    if index_path.exists():
+        with open(index_path, "r") as file:
+            previous_data_file = json.load(file).get("data_file")
+    with open(tmp_index_path, "w") as file:
+        json.dump(index, file, indent=2)
+    os.replace(tmp_index_path, index_path)
+
+    # Keep the data file the previous index pointed at, for readers that opened that index a moment ago
+    for old_path in corpus_path.parent.glob(f"{corpus_path.name}.*.f32"):
+        if old_path.name not in (data_path.name, previous_data_file):
+            os.remove(old_path)
+    return index
+
+class AudioCorpus:
+    def __init__(self, corpus_path=DEFAULT_CORPUS_PATH):
+        """
+        Args:
+            corpus_path (str): Path of a packed corpus, without extension.
+        """
+        corpus_path = Path(corpus_path)
+        with open(corpus_path.with_suffix(".json"), "r") as file:
+            self.index = json.load(file)
+        self.sample_rate = self.index["sample_rate"]
+
+        # Copy-on-write keeps the views writable (torch.from_numpy needs that) while every
+        # process still reads the same shared pages until someone actually writes to them.
+        # An empty file can't be memory-mapped, so an empty corpus gets an empty array
+        if not self.index["total_samples"]:
+            self.data = np.zeros(0, dtype=np.float32)
+            return
+        data_path = corpus_path.parent / self.index["data_file"]
+        self.data = np.memmap(data_path, dtype=np.float32, mode="c", shape=(self.index["total_samples"],))
+
+    def __len__(self):
+        return len(self.index["clips"])
+
+    def __iter__(self):
+        return iter(self.index["clips"])
+
+    def __getitem__(self, name):
+        """
+        Returns a zero-copy NumPy view of a clip's samples.
+
+        Args:
+            name (str): Clip name, e.g. "audio_0".
+
+        Returns:
+            np.ndarray: The clip's float32 samples.
+        """
+        clip = self.index["clips"][name]
+        return self.data[clip["offset"]:clip["offset"] + clip["length"]]
+
+    def tensor(self, name):
+        """
+        Returns a zero-copy torch view of a clip's samples with shape (1, num_samples).
+
+        Args:
+            name (str): Clip name, e.g. "audio_0".
+
+        Returns:
+            torch.Tensor: The clip's float32 samples.
+        """
+        return torch.from_numpy(self[name]).unsqueeze(0)
+
+    def is_stale(self, audio_dir=DEFAULT_AUDIO_DIR):
+        """
+        Checks whether the source folder no longer matches what was packed.
+
+        Args:
+            audio_dir (str): Folder of .wav files the corpus was packed from.
+
+        Returns:
+            bool: True if clips were added, removed or edited since packing.
+        """
+        cache = default_cache()
+        audio_paths = {path.stem: path for path in Path(audio_dir).glob("*.wav")}
+        if set(audio_paths) != set(self.index["clips"]):
+            return True
+        return any(cache.source_hash(audio_paths[name]) != clip["sha256"] for name, clip in self.index["clips"].items())
+
+def load_corpus(audio_dir=DEFAULT_AUDIO_DIR, corpus_path=DEFAULT_CORPUS_PATH):
+    """
+    Opens the packed corpus for a folder, (re)packing it first if it is missing or out of date.
+
+    Args:
+        audio_dir (str): Folder of .wav files.
+        corpus_path (str): Path of the packed corpus, without extension.
+
+    Returns:
+        AudioCorpus: The memory-mapped corpus.
+    """
+    if Path(corpus_path).with_suffix(".json").exists():
+        with open(Path(corpus_path).with_suffix(".json"), "r") as file:
+            # Indexes from before data files were versioned have no "data_file" and get repacked
+            current = "data_file" in json.load(file)
+        if current:
+            corpus = AudioCorpus(corpus_path)
+            if not corpus.is_stale(audio_dir):
+                return corpus
+    pack_corpus(audio_dir, corpus_path)
+    return AudioCorpus(corpus_path)
+
+if __name__ == "__main__":
+
+    # Pack the 16kHz clips and report the size of each view
+    corpus = load_corpus()
+    for name in corpus:
+        print(f"{name}: {len(corpus[name]) / corpus.sample_rate:.2f}s")
@@ -0,0 +1,94 @@
+import hashlib
+import json
+import os
+import numpy as np
+import torch
+from pathlib import Path
+from audio_cache import default_cache, load_audio
+from tracing import count, span
+
+"""
+feature_store.py
+
+Persistent store for Whisper log-mel features.
+Features are computed once per (clip hash, feature extractor config) and saved as .npy files
+that are memory-mapped on load. whisper-base.en and whisper-tiny.en use the same 80-bin
+feature extractor config, so both models (and any decoding sweep) share the same entries.
+"""
+
+DEFAULT_FEATURE_DIR = Path(__file__).resolve().parent / ".cache" / "features"
+
+def feature_config_hash(feature_extractor):
+    """
+    Hashes the settings of a feature extractor that affect its output.
+
+    Args:
+        feature_extractor: A Hugging Face feature extractor (e.g., WhisperFeatureExtractor).
+
+    Returns:
+        str: A short hex digest of the config.
+    """
+    config = {
+        key: value for key, value in feature_extractor.to_dict().items()
+        if key != "processor_class" and not isinstance(value, np.ndarray)
+    }
+    return hashlib.sha256(json.dumps(config, sort_keys=True).encode()).hexdigest()[:16]
+
+class FeatureStore:
+    def __init__(self, store_dir=DEFAULT_FEATURE_DIR):
+        """
+        Args:
+            store_dir (str): Directory holding the cached feature arrays.
+        """
+        self.store_dir = Path(store_dir)
+        os.makedirs(self.store_dir, exist_ok=True)
+
+    def get(self, file_path, feature_extractor, sampling_rate=16000):
+        """
+        Returns the input features of an audio file, computing and storing them on first use.
+
+        Args:
+            file_path (str): Path to the source audio file.
+            feature_extractor: The feature extractor of the model (e.g., processor.feature_extractor).
+            sampling_rate (int): Sample rate of the audio fed to the feature extractor.
+
+        Returns:
+            torch.Tensor: The input features, with a batch dimension of 1.
+        """
+        key = f"{default_cache().source_hash(file_path)}_{feature_config_hash(feature_extractor)}"
+        npy_path = self.store_dir / f"{key}.npy"
+
+        if not npy_path.exists():
+            count("feature_store_miss")
+            audio = load_audio(file_path)
+            with span("feature_extraction", clip=Path(file_path).name):
+                features = feature_extractor(audio, sampling_rate=sampling_rate, return_tensors="np").input_features
+
+            # Write to a temporary file first so parallel runs never read a half-written array
+            tmp_path = npy_path.with_suffix(f".{os.getpid()}.tmp")
+            with open(tmp_path, "wb") as file:
+                np.save(file, features.astype(np.float32))
+            os.replace(tmp_path, npy_path)
+        else:
+            count("feature_store_hit")
+
+        # Copy-on-write keeps the mapped array writable, which torch.from_numpy expects
+        return torch.from_numpy(np.load(npy_path, mmap_mode="c"))
+
+_default_store = None
+
+def load_features(file_path, feature_extractor):
+    """
+    Loads the input features of an audio file through the shared feature store.
+
+    Args:
+        file_path (str): Path to the source audio file.
+        feature_extractor: The feature extractor of the model (e.g., processor.feature_extractor).
+
+    Returns:
+        torch.Tensor: The input features, with a batch dimension of 1.
+    """
+    global _default_store
+    if _default_store is None:
+        _default_store = FeatureStore()
+    return _default_store.get(file_path, feature_extractor)
@@ -1,17 +1,47 @@
 import openai
+import hashlib
 import json
+import sys
+from pathlib import Path
 from openai import AsyncOpenAI, OpenAI
 import os
 
-# Evaluate each pair of transcripts and save results to text files
-def evaluate_transcript_batch(transcripts_a, transcripts_b, output_folder):
+# Make the shared helpers in src/ importable when running this script directly
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from run_journal import RunJournal, write_file_atomically
+from tracing import span
+
+JOURNAL_DIR = Path(__file__).resolve().parent.parent / ".cache" / "journals"
+
+def journal_path(output_folder):
+    # One journal per output folder, kept out of the committed result folders
+    folder = Path(output_folder).resolve()
+    folder_hash = hashlib.sha256(str(folder).encode()).hexdigest()[:8]
+    return JOURNAL_DIR / f"{'_'.join(folder.parts[-3:])}_{folder_hash}.jsonl"
+
+# Evaluate each pair of transcripts with a judge function and save results to text files.
+# Every finished evaluation is recorded in a journal under src/.cache/journals, so a restarted run
+# skips pairs that were already judged (unless either transcript changed since).
+def run_judge_batch(transcripts_a, transcripts_b, output_folder, judge_fn):
     os.makedirs(output_folder, exist_ok=True)
+    journal = RunJournal(journal_path(output_folder))
     for i, (transcript_a, transcript_b) in enumerate(zip(transcripts_a, transcripts_b)):
-        result = evaluate_with_llm_judge(transcript_a, transcript_b)
         file_path = os.path.join(output_folder, f"evaluation_result_{i+1}.txt")
-        with open(file_path, "w") as file:
-            file.write(result)
+        pair_hash = hashlib.sha256(f"{transcript_a}\0{transcript_b}".encode()).hexdigest()[:16]
+        item = f"evaluation_result_{i+1}:{pair_hash}"
+        if journal.is_done(judge_fn.__name__, item) and os.path.exists(file_path):
+            print(f"Evaluation {i+1} already completed, skipping")
+            continue
+
+        with span("llm_call", judge=judge_fn.__name__, item=f"evaluation_result_{i+1}"):
+            result = judge_fn(transcript_a, transcript_b)
+        write_file_atomically(file_path, result)
+        journal.record(judge_fn.__name__, item, file_path)
         print(f"Evaluation {i+1} completed and saved to {file_path}")
+
+# Evaluate each pair of transcripts and save results to text files
+def evaluate_transcript_batch(transcripts_a, transcripts_b, output_folder):
+    run_judge_batch(transcripts_a, transcripts_b, output_folder, evaluate_with_llm_judge)
         
 
 def evaluate_with_llm_judge(transcript_a, transcript_b):
@@ -65,13 +95,7 @@ def evaluate_with_llm_judge(transcript_a, transcript_b):
 
 # Evaluate each pair of transcripts and save results to text files
 def evaluate_transcript_batch_with_meta_prompting(transcripts_a, transcripts_b, output_folder):
-    os.makedirs(output_folder, exist_ok=True)
-    for i, (transcript_a, transcript_b) in enumerate(zip(transcripts_a, transcripts_b)):
-        result = evaluate_with_meta_prompting(transcript_a, transcript_b)
-        file_path = os.path.join(output_folder, f"evaluation_result_{i+1}.txt")
-        with open(file_path, "w") as file:
-            file.write(result)
-        print(f"Evaluation {i+1} completed and saved to {file_path}")
+    run_judge_batch(transcripts_a, transcripts_b, output_folder, evaluate_with_meta_prompting)
 
 
 def evaluate_with_meta_prompting(transcript_a, transcript_b):
@@ -0,0 +1,144 @@
+import itertools
+import json
+import multiprocessing
+import os
+import time
+from pathlib import Path
+import sys
+import torch
+from transformers import AutoProcessor
+from stt_models import MODEL_IDS, THREAD_PROFILE_PATH, host_key, transcribe
+
+# Make the shared helpers in src/ importable when running this script directly
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from audio_cache import default_cache, load_audio
+from feature_store import load_features
+
+"""
+autotune_threads.py
+
+Benchmarks every model over a sample of audio/16kHz across a grid of intra-op and interop thread counts,
+then saves the fastest configuration for this host to thread_profiles.json.
+stt_models.py applies the saved thread counts automatically whenever it loads a model on a matching host.
+The transcript runners transcribe one clip at a time in a single process, so that is how every configuration
+is measured; tuning batch sizes or worker counts the runners never use would only slow the search down.
+The sampled clips are decoded and their features computed before any timing, so the first configuration
+doesn't pay for filling the audio cache and feature store that every later one reads from.
+"""
+
+def init_worker(model_name, intra_op_threads, interop_threads, warmup_file):
+    # Runs first in the fresh worker process, before torch has started any parallel work
+    os.environ["STT_THREAD_PROFILE"] = "0"
+    torch.set_num_threads(intra_op_threads)
+    torch.set_num_interop_threads(interop_threads)
+
+    # Load the model and warm it up before the worker accepts the timed task
+    transcribe(model_name, warmup_file)
+
+def run_clips(model_name, audio_files):
+    # Time inside the worker, so neither process startup nor the warm-up is counted
+    start = time.perf_counter()
+    for audio_file in audio_files:
+        transcribe(model_name, audio_file)
+    return len(audio_files) / (time.perf_counter() - start)
+
+def prewarm_caches(model_names, audio_files):
+    """
+    Fills the audio cache and the feature store for the sampled clips, so no timed run decodes audio
+    or extracts features from scratch.
+
+    Args:
+        model_names (list of str): Keys of MODEL_IDS.
+        audio_files (list of str): Sample of audio files to benchmark with.
+    """
+    for audio_file in audio_files:
+        load_audio(audio_file)
+    for model_name in model_names:
+        # Moonshine reads raw audio, only Whisper has log-mel features to store
+        if model_name.startswith("whisper"):
+            feature_extractor = AutoProcessor.from_pretrained(MODEL_IDS[model_name]).feature_extractor
+            for audio_file in audio_files:
+                load_features(audio_file, feature_extractor)
+    # The workers are separate processes, so they only see cache entries that are on disk
+    default_cache().flush()
+
+def benchmark_config(model_name, audio_files, intra_op_threads, interop_threads):
+    """
+    Measures throughput of one configuration in a fresh worker process.
+
+    Args:
+        model_name (str): A key of MODEL_IDS.
+        audio_files (list of str): Sample of audio files to transcribe.
+        intra_op_threads (int): torch.set_num_threads in the worker.
+        interop_threads (int): torch.set_num_interop_threads in the worker.
+
+    Returns:
+        float: Clips transcribed per second.
+    """
+    context = multiprocessing.get_context("spawn")
+    initargs = (model_name, intra_op_threads, interop_threads, audio_files[0])
+    with context.Pool(1, initializer=init_worker, initargs=initargs) as pool:
+        return pool.apply(run_clips, (model_name, audio_files))
+
+def config_grid(model_name, num_cpus):
+    """
+    Lists the configurations worth trying on a host, never oversubscribing the CPUs.
+
+    Args:
+        model_name (str): A key of MODEL_IDS.
+        num_cpus (int): Number of logical CPUs.
+
+    Returns:
+        list of dict: Candidate configurations.
+    """
+    thread_counts = sorted({1, 2, 4, 8, 16, num_cpus} & set(range(1, num_cpus + 1)))
+    return [
+        {"intra_op_threads": intra, "interop_threads": interop}
+        for intra, interop in itertools.product(thread_counts, [1, 2])
+    ]
+
+def autotune(model_names, audio_files, profile_path=THREAD_PROFILE_PATH):
+    """
+    Finds the fastest configuration for each model and stores it under this host's key.
+
+    Args:
+        model_names (list of str): Keys of MODEL_IDS.
+        audio_files (list of str): Sample of audio files to benchmark with.
+        profile_path (str): Path of the profile file.
+
+    Returns:
+        dict: The best configuration (with its throughput) of each model.
+    """
+    profiles = {}
+    if Path(profile_path).exists():
+        with open(profile_path, "r") as file:
+            profiles = json.load(file)
+
+    prewarm_caches(model_names, audio_files)
+
+    best = {}
+    for model_name in model_names:
+        for config in config_grid(model_name, os.cpu_count()):
+            clips_per_second = benchmark_config(model_name, audio_files, **config)
+            print(f"{model_name} {config}: {clips_per_second:.2f} clips/s")
+            if model_name not in best or clips_per_second > best[model_name]["clips_per_second"]:
+                best[model_name] = dict(config, clips_per_second=round(clips_per_second, 3))
+
+    profiles.setdefault(host_key(), {}).update(best)
+    with open(profile_path, "w") as file:
+        json.dump(profiles, file, indent=2)
+    return best
+
+if __name__ == "__main__":
+
+    # Access the current (src/make_transcripts) and parent (src/) directory via Pathlib
+    curr_dir = Path(__file__).resolve().parent
+    parent_dir = curr_dir.parent
+
+    # A sample of 8 clips spread evenly over the corpus keeps a full grid search to a reasonable length
+    audio_paths = sorted((parent_dir / "audio/16kHz").glob("audio_*.wav"), key=lambda path: int(path.stem.split("_")[1]))
+    step = max(len(audio_paths) / 8, 1)
+    audio_files = [str(audio_paths[int(i * step)]) for i in range(min(8, len(audio_paths)))]
+    best = autotune(list(MODEL_IDS), audio_files)
+    for model_name, config in best.items():
+        print(f"Best for {model_name} on {host_key()}: {config}")
@@ -0,0 +1,144 @@
+import sys
+import time
+import zlib
+from pathlib import Path
+import torch
+from jiwer import wer
+from stt_models import apply_thread_profile, load_whisper
+
+# Make the shared helpers in src/ importable when running this script directly
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from feature_store import load_features
+from manifest import load_manifest
+
+"""
+cascade_transcribe.py
+
+Confidence-gated model cascade: every clip goes through whisper-tiny.en first, and only clips where
+tiny looks unsure are escalated to whisper-base.en. Confidence is measured the same way Whisper does
+for its temperature fallback: the average token log-probability, plus the gzip compression ratio of
+the text to catch repetitive (looping) output.
+"""
+
+def compression_ratio(text):
+    text_bytes = text.encode("utf-8")
+    return len(text_bytes) / len(zlib.compress(text_bytes)) if text_bytes else 0.0
+
+def transcribe_with_confidence(model_name, input_audio):
+    """
+    Transcribes a clip with a Whisper model and scores how confident the model was.
+
+    Args:
+        model_name (str): A Whisper key of MODEL_IDS.
+        input_audio (str): Path to the input audio file.
+
+    Returns:
+        dict: The transcription, its average token log-probability, compression ratio, and inference time.
+    """
+    model, processor = load_whisper(model_name)
+    input_features = load_features(input_audio, processor.feature_extractor)
+
+    start = time.perf_counter()
+    with torch.no_grad():
+        output = model.generate(input_features, output_scores=True, return_dict_in_generate=True)
+    seconds = time.perf_counter() - start
+
+    token_logprobs = model.compute_transition_scores(output.sequences, output.scores, normalize_logits=True)
+    transcription = processor.tokenizer.batch_decode(output.sequences, skip_special_tokens=True)[0].strip()
+    return {
+        "transcription": transcription,
+        "avg_logprob": float(token_logprobs.mean()) if token_logprobs.numel() else float("-inf"),
+        "compression_ratio": compression_ratio(transcription),
+        "seconds": seconds,
+    }
+
+def should_escalate(result, logprob_threshold=-0.5, max_compression_ratio=2.4):
+    return result["avg_logprob"] < logprob_threshold or result["compression_ratio"] > max_compression_ratio
+
+class CascadeTranscriber:
+    def __init__(self, first_model="whisper_tiny", fallback_model="whisper_base", logprob_threshold=-0.5, max_compression_ratio=2.4):
+        """
+        Args:
+            first_model (str): Cheap model that sees every clip.
+            fallback_model (str): Expensive model that only sees low-confidence clips.
+            logprob_threshold (float): Clips whose average token log-probability falls below this are escalated.
+            max_compression_ratio (float): Clips whose text compresses better than this (i.e., repeats itself) are escalated.
+        """
+        self.first_model = first_model
+        self.fallback_model = fallback_model
+        # The first model sees every clip, so the process runs with its thread profile
+        apply_thread_profile(first_model)
+        self.logprob_threshold = logprob_threshold
+        self.max_compression_ratio = max_compression_ratio
+
+    def transcribe(self, input_audio):
+        """
+        Transcribes a clip, escalating to the fallback model on low confidence.
+
+        Args:
+            input_audio (str): Path to the input audio file.
+
+        Returns:
+            tuple: The transcription and whether the clip was escalated.
+        """
+        result = transcribe_with_confidence(self.first_model, input_audio)
+        if should_escalate(result, self.logprob_threshold, self.max_compression_ratio):
+            return transcribe_with_confidence(self.fallback_model, input_audio)["transcription"], True
+        return result["transcription"], False
+
+def sweep_thresholds(audio_files, reference_transcripts, thresholds, first_model="whisper_tiny", fallback_model="whisper_base"):
+    """
+    Evaluates the cascade at several confidence thresholds.
+    Both models are run once on every clip, and each threshold is then simulated from those results.
+
+    Args:
+        audio_files (list of str): Paths to the audio files.
+        reference_transcripts (list of str): Reference transcripts, aligned with audio_files.
+        thresholds (list of float): Average log-probability thresholds to evaluate.
+        first_model (str): Cheap model that sees every clip.
+        fallback_model (str): Expensive model that only sees low-confidence clips.
+
+    Returns:
+        list of dict: Escalation fraction, average seconds per clip and WER for each threshold.
+    """
+    apply_thread_profile(first_model)
+    first_results = [transcribe_with_confidence(first_model, audio_file) for audio_file in audio_files]
+    fallback_results = [transcribe_with_confidence(fallback_model, audio_file) for audio_file in audio_files]
+
+    rows = []
+    for threshold in thresholds:
+        escalated = [should_escalate(result, threshold) for result in first_results]
+        transcripts = [
+            fallback["transcription"] if escalate else first["transcription"]
+            for first, fallback, escalate in zip(first_results, fallback_results, escalated)
+        ]
+        seconds = [
+            first["seconds"] + (fallback["seconds"] if escalate else 0.0)
+            for first, fallback, escalate in zip(first_results, fallback_results, escalated)
+        ]
+        rows.append({
+            "threshold": threshold,
+            "escalated": sum(escalated) / len(escalated),
+            "seconds_per_clip": sum(seconds) / len(seconds),
+            "wer": wer(reference_transcripts, transcripts),
+        })
+    return rows
+
+if __name__ == "__main__":
+
+    # Access the current (src/make_transcripts) and parent (src/) directory via Pathlib
+    curr_dir = Path(__file__).resolve().parent
+    parent_dir = curr_dir.parent
+
+    # Pair each clip with its reference transcript through the dataset manifest
+    records = list(load_manifest().filter(has_reference=True))
+    reference_transcripts = [record["reference"] for record in records]
+    audio_files = [parent_dir / record["audio_path"] for record in records]
+
+    # -inf only escalates repetitive output, +inf always escalates (base only)
+    thresholds = [float("-inf"), -1.0, -0.7, -0.5, -0.3, -0.2, float("inf")]
+    rows = sweep_thresholds(audio_files, reference_transcripts, thresholds)
+
+    print(f"{'threshold':>10}{'escalated':>11}{'s/clip':>9}{'WER%':>8}")
+    for row in rows:
+        print(f"{row['threshold']:>10}{row['escalated']:>11.0%}{row['seconds_per_clip']:>9.3f}{100 * row['wer']:>8.2f}")
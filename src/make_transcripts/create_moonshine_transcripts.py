@@ -1,27 +1,30 @@
-import torchaudio
-from torchaudio.functional import resample
-from transformers import AutoModelForSpeechSeq2Seq, PreTrainedTokenizerFast
+import sys
+import numpy as np
+import torch
 from jiwer import wer
 from pathlib import Path
 import einops
+from stt_models import load_moonshine
+from transcript_cache import TranscriptCache
 
-def evaluate_moonshine(input_audio, input_reference):
-    
-    # Step 1: Load the audio file
-    audio, sr = torchaudio.load(input_audio)
+# Make the shared helpers in src/ importable when running this script directly
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from audio_cache import load_audio
+from manifest import load_manifest
+from tracing import span
 
-    # Step 2: Resample audio to 16kHz if needed
-    if sr != 16000:
-        audio = resample(audio, sr, 16000)
-        print(f"Resampled audio to 16kHz")
+def evaluate_moonshine(input_audio, input_reference, precision="fp32", backend="torch"):
+    
+    # Step 1 & 2: Load the audio file at 16kHz (decoded once, then served from the audio cache)
+    audio = torch.from_numpy(np.array(load_audio(input_audio))).unsqueeze(0)
 
-    # Step 3: Load the model and tokenizer
-    model = AutoModelForSpeechSeq2Seq.from_pretrained("usefulsensors/moonshine-base", trust_remote_code=True)
-    tokenizer = PreTrainedTokenizerFast.from_pretrained("usefulsensors/moonshine-base")
+    # Step 3: Load the model and tokenizer (once per process, at the requested precision and backend)
+    model, tokenizer = load_moonshine("moonshine", precision, backend)
 
     # Step 4: Perform transcription
     print("Transcribing audio...")
-    tokens = model(audio)
+    with torch.no_grad(), span("generate", model="moonshine", clip=Path(input_audio).name):
+        tokens = model(audio.to(model.dtype))
     transcription = tokenizer.decode(tokens[0], skip_special_tokens=True)
     print("Transcription:", transcription)
 
@@ -29,7 +32,8 @@ def evaluate_moonshine(input_audio, input_reference):
     reference_transcript = input_reference.strip()
 
     # Step 6: Evaluate transcription accuracy
-    error_rate = wer(reference_transcript, transcription)
+    with span("wer", clip=Path(input_audio).name):
+        error_rate = wer(reference_transcript, transcription)
     print(f"Word Error Rate (WER): {error_rate:.2%}")
     
     # Step 7: Return the STT transcript with the WER%
@@ -41,27 +45,29 @@ if __name__ == "__main__":
     curr_dir = Path(__file__).resolve().parent
     parent_dir = curr_dir.parent
     
-    # Access the reference transcripts
-    ref_path = parent_dir / "transcripts/reference_transcripts.txt"
-    
-    # Extract the reference sentences from the txt file
-    reference_transcripts = []
-    with open(ref_path, "r") as file:
-        for line in file:
-            stripped_line = line.strip()
-            reference_transcripts.append(stripped_line)
+    # Pair each clip with its reference transcript through the dataset manifest
+    records = list(load_manifest().filter(has_reference=True))
     
     # Store the STT-generated transcripts into a txt file
-    num_transcripts = len(reference_transcripts)
+    num_transcripts = len(records)
     stt_transcripts = ["" for i in range(num_transcripts)]
     
+    # Only transcribe clips whose audio, model revision or decoding settings changed since the last run
+    cache = TranscriptCache()
+    params = {"precision": "fp32", "backend": "torch"}
+    cache_keys = [None for i in range(num_transcripts)]
+    
     # Iterate through all the transcripts
     for k in range(num_transcripts):
-        input_path = parent_dir / f"audio/16kHz/audio_{k}.wav"
-        curr_transcript, curr_wer = evaluate_moonshine(input_audio=input_path, input_reference=reference_transcripts[k])
+        input_path = parent_dir / records[k]["audio_path"]
+        transcribe_clip = lambda: evaluate_moonshine(input_audio=input_path, input_reference=records[k]["reference"], **params)[0]
+        curr_transcript, cache_keys[k], cached = cache.transcribe(input_path, "moonshine", transcribe_clip, params)
+        if cached:
+            print(f"Using cached transcript for {input_path.name}")
         stt_transcripts[k] = curr_transcript
     
-    # Store the STT-generated transcripts into a TXT file
+    # Store the STT-generated transcripts into a TXT file, and record which model/config produced each line
     output_path = parent_dir / "transcripts/moonshine_transcripts.txt"
     with open(output_path, "w") as file:
         file.write("\n".join(stt_transcripts) + "\n")
+    cache.record_output(output_path, cache_keys)
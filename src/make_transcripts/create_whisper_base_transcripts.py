@@ -1,71 +1,84 @@
-import torchaudio
-from torchaudio.functional import resample
-from transformers import AutoModelForSpeechSeq2Seq, AutoProcessor
+import argparse
+import sys
+import torch
 from jiwer import wer
 from pathlib import Path
 import einops
+from stt_models import load_assistant, load_whisper
+from transcript_cache import TranscriptCache
 
-def evaluate_whisper_base(input_audio, input_reference):
-    
-    # Step 1: Load the audio file
-    audio, sr = torchaudio.load(input_audio)
-
-    # Step 2: Resample audio to 16kHz if needed
-    if sr != 16000:
-        audio = resample(audio, sr, 16000)
-        print(f"Resampled audio to 16kHz")
+# Make the shared helpers in src/ importable when running this script directly
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from feature_store import load_features
+from tracing import span
+from manifest import load_manifest
 
-    # Step 3: Load the model and processor
-    model = AutoModelForSpeechSeq2Seq.from_pretrained("openai/whisper-base.en")
-    processor = AutoProcessor.from_pretrained("openai/whisper-base.en")
+def evaluate_whisper_base(input_audio, input_reference, precision="fp32", backend="torch", assistant_model=None):
+    
+    # Step 1: Load the model and processor (once per process, at the requested precision and backend)
+    model, processor = load_whisper("whisper_base", precision, backend)
+    generate_kwargs = {}
+    if assistant_model:
+        # Greedy assisted decoding gives the same transcript as plain decoding, with the draft model proposing tokens
+        generate_kwargs["assistant_model"] = load_assistant("whisper_base", assistant_model, precision, backend)
 
-    # Step 4: Preprocess the audio
+    # Step 2: Preprocess the audio at 16kHz (log-mel features are computed once, then served from the feature store)
     print("Preprocessing audio...")
-    input_features = processor.feature_extractor(audio.squeeze().numpy(), sampling_rate=16000, return_tensors="pt").input_features
+    input_features = load_features(input_audio, processor.feature_extractor).to(model.dtype)
 
-    # Step 5: Perform transcription
+    # Step 3: Perform transcription
     print("Transcribing audio...")
-    predicted_ids = model.generate(input_features)
+    with torch.no_grad(), span("generate", model="whisper_base", clip=Path(input_audio).name):
+        predicted_ids = model.generate(input_features, **generate_kwargs)
     transcription = processor.tokenizer.batch_decode(predicted_ids, skip_special_tokens=True)[0]
     print("Transcription:", transcription)
 
-    # Step 6: Load the reference transcript
+    # Step 4: Load the reference transcript
     reference_transcript = input_reference.strip()
 
-    # Step 7: Evaluate transcription accuracy
-    error_rate = wer(reference_transcript, transcription)
+    # Step 5: Evaluate transcription accuracy
+    with span("wer", clip=Path(input_audio).name):
+        error_rate = wer(reference_transcript, transcription)
     print(f"Word Error Rate (WER): {error_rate:.2%}")
     
-    # Step 8: Return the STT transcript with the WER%
+    # Step 6: Return the STT transcript with the WER%
     return transcription, error_rate
 
 if __name__ == "__main__":
     
+    parser = argparse.ArgumentParser(description="Transcribe every clip with whisper-base.en.")
+    parser.add_argument("--assistant", choices=["whisper_tiny"], help="Draft model for assisted (speculative) decoding")
+    args = parser.parse_args()
+    
     # Access the current (src/make_transcripts) and parent (src/) directory via Pathlib
     curr_dir = Path(__file__).resolve().parent
     parent_dir = curr_dir.parent
     
-    # Access the reference transcripts
-    ref_path = parent_dir / "transcripts/reference_transcripts.txt"
-    
-    # Extract the reference sentences from the txt file
-    reference_transcripts = []
-    with open(ref_path, "r") as file:
-        for line in file:
-            stripped_line = line.strip()
-            reference_transcripts.append(stripped_line)
+    # Pair each clip with its reference transcript through the dataset manifest
+    records = list(load_manifest().filter(has_reference=True))
     
     # Store the STT-generated transcripts into a txt file
-    num_transcripts = len(reference_transcripts)
+    num_transcripts = len(records)
     stt_transcripts = ["" for i in range(num_transcripts)]
     
+    # Only transcribe clips whose audio, model revision or decoding settings changed since the last run
+    cache = TranscriptCache()
+    params = {"precision": "fp32", "backend": "torch"}
+    if args.assistant:
+        params["assistant_model"] = args.assistant
+    cache_keys = [None for i in range(num_transcripts)]
+    
     # Iterate through all the transcripts
     for k in range(num_transcripts):
-        input_path = parent_dir / f"audio/16kHz/audio_{k}.wav"
-        curr_transcript, curr_wer = evaluate_whisper_base(input_audio=input_path, input_reference=reference_transcripts[k])
+        input_path = parent_dir / records[k]["audio_path"]
+        transcribe_clip = lambda: evaluate_whisper_base(input_audio=input_path, input_reference=records[k]["reference"], **params)[0]
+        curr_transcript, cache_keys[k], cached = cache.transcribe(input_path, "whisper_base", transcribe_clip, params)
+        if cached:
+            print(f"Using cached transcript for {input_path.name}")
         stt_transcripts[k] = curr_transcript
     
-    # Store the STT-generated transcripts into a TXT file
+    # Store the STT-generated transcripts into a TXT file, and record which model/config produced each line
     output_path = parent_dir / "transcripts/whisper_base_transcripts.txt"
     with open(output_path, "w") as file:
         file.write("\n".join(stt_transcripts) + "\n")
+    cache.record_output(output_path, cache_keys)
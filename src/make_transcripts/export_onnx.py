@@ -0,0 +1,146 @@
+import os
+import time
+from pathlib import Path
+import torch
+from jiwer import wer
+from stt_models import DEFAULT_ONNX_DIR, MODEL_IDS, transcribe
+
+"""
+export_onnx.py
+
+Exports the STT models to ONNX and checks that the ONNX Runtime backend transcribes exactly like PyTorch.
+- Whisper is exported with optimum into an encoder graph and a decoder graph with KV cache (past key values).
+- Moonshine's remote code can't be traced by optimum, so we use the encoder/merged KV-cache decoder graphs
+  that Useful Sensors publishes for moonshine-base, run through the useful-moonshine-onnx package.
+
+Requires the optional ONNX dependencies listed at the end of requirements.txt.
+"""
+
+class OnnxWhisper:
+    def __init__(self, ort_model):
+        """
+        Args:
+            ort_model: An optimum ORTModelForSpeechSeq2Seq.
+        """
+        self.ort_model = ort_model
+        self.dtype = torch.float32
+
+    def generate(self, input_features, **generate_kwargs):
+        return self.ort_model.generate(input_features, **generate_kwargs)
+
+class OnnxMoonshine:
+    def __init__(self, onnx_model):
+        """
+        Args:
+            onnx_model: A moonshine_onnx.MoonshineOnnxModel.
+        """
+        self.onnx_model = onnx_model
+        self.dtype = torch.float32
+
+    def __call__(self, audio):
+        # Mirror the PyTorch model: (1, num_samples) audio in, a batch of token lists out
+        return self.onnx_model.generate(audio.numpy())
+
+def export_onnx(model_name, output_dir=None):
+    """
+    Exports a model to ONNX.
+
+    Args:
+        model_name (str): A key of MODEL_IDS.
+        output_dir (str): Where to save the ONNX graphs. Defaults to src/.cache/onnx/<model_name>.
+
+    Returns:
+        Path: The directory holding the exported model, or None for moonshine, whose published graphs
+            live in the Hugging Face cache instead.
+    """
+    if model_name == "moonshine":
+        # Downloads (and caches) the published graphs instead of exporting them ourselves
+        from moonshine_onnx import MoonshineOnnxModel
+        MoonshineOnnxModel(model_name="moonshine/base")
+        print(f"Fetched the published ONNX graphs for {model_name}")
+        return None
+
+    from optimum.onnxruntime import ORTModelForSpeechSeq2Seq
+    output_dir = Path(output_dir or DEFAULT_ONNX_DIR / model_name)
+    os.makedirs(output_dir, exist_ok=True)
+    ort_model = ORTModelForSpeechSeq2Seq.from_pretrained(MODEL_IDS[model_name], export=True, use_cache=True)
+    ort_model.save_pretrained(output_dir)
+    print(f"Exported {model_name} to {output_dir}")
+    return output_dir
+
+def load_whisper_onnx(model_name):
+    """
+    Loads an exported Whisper model into ONNX Runtime, exporting it first if needed.
+
+    Args:
+        model_name (str): A Whisper key of MODEL_IDS.
+
+    Returns:
+        OnnxWhisper: The model, with the same generate() interface as the PyTorch model.
+    """
+    from optimum.onnxruntime import ORTModelForSpeechSeq2Seq
+    output_dir = DEFAULT_ONNX_DIR / model_name
+    if not (output_dir / "config.json").exists():
+        export_onnx(model_name, output_dir)
+    return OnnxWhisper(ORTModelForSpeechSeq2Seq.from_pretrained(output_dir, use_cache=True))
+
+def load_moonshine_onnx(model_name="moonshine"):
+    """
+    Loads the published moonshine-base ONNX graphs into ONNX Runtime.
+
+    Args:
+        model_name (str): A key of MODEL_IDS. Only "moonshine" (moonshine-base) is supported.
+
+    Returns:
+        OnnxMoonshine: The model, callable like the PyTorch model.
+    """
+    from moonshine_onnx import MoonshineOnnxModel
+    return OnnxMoonshine(MoonshineOnnxModel(model_name="moonshine/base"))
+
+def check_parity(model_name, audio_files):
+    """
+    Transcribes every clip with the torch and onnx backends and compares the outputs.
+
+    Args:
+        model_name (str): A key of MODEL_IDS.
+        audio_files (list of str): Paths to the audio files.
+
+    Returns:
+        dict: Mismatched clips, the WER% between the two backends, and the time each backend took.
+    """
+    outputs = {"torch": [], "onnx": []}
+    seconds = {"torch": 0.0, "onnx": 0.0}
+    for backend in outputs:
+        # Load (and export, if needed) outside of the timed loop
+        transcribe(model_name, audio_files[0], backend=backend)
+        for audio_file in audio_files:
+            start = time.perf_counter()
+            outputs[backend].append(transcribe(model_name, audio_file, backend=backend))
+            seconds[backend] += time.perf_counter() - start
+
+    mismatches = [
+        str(audio_file) for audio_file, torch_text, onnx_text in zip(audio_files, outputs["torch"], outputs["onnx"])
+        if torch_text != onnx_text
+    ]
+    return {
+        "mismatches": mismatches,
+        "backend_wer": wer(outputs["torch"], outputs["onnx"]),
+        "seconds": seconds,
+    }
+
+if __name__ == "__main__":
+
+    # Access the current (src/make_transcripts) and parent (src/) directory via Pathlib
+    curr_dir = Path(__file__).resolve().parent
+    parent_dir = curr_dir.parent
+    audio_files = sorted((parent_dir / "audio/16kHz").glob("audio_*.wav"), key=lambda path: int(path.stem.split("_")[1]))
+
+    # Export every model, then make sure ONNX Runtime transcribes exactly like PyTorch
+    for model_name in MODEL_IDS:
+        export_onnx(model_name)
+        report = check_parity(model_name, audio_files)
+        print(f"{model_name}: torch {report['seconds']['torch']:.2f}s, onnx {report['seconds']['onnx']:.2f}s")
+        if report["mismatches"]:
+            print(f"  Transcripts differ (WER between backends: {report['backend_wer']:.2%}) on: {report['mismatches']}")
+        else:
+            print("  Transcripts match on every clip.")
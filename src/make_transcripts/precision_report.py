@@ -0,0 +1,170 @@
+import gc
+import json
+import multiprocessing
+import resource
+import sys
+import time
+from pathlib import Path
+from jiwer import wer
+from stt_models import PRECISIONS, bf16_supported, load_moonshine, load_whisper, transcribe
+
+# Make the shared helpers in src/ importable when running this script directly
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from manifest import load_manifest
+
+"""
+precision_report.py
+
+Compares inference precisions (fp32, dynamic int8, bf16) for every featured model over audio/16kHz.
+Each (model, precision) pair runs in its own process so that its memory is measured in isolation.
+Quantizing loads the fp32 weights first, so the process peak says nothing about the quantized model. Instead the
+report shows the resident size once the model is loaded and converted, and the peak growth on top of it during
+inference, next to latency and the WER% difference against the fp32 run of the same model.
+"""
+
+def _proc_status_mb(field):
+    # /proc/self/status reports sizes like "VmRSS:   123456 kB"; it only exists on Linux
+    try:
+        with open("/proc/self/status", "r") as file:
+            for line in file:
+                if line.startswith(f"{field}:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+def peak_rss_mb():
+    """
+    Returns the process's peak resident set size in MB, since it started or since the last reset_peak_rss().
+    """
+    peak = _proc_status_mb("VmHWM")
+    if peak is not None:
+        return peak
+    # ru_maxrss is reported in kilobytes on Linux but in bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+def resident_mb():
+    """
+    Returns the process's current resident set size in MB, or None where /proc isn't available.
+    """
+    return _proc_status_mb("VmRSS")
+
+def reset_peak_rss():
+    """
+    Resets the peak that peak_rss_mb() reports to the current resident size (Linux only).
+
+    Returns:
+        bool: True if the peak was reset.
+    """
+    try:
+        with open("/proc/self/clear_refs", "w") as file:
+            file.write("5")
+        return True
+    except OSError:
+        return False
+
+def run_precision(model_name, precision, audio_files):
+    """
+    Transcribes every clip with one model at one precision. Meant to run in a fresh process.
+
+    Args:
+        model_name (str): A key of MODEL_IDS.
+        precision (str): One of PRECISIONS.
+        audio_files (list of str): Paths to the audio files.
+
+    Returns:
+        dict: The transcripts, per-clip latencies (excluding the first, warm-up clip's model load), the resident size
+        after loading (MB) and the peak growth during inference (MB, None where the peak can't be reset).
+    """
+    # Load and convert the model, then measure once the fp32 weights that quantization replaced are released
+    loader = load_whisper if model_name.startswith("whisper") else load_moonshine
+    loader(model_name, precision)
+    gc.collect()
+    loaded_rss_mb = resident_mb()
+    peak_was_reset = loaded_rss_mb is not None and reset_peak_rss()
+
+    # Warm up outside of the timed loop
+    transcribe(model_name, audio_files[0], precision=precision)
+
+    transcripts, latencies = [], []
+    for audio_file in audio_files:
+        start = time.perf_counter()
+        transcripts.append(transcribe(model_name, audio_file, precision=precision))
+        latencies.append(time.perf_counter() - start)
+    return {
+        "transcripts": transcripts,
+        "latencies": latencies,
+        "loaded_rss_mb": loaded_rss_mb,
+        "inference_peak_mb": peak_rss_mb() - loaded_rss_mb if peak_was_reset else None,
+    }
+
+def precision_report(model_names, audio_files, reference_transcripts, precisions=PRECISIONS):
+    """
+    Runs every (model, precision) pair in a separate process and compares them against fp32.
+
+    Args:
+        model_names (list of str): Keys of MODEL_IDS.
+        audio_files (list of str): Paths to the audio files.
+        reference_transcripts (list of str): Reference transcripts, aligned with audio_files.
+        precisions (list of str): Precisions to compare. fp32 is always included as the baseline.
+
+    Returns:
+        list of dict: One row per (model, precision) pair.
+    """
+    if "bf16" in precisions and not bf16_supported():
+        print("Skipping bf16: this CPU does not support bfloat16 inference.")
+        precisions = [precision for precision in precisions if precision != "bf16"]
+    precisions = ["fp32"] + [precision for precision in precisions if precision != "fp32"]
+
+    rows = []
+    context = multiprocessing.get_context("spawn")
+    for model_name in model_names:
+        baseline = None
+        for precision in precisions:
+            with context.Pool(1) as pool:
+                result = pool.apply(run_precision, (model_name, precision, audio_files))
+
+            error_rate = wer(reference_transcripts, result["transcripts"])
+            if precision == "fp32":
+                baseline = {"wer": error_rate, "transcripts": result["transcripts"]}
+
+            latencies = sorted(result["latencies"])
+            rows.append({
+                "model": model_name,
+                "precision": precision,
+                "mean_latency": sum(latencies) / len(latencies),
+                "p50_latency": latencies[len(latencies) // 2],
+                "loaded_rss_mb": result["loaded_rss_mb"],
+                "inference_peak_mb": result["inference_peak_mb"],
+                "wer": error_rate,
+                "wer_delta_vs_fp32": error_rate - baseline["wer"],
+                "changed_vs_fp32": sum(a != b for a, b in zip(result["transcripts"], baseline["transcripts"])),
+            })
+    return rows
+
+if __name__ == "__main__":
+
+    # Access the current (src/make_transcripts) and parent (src/) directory via Pathlib
+    curr_dir = Path(__file__).resolve().parent
+    parent_dir = curr_dir.parent
+
+    # Pair each clip with its reference transcript through the dataset manifest
+    records = list(load_manifest().filter(has_reference=True))
+    reference_transcripts = [record["reference"] for record in records]
+    audio_files = [str(parent_dir / record["audio_path"]) for record in records]
+
+    rows = precision_report(["whisper_base", "whisper_tiny", "moonshine"], audio_files, reference_transcripts)
+
+    format_mb = lambda value: f"{value:>9.0f}" if value is not None else f"{'-':>9}"
+    print(f"{'model':<14}{'precision':<11}{'mean s':>8}{'p50 s':>8}{'RSS MB':>9}{'+peak MB':>9}{'WER%':>8}{'dWER%':>8}{'changed':>9}")
+    for row in rows:
+        print(
+            f"{row['model']:<14}{row['precision']:<11}{row['mean_latency']:>8.3f}{row['p50_latency']:>8.3f}"
+            f"{format_mb(row['loaded_rss_mb'])}{format_mb(row['inference_peak_mb'])}"
+            f"{100 * row['wer']:>8.2f}{100 * row['wer_delta_vs_fp32']:>+8.2f}{row['changed_vs_fp32']:>9}"
+        )
+
+    # Store the report next to the WER results
+    with open(parent_dir / "wer/precision_report.json", "w") as file:
+        json.dump(rows, file, indent=2)
@@ -0,0 +1,134 @@
+import sys
+import time
+from pathlib import Path
+import torch
+from stt_models import load_assistant, load_whisper
+
+# Make the shared helpers in src/ importable when running this script directly
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from feature_store import load_features
+
+"""
+speculative_whisper.py
+
+Assisted (speculative) decoding: whisper-tiny.en drafts tokens and whisper-base.en verifies them.
+Both models share the same English tokenizer, and greedy assisted decoding keeps a drafted token only
+when it matches base's own argmax, so the output is identical to plain whisper-base.en greedy decoding.
+Here, I compare both paths on audio/16kHz and report the speedup and the draft acceptance rate.
+Both paths get an untimed warm-up run first, and the order they run in alternates from clip to clip,
+so neither one is charged for cold caches or lazy initialization.
+For regular transcription, pass assistant_model to stt_models.transcribe (or --assistant to create_whisper_base_transcripts.py).
+"""
+
+def transcribe_plain(model, input_features):
+    with torch.no_grad():
+        return model.generate(input_features, do_sample=False, num_beams=1)
+
+def transcribe_assisted(model, assistant_model, input_features):
+    with torch.no_grad():
+        return model.generate(input_features, assistant_model=assistant_model, do_sample=False, num_beams=1)
+
+def draft_acceptance_rate(assistant_model, tokenizer, input_features, predicted_ids):
+    """
+    Measures how often the draft model agrees with the verified output, token by token.
+    Greedy verification accepts a drafted token exactly when the draft's argmax matches the target's,
+    so teacher-forcing the draft model on the final output gives the per-token acceptance rate.
+
+    Args:
+        assistant_model: The draft model (whisper-tiny.en).
+        tokenizer: The tokenizer shared by both models.
+        input_features (torch.Tensor): Log-mel features of the clip.
+        predicted_ids (torch.Tensor): Output of the target model.
+
+    Returns:
+        tuple: The number of accepted draft tokens and the number of generated tokens.
+    """
+    # Rebuild the forced decoder prompt (<|startoftranscript|>, <|notimestamps|>, ...), which is never drafted
+    forced_ids = [token for _, token in (assistant_model.generation_config.forced_decoder_ids or [])]
+    prompt = [assistant_model.config.decoder_start_token_id] + forced_ids
+    special_ids = set(tokenizer.all_special_ids) - {tokenizer.eos_token_id}
+    content = [token for token in predicted_ids[0].tolist() if token not in special_ids]
+    if not content:
+        return 0, 0
+
+    decoder_input_ids = torch.tensor([prompt + content[:-1]])
+    with torch.no_grad():
+        logits = assistant_model(input_features, decoder_input_ids=decoder_input_ids).logits
+    draft_ids = logits[0, len(prompt) - 1:].argmax(dim=-1)
+
+    matches = draft_ids == torch.tensor(content)
+    return int(matches.sum()), len(content)
+
+def compare_assisted_decoding(audio_files, model_name="whisper_base", assistant_name="whisper_tiny"):
+    """
+    Transcribes every clip with plain and assisted greedy decoding and compares them.
+
+    Args:
+        audio_files (list of str): Paths to the audio files.
+        model_name (str): Target model key of MODEL_IDS.
+        assistant_name (str): Draft model key of MODEL_IDS.
+
+    Returns:
+        dict: Timing, acceptance rate, and any clips where the two outputs differ.
+    """
+    model, processor = load_whisper(model_name)
+    assistant_model = load_assistant(model_name, assistant_name)
+
+    # Warm up both paths on the first clip, so the first timed run doesn't pay for one-off setup
+    if audio_files:
+        input_features = load_features(audio_files[0], processor.feature_extractor)
+        transcribe_plain(model, input_features)
+        transcribe_assisted(model, assistant_model, input_features)
+
+    seconds = {"plain": 0.0, "assisted": 0.0}
+    accepted, drafted = 0, 0
+    mismatches = []
+    for k, audio_file in enumerate(audio_files):
+        input_features = load_features(audio_file, processor.feature_extractor)
+
+        # Alternate which path runs first, so any warm-cache advantage is shared evenly between them
+        runs = [("plain", lambda: transcribe_plain(model, input_features)),
+                ("assisted", lambda: transcribe_assisted(model, assistant_model, input_features))]
+        outputs = {}
+        for name, run in (runs if k % 2 == 0 else runs[::-1]):
+            start = time.perf_counter()
+            outputs[name] = run()
+            seconds[name] += time.perf_counter() - start
+        plain_ids, assisted_ids = outputs["plain"], outputs["assisted"]
+
+        # Assisted greedy decoding has to reproduce plain greedy decoding token for token
+        if not torch.equal(plain_ids, assisted_ids):
+            mismatches.append(str(audio_file))
+
+        clip_accepted, clip_drafted = draft_acceptance_rate(assistant_model, processor.tokenizer, input_features, assisted_ids)
+        accepted += clip_accepted
+        drafted += clip_drafted
+
+        transcription = processor.tokenizer.batch_decode(assisted_ids, skip_special_tokens=True)[0]
+        print(f"{Path(audio_file).name}: {transcription.strip()}")
+
+    return {
+        "plain_seconds": seconds["plain"],
+        "assisted_seconds": seconds["assisted"],
+        "speedup": seconds["plain"] / seconds["assisted"] if seconds["assisted"] else float("nan"),
+        "acceptance_rate": accepted / drafted if drafted else float("nan"),
+        "mismatches": mismatches,
+    }
+
+if __name__ == "__main__":
+
+    # Access the current (src/make_transcripts) and parent (src/) directory via Pathlib
+    curr_dir = Path(__file__).resolve().parent
+    parent_dir = curr_dir.parent
+
+    # Compare assisted and plain decoding on every 16kHz clip
+    audio_files = sorted((parent_dir / "audio/16kHz").glob("audio_*.wav"), key=lambda path: int(path.stem.split("_")[1]))
+    report = compare_assisted_decoding(audio_files)
+
+    print(f"Plain whisper-base.en: {report['plain_seconds']:.2f}s")
+    print(f"Assisted by whisper-tiny.en: {report['assisted_seconds']:.2f}s ({report['speedup']:.2f}x)")
+    print(f"Draft acceptance rate: {report['acceptance_rate']:.2%}")
+    if report["mismatches"]:
+        print(f"Output differs from plain greedy decoding on: {report['mismatches']}")
+    else:
+        print("Assisted output matches plain greedy decoding on every clip.")
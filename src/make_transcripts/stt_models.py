@@ -0,0 +1,301 @@
+import json
+import os
+import platform
+import sys
+from functools import lru_cache
+from pathlib import Path
+import numpy as np
+import torch
+from transformers import AutoModelForSpeechSeq2Seq, AutoProcessor, PreTrainedTokenizerFast
+
+# Make the shared helpers in src/ importable when running this script directly
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from audio_cache import load_audio
+from feature_store import load_features
+from tracing import span
+
+"""
+stt_models.py
+
+Shared model loading for the transcription scripts.
+Loading a model from the Hugging Face cache takes seconds, so each model is loaded once per process
+and reused for every clip instead of being reloaded inside each evaluate_* call.
+
+Models can be loaded at different inference precisions:
+- fp32: the default full-precision weights.
+- int8: dynamic int8 quantization of every nn.Linear layer. Usually the biggest throughput gain on CPU-only nodes.
+- bf16: bfloat16 weights and activations, only on CPUs with native bfloat16 support.
+
+Models can also run on one of two backends:
+- torch: eager PyTorch transformers models (the default).
+- onnx: ONNX Runtime sessions for the encoder and the KV-cached decoder. See export_onnx.py.
+
+Torch thread counts come from thread_profiles.json (written by autotune_threads.py) for the current host, if present.
+Thread counts are process-global, so a process runs with the profile of one primary model: the first model it
+loads, unless a script that loads several models calls apply_thread_profile with its primary model beforehand.
+"""
+
+MODEL_IDS = {
+    "whisper_base": "openai/whisper-base.en",
+    "whisper_tiny": "openai/whisper-tiny.en",
+    "moonshine": "usefulsensors/moonshine-base",
+}
+
+PRECISIONS = ["fp32", "int8", "bf16"]
+BACKENDS = ["torch", "onnx"]
+
+DEFAULT_ONNX_DIR = Path(__file__).resolve().parent.parent / ".cache" / "onnx"
+THREAD_PROFILE_PATH = Path(__file__).resolve().parent / "thread_profiles.json"
+
+def host_key():
+    """
+    Identifies the node type, so hosts with the same CPU share a tuned thread profile.
+
+    Returns:
+        str: The CPU model name and logical CPU count.
+    """
+    cpu_name = platform.processor() or platform.machine()
+    if os.path.exists("/proc/cpuinfo"):
+        with open("/proc/cpuinfo", "r") as file:
+            for line in file:
+                if line.startswith("model name"):
+                    cpu_name = line.split(":", 1)[1].strip()
+                    break
+    return f"{cpu_name} ({os.cpu_count()} CPUs)"
+
+def load_thread_profile(model_name):
+    """
+    Looks up the tuned thread profile of a model on this host.
+
+    Args:
+        model_name (str): A key of MODEL_IDS.
+
+    Returns:
+        dict: intra_op_threads and interop_threads, or None if this host was never tuned.
+    """
+    # STT_THREAD_PROFILE=0 turns profiles off (e.g., while autotuning)
+    if os.environ.get("STT_THREAD_PROFILE") == "0" or not THREAD_PROFILE_PATH.exists():
+        return None
+    with open(THREAD_PROFILE_PATH, "r") as file:
+        profiles = json.load(file)
+    return profiles.get(host_key(), {}).get(model_name)
+
+# The primary model whose profile set this process's thread counts, and that profile
+_thread_profile = {"model": None, "profile": None}
+
+def apply_thread_profile(model_name):
+    """
+    Sets torch's intra-op and interop thread counts from the model's tuned profile on this host.
+    Only the first call in a process applies a profile; later calls (e.g., loading a second model) keep it,
+    since thread counts are shared by every model in the process and interop threads can only be set once.
+
+    Args:
+        model_name (str): A key of MODEL_IDS, the primary model of the process.
+
+    Returns:
+        dict: The profile in effect for the process, or None if this host was never tuned.
+    """
+    if _thread_profile["model"] is not None:
+        return _thread_profile["profile"]
+    profile = load_thread_profile(model_name)
+    _thread_profile.update(model=model_name, profile=profile)
+    if profile is None:
+        return None
+    torch.set_num_threads(profile["intra_op_threads"])
+    try:
+        torch.set_num_interop_threads(profile["interop_threads"])
+    except RuntimeError:
+        # Interop threads can only be set before any inter-op parallel work has started
+        pass
+    return profile
+
+def bf16_supported():
+    # oneDNN reports whether the CPU has native bfloat16 instructions (e.g., AVX512-BF16 or AMX)
+    try:
+        return bool(torch.ops.mkldnn._is_mkldnn_bf16_supported())
+    except (AttributeError, RuntimeError):
+        return False
+
+def apply_precision(model, precision="fp32"):
+    """
+    Converts a loaded model to the requested inference precision.
+
+    Args:
+        model: A PyTorch model in eval mode.
+        precision (str): One of PRECISIONS.
+
+    Returns:
+        The converted model.
+    """
+    if precision == "fp32":
+        return model
+    if precision == "int8":
+        return torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    if precision == "bf16":
+        if not bf16_supported():
+            raise ValueError("This CPU does not support bfloat16 inference.")
+        return model.to(torch.bfloat16)
+    raise ValueError(f"Unknown precision '{precision}'. Expected one of {PRECISIONS}.")
+
+def check_backend(backend, precision):
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend '{backend}'. Expected one of {BACKENDS}.")
+    if backend == "onnx" and precision != "fp32":
+        raise ValueError("The onnx backend only runs the exported fp32 graphs.")
+
+@lru_cache(maxsize=None)
+def load_whisper(model_name, precision="fp32", backend="torch"):
+    """
+    Loads a Whisper model and its processor.
+
+    Args:
+        model_name (str): A key of MODEL_IDS, e.g. "whisper_base".
+        precision (str): One of PRECISIONS.
+        backend (str): One of BACKENDS. The onnx backend exports the model on first use.
+
+    Returns:
+        tuple: The model (in eval mode) and its processor. Both backends share the same generate() interface.
+    """
+    check_backend(backend, precision)
+    processor = AutoProcessor.from_pretrained(MODEL_IDS[model_name])
+    if backend == "onnx":
+        from export_onnx import load_whisper_onnx
+        return load_whisper_onnx(model_name), processor
+
+    apply_thread_profile(model_name)
+    model = AutoModelForSpeechSeq2Seq.from_pretrained(MODEL_IDS[model_name]).eval()
+    return apply_precision(model, precision), processor
+
+def load_assistant(model_name, assistant_model, precision="fp32", backend="torch"):
+    """
+    Loads a draft model for assisted (speculative) decoding with a Whisper model.
+    With greedy decoding the output is identical to the target model's own, only faster.
+
+    Args:
+        model_name (str): The target Whisper key of MODEL_IDS, e.g. "whisper_base".
+        assistant_model (str): The draft Whisper key of MODEL_IDS, e.g. "whisper_tiny". Must share the target's tokenizer.
+        precision (str): One of PRECISIONS.
+        backend (str): One of BACKENDS. Only the torch backend supports assisted decoding.
+
+    Returns:
+        The draft model, ready to pass to model.generate(assistant_model=...).
+    """
+    if not (model_name.startswith("whisper") and assistant_model.startswith("whisper")):
+        raise ValueError("Assisted decoding needs a Whisper target and a Whisper draft model.")
+    if backend != "torch":
+        raise ValueError("Assisted decoding only runs on the torch backend.")
+    _, processor = load_whisper(model_name, precision, backend)
+    assistant, assistant_processor = load_whisper(assistant_model, precision, backend)
+    if processor.tokenizer.get_vocab() != assistant_processor.tokenizer.get_vocab():
+        raise ValueError(f"{assistant_model} can't draft for {model_name}: their tokenizers differ.")
+    return assistant
+
+@lru_cache(maxsize=None)
+def load_moonshine(model_name="moonshine", precision="fp32", backend="torch"):
+    """
+    Loads the Moonshine model and its tokenizer.
+
+    Args:
+        model_name (str): A key of MODEL_IDS.
+        precision (str): One of PRECISIONS.
+        backend (str): One of BACKENDS.
+
+    Returns:
+        tuple: The model (in eval mode) and its tokenizer. Both backends are called as model(audio) -> tokens.
+    """
+    check_backend(backend, precision)
+    tokenizer = PreTrainedTokenizerFast.from_pretrained(MODEL_IDS[model_name])
+    if backend == "onnx":
+        from export_onnx import load_moonshine_onnx
+        return load_moonshine_onnx(model_name), tokenizer
+
+    apply_thread_profile(model_name)
+    model = AutoModelForSpeechSeq2Seq.from_pretrained(MODEL_IDS[model_name], trust_remote_code=True).eval()
+    return apply_precision(model, precision), tokenizer
+
+def transcribe(model_name, input_audio, precision="fp32", backend="torch", assistant_model=None, **generate_kwargs):
+    """
+    Transcribes a single audio file with any of the featured models.
+
+    Args:
+        model_name (str): A key of MODEL_IDS.
+        input_audio (str): Path to the input audio file.
+        precision (str): One of PRECISIONS.
+        backend (str): One of BACKENDS.
+        assistant_model (str): Optional Whisper key of MODEL_IDS that drafts tokens for assisted decoding (see load_assistant).
+        **generate_kwargs: Extra keyword arguments for Whisper's model.generate.
+
+    Returns:
+        str: The transcription.
+    """
+    with torch.no_grad():
+        if model_name.startswith("whisper"):
+            model, processor = load_whisper(model_name, precision, backend)
+            if assistant_model:
+                generate_kwargs["assistant_model"] = load_assistant(model_name, assistant_model, precision, backend)
+            input_features = load_features(input_audio, processor.feature_extractor).to(model.dtype)
+            with span("generate", model=model_name, clip=Path(input_audio).name):
+                predicted_ids = model.generate(input_features, **generate_kwargs)
+            return processor.tokenizer.batch_decode(predicted_ids, skip_special_tokens=True)[0].strip()
+
+        model, tokenizer = load_moonshine(model_name, precision, backend)
+        audio = torch.from_numpy(np.array(load_audio(input_audio))).unsqueeze(0).to(model.dtype)
+        with span("generate", model=model_name, clip=Path(input_audio).name):
+            tokens = model(audio)
+        return tokenizer.decode(tokens[0], skip_special_tokens=True).strip()
+
+def transcribe_batch(model_name, audio_files, precision="fp32", backend="torch", assistant_model=None, **generate_kwargs):
+    """
+    Transcribes several audio files at once. Whisper clips are batched through a single generate() call,
+    since their features are always padded to 30 seconds. Moonshine takes unpadded audio, so it runs clip by clip.
+
+    Args:
+        model_name (str): A key of MODEL_IDS.
+        audio_files (list of str): Paths to the input audio files.
+        precision (str): One of PRECISIONS.
+        backend (str): One of BACKENDS.
+        assistant_model (str): Optional Whisper draft model key for assisted decoding.
+        **generate_kwargs: Extra keyword arguments for Whisper's model.generate.
+
+    Returns:
+        list of str: The transcriptions, in the order of audio_files.
+    """
+    # Assisted decoding only supports a batch size of 1, so it also runs clip by clip
+    if not model_name.startswith("whisper") or assistant_model:
+        return [transcribe(model_name, audio_file, precision, backend, assistant_model, **generate_kwargs) for audio_file in audio_files]
+
+    model, processor = load_whisper(model_name, precision, backend)
+    input_features = torch.cat([load_features(audio_file, processor.feature_extractor) for audio_file in audio_files])
+    with torch.no_grad(), span("generate", model=model_name, batch_size=len(audio_files)):
+        predicted_ids = model.generate(input_features.to(model.dtype), **generate_kwargs)
+    return [text.strip() for text in processor.tokenizer.batch_decode(predicted_ids, skip_special_tokens=True)]
+
+def transcribe_arrays(model_name, audios, precision="fp32", backend="torch", **generate_kwargs):
+    """
+    Transcribes 16kHz audio that is already in memory (e.g., augmented clips), without writing any files.
+
+    Args:
+        model_name (str): A key of MODEL_IDS.
+        audios (list of np.ndarray): Mono float32 samples at 16kHz.
+        precision (str): One of PRECISIONS.
+        backend (str): One of BACKENDS.
+        **generate_kwargs: Extra keyword arguments for Whisper's model.generate.
+
+    Returns:
+        list of str: The transcriptions, in the order of audios.
+    """
+    with torch.no_grad():
+        if model_name.startswith("whisper"):
+            model, processor = load_whisper(model_name, precision, backend)
+            input_features = processor.feature_extractor(audios, sampling_rate=16000, return_tensors="pt").input_features
+            with span("generate", model=model_name, batch_size=len(audios)):
+                predicted_ids = model.generate(input_features.to(model.dtype), **generate_kwargs)
+            return [text.strip() for text in processor.tokenizer.batch_decode(predicted_ids, skip_special_tokens=True)]
+
+        model, tokenizer = load_moonshine(model_name, precision, backend)
+        transcripts = []
+        for audio in audios:
+            with span("generate", model=model_name):
+                tokens = model(torch.from_numpy(np.asarray(audio, dtype=np.float32)).unsqueeze(0).to(model.dtype))
+            transcripts.append(tokenizer.decode(tokens[0], skip_special_tokens=True).strip())
+        return transcripts
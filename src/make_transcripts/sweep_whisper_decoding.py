@@ -0,0 +1,178 @@
+import json
+import os
+import sys
+import time
+from collections import OrderedDict
+from pathlib import Path
+import torch
+from jiwer import wer
+from transformers.modeling_outputs import BaseModelOutput
+from stt_models import load_whisper
+
+# Make the shared helpers in src/ importable when running this script directly
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from audio_cache import default_cache
+from feature_store import load_features
+from manifest import load_manifest
+from transcript_cache import model_revision
+
+"""
+sweep_whisper_decoding.py
+
+Compares Whisper decoding settings (greedy vs. beam search, max_new_tokens, prompts, ...) over the corpus.
+model.generate normally re-runs the encoder on identical audio for every setting, so here the encoder
+runs once per clip, its output is cached, and every decoder configuration reuses it.
+"""
+
+# Each entry maps a configuration name to the keyword arguments passed to model.generate
+DECODING_CONFIGS = {
+    "greedy": {"num_beams": 1},
+    "beam_5": {"num_beams": 5},
+    "greedy_max_64": {"num_beams": 1, "max_new_tokens": 64},
+    "jargon_prompt": {"num_beams": 1, "prompt": "ISR, JTAC, CAS, AWACS, FLOT, ATO, TOT, BDA, RTB, Zulu."},
+}
+
+class EncoderCache:
+    def __init__(self, model, max_items=64, cache_dir=None):
+        """
+        Args:
+            model: A Whisper model whose encoder outputs are cached.
+            max_items (int): Number of encoder outputs kept in memory before the least recently used is dropped.
+            cache_dir (str): Optional directory to also persist encoder outputs to disk.
+        """
+        self.model = model
+        self.max_items = max_items
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self.entries = OrderedDict()
+        if self.cache_dir:
+            os.makedirs(self.cache_dir, exist_ok=True)
+
+    def get(self, key, input_features):
+        """
+        Returns the encoder output for a clip, running the encoder only on a cache miss.
+
+        Args:
+            key (str): A unique key for the clip and model (e.g., the clip hash and model name).
+            input_features (torch.Tensor): The clip's log-mel features.
+
+        Returns:
+            BaseModelOutput: A fresh wrapper around the cached hidden states, safe to pass to model.generate.
+        """
+        if key in self.entries:
+            self.entries.move_to_end(key)
+            hidden_states = self.entries[key]
+        else:
+            disk_path = self.cache_dir / f"{key}.pt" if self.cache_dir else None
+            if disk_path and disk_path.exists():
+                hidden_states = torch.load(disk_path)
+            else:
+                with torch.no_grad():
+                    hidden_states = self.model.get_encoder()(input_features).last_hidden_state
+                if disk_path:
+                    torch.save(hidden_states, disk_path)
+
+            self.entries[key] = hidden_states
+            if len(self.entries) > self.max_items:
+                self.entries.popitem(last=False)
+
+        # generate() expands encoder outputs in place for beam search, so never hand out the cached wrapper itself
+        return BaseModelOutput(last_hidden_state=hidden_states)
+
+def decode_with_config(model, processor, encoder_outputs, config):
+    """
+    Runs the decoder with a single decoding configuration.
+
+    Args:
+        model: A Whisper model.
+        processor: The model's processor.
+        encoder_outputs (BaseModelOutput): Cached encoder output for the clip.
+        config (dict): Keyword arguments for model.generate. A "prompt" key is converted to prompt_ids.
+
+    Returns:
+        str: The transcription.
+    """
+    generate_kwargs = dict(config)
+    prompt = generate_kwargs.pop("prompt", None)
+    if prompt:
+        generate_kwargs["prompt_ids"] = processor.get_prompt_ids(prompt, return_tensors="pt")
+
+    with torch.no_grad():
+        predicted_ids = model.generate(encoder_outputs=encoder_outputs, **generate_kwargs)
+    return processor.tokenizer.batch_decode(predicted_ids, skip_special_tokens=True)[0].strip()
+
+def sweep_decoding(model_name, audio_files, reference_transcripts, configs=DECODING_CONFIGS, encoder_cache=None,
+                   precision="fp32", backend="torch"):
+    """
+    Transcribes every clip with every decoding configuration, running the encoder once per clip.
+
+    Args:
+        model_name (str): A Whisper key of MODEL_IDS, e.g. "whisper_base".
+        audio_files (list of str): Paths to the audio files.
+        reference_transcripts (list of str): Reference transcripts, aligned with audio_files.
+        configs (dict): Decoding configuration name -> model.generate keyword arguments.
+        encoder_cache (EncoderCache): Cache for encoder outputs. A new in-memory one is made if None.
+        precision (str): One of PRECISIONS.
+        backend (str): One of BACKENDS.
+
+    Returns:
+        dict: Per-configuration WER, decoding time and transcripts, plus the total encoder time.
+    """
+    model, processor = load_whisper(model_name, precision, backend)
+    encoder_cache = encoder_cache or EncoderCache(model)
+    # Encoder outputs differ between model snapshots, precisions and backends, so all of them are part of the key,
+    # like in the transcript cache. The model is loaded by now, so its revision is known
+    model_key = f"{model_name}@{model_revision(model_name)}_{precision}_{backend}"
+
+    results = {name: {"transcripts": [], "decode_seconds": 0.0} for name in configs}
+    encoder_seconds = 0.0
+    for audio_file in audio_files:
+        input_features = load_features(audio_file, processor.feature_extractor).to(model.dtype)
+
+        start = time.perf_counter()
+        key = f"{default_cache().source_hash(audio_file)}_{model_key}"
+        encoder_cache.get(key, input_features)
+        encoder_seconds += time.perf_counter() - start
+
+        for name, config in configs.items():
+            # generate() expands encoder_outputs in place for beam search, so every config needs its own wrapper
+            encoder_outputs = encoder_cache.get(key, input_features)
+            start = time.perf_counter()
+            transcription = decode_with_config(model, processor, encoder_outputs, config)
+            results[name]["decode_seconds"] += time.perf_counter() - start
+            results[name]["transcripts"].append(transcription)
+
+    # Score each configuration on the whole corpus
+    for name in configs:
+        results[name]["wer"] = wer(reference_transcripts, results[name]["transcripts"])
+        results[name]["seconds_per_clip"] = results[name]["decode_seconds"] / max(len(audio_files), 1)
+    return {"model": model_name, "encoder_seconds": encoder_seconds, "configs": results}
+
+def print_sweep_report(sweep):
+    print(f"Model: {sweep['model']} (encoder total: {sweep['encoder_seconds']:.2f}s)")
+    print(f"{'config':<20}{'WER%':>8}{'s/clip':>10}")
+    for name, result in sweep["configs"].items():
+        print(f"{name:<20}{100 * result['wer']:>8.2f}{result['seconds_per_clip']:>10.3f}")
+
+if __name__ == "__main__":
+
+    # Access the current (src/make_transcripts) and parent (src/) directory via Pathlib
+    curr_dir = Path(__file__).resolve().parent
+    parent_dir = curr_dir.parent
+
+    # Pair each clip with its reference transcript through the dataset manifest
+    records = list(load_manifest().filter(has_reference=True))
+    reference_transcripts = [record["reference"] for record in records]
+    audio_files = [parent_dir / record["audio_path"] for record in records]
+
+    # Sweep both Whisper models, persisting the encoder outputs so later sweeps skip the encoder too
+    for model_name in ["whisper_base", "whisper_tiny"]:
+        model, _ = load_whisper(model_name)
+        encoder_cache = EncoderCache(model, cache_dir=parent_dir / ".cache" / "encoder" / model_name)
+        sweep = sweep_decoding(model_name, audio_files, reference_transcripts, encoder_cache=encoder_cache)
+        print_sweep_report(sweep)
+
+        # Store the sweep results (without the transcripts) next to the WER results
+        output_path = parent_dir / f"wer/{model_name}_decoding_sweep.json"
+        summary = {name: {k: v for k, v in result.items() if k != "transcripts"} for name, result in sweep["configs"].items()}
+        with open(output_path, "w") as file:
+            json.dump(summary, file, indent=2)
@@ -0,0 +1,162 @@
+import json
+import sqlite3
+import sys
+import time
+from pathlib import Path
+from stt_models import MODEL_IDS
+
+# Make the shared helpers in src/ importable when running this script directly
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from audio_cache import default_cache
+
+"""
+transcript_cache.py
+
+Persistent transcript cache keyed by (audio hash, model, model revision, decoding params).
+The create_*_transcripts.py scripts only transcribe clips whose audio, model revision or decoding settings
+changed since the last run, and every line written to src/transcripts/ is recorded so we can later ask
+which model and configuration produced it.
+
+Usage (provenance of a transcripts file):
+    python transcript_cache.py ../transcripts/whisper_base_transcripts.txt
+"""
+
+DEFAULT_CACHE_PATH = Path(__file__).resolve().parent.parent / ".cache" / "transcripts.sqlite"
+
+def model_revision(model_name):
+    """
+    Finds the commit hash of the locally cached model snapshot without loading the model.
+
+    Args:
+        model_name (str): A key of MODEL_IDS.
+
+    Returns:
+        str: The snapshot's commit hash, or "unknown" if the model isn't in the local Hugging Face cache yet.
+    """
+    from huggingface_hub import try_to_load_from_cache
+    config_path = try_to_load_from_cache(MODEL_IDS[model_name], "config.json")
+    return Path(config_path).parent.name if isinstance(config_path, str) else "unknown"
+
+class TranscriptCache:
+    def __init__(self, cache_path=DEFAULT_CACHE_PATH):
+        """
+        Args:
+            cache_path (str): Path of the SQLite database.
+        """
+        Path(cache_path).parent.mkdir(parents=True, exist_ok=True)
+        self.connection = sqlite3.connect(cache_path)
+        self.connection.executescript("""
+            CREATE TABLE IF NOT EXISTS transcripts (
+                audio_sha256 TEXT, model TEXT, revision TEXT, params TEXT,
+                transcript TEXT, audio_path TEXT, created_at REAL,
+                PRIMARY KEY (audio_sha256, model, revision, params)
+            );
+            CREATE TABLE IF NOT EXISTS outputs (
+                output_path TEXT, line_number INTEGER,
+                audio_sha256 TEXT, model TEXT, revision TEXT, params TEXT,
+                PRIMARY KEY (output_path, line_number)
+            );
+        """)
+
+    def key(self, audio_path, model_name, params=None):
+        """
+        Builds the cache key of a clip.
+
+        Args:
+            audio_path (str): Path to the audio file.
+            model_name (str): A key of MODEL_IDS.
+            params (dict): Decoding settings (precision, backend, generate() keyword arguments, ...).
+
+        Returns:
+            tuple: (audio hash, model, revision, params as canonical JSON).
+        """
+        return (
+            default_cache().source_hash(audio_path),
+            model_name,
+            model_revision(model_name),
+            json.dumps(params or {}, sort_keys=True),
+        )
+
+    def get(self, key):
+        row = self.connection.execute(
+            "SELECT transcript FROM transcripts WHERE audio_sha256 = ? AND model = ? AND revision = ? AND params = ?", key
+        ).fetchone()
+        return row[0] if row else None
+
+    def put(self, key, transcript, audio_path):
+        with self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO transcripts VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (*key, transcript, str(audio_path), time.time()),
+            )
+
+    def transcribe(self, audio_path, model_name, transcribe_fn, params=None):
+        """
+        Returns the cached transcript of a clip, transcribing (and caching) it only on a miss.
+
+        Args:
+            audio_path (str): Path to the audio file.
+            model_name (str): A key of MODEL_IDS.
+            transcribe_fn (callable): Called with no arguments on a cache miss, returns the transcript.
+            params (dict): Decoding settings that affect the transcript.
+
+        Returns:
+            tuple: The transcript, the cache key, and whether it came from the cache.
+        """
+        key = self.key(audio_path, model_name, params)
+        transcript = self.get(key)
+        if transcript is not None:
+            return transcript, key, True
+        transcript = transcribe_fn()
+
+        # Before its first download the model's revision is unknown; transcribing downloaded it, so look again.
+        # A transcript whose revision is still unknown isn't cached, since it couldn't be invalidated correctly
+        if key[2] == "unknown":
+            key = self.key(audio_path, model_name, params)
+            if key[2] == "unknown":
+                return transcript, key, False
+        self.put(key, transcript, audio_path)
+        return transcript, key, False
+
+    def record_output(self, output_path, keys):
+        """
+        Records which cache entry produced each line of a transcripts file.
+
+        Args:
+            output_path (str): Path of the transcripts file that was written.
+            keys (list of tuple): The cache key of each line, in order.
+        """
+        output_path = str(Path(output_path).resolve())
+        with self.connection:
+            self.connection.execute("DELETE FROM outputs WHERE output_path = ?", (output_path,))
+            self.connection.executemany(
+                "INSERT INTO outputs VALUES (?, ?, ?, ?, ?, ?)",
+                [(output_path, line_number, *key) for line_number, key in enumerate(keys, start=1)],
+            )
+
+    def provenance(self, output_path):
+        """
+        Looks up which model and configuration produced each line of a transcripts file.
+
+        Args:
+            output_path (str): Path of a transcripts file.
+
+        Returns:
+            list of dict: One entry per line, in order.
+        """
+        rows = self.connection.execute("""
+            SELECT o.line_number, o.model, o.revision, o.params, t.audio_path, t.created_at
+            FROM outputs o LEFT JOIN transcripts t
+              ON o.audio_sha256 = t.audio_sha256 AND o.model = t.model AND o.revision = t.revision AND o.params = t.params
+            WHERE o.output_path = ? ORDER BY o.line_number
+        """, (str(Path(output_path).resolve()),)).fetchall()
+        columns = ["line_number", "model", "revision", "params", "audio_path", "created_at"]
+        return [dict(zip(columns, row)) for row in rows]
+
+if __name__ == "__main__":
+
+    # Print the provenance of every line of a transcripts file
+    cache = TranscriptCache()
+    for row in cache.provenance(sys.argv[1]):
+        created_at = time.strftime("%Y-%m-%d %H:%M", time.localtime(row["created_at"])) if row["created_at"] else "?"
+        print(f"{row['line_number']:>4}  {row['model']}@{row['revision'][:8]}  {row['params']}  {Path(row['audio_path'] or '?').name}  {created_at}")
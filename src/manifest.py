@@ -0,0 +1,316 @@
+import hashlib
+import json
+import os
+import re
+from functools import lru_cache
+from pathlib import Path
+import soundfile as sf
+
+"""
+manifest.py
+
+Dataset manifest for the evaluation corpus, replacing the "audio/16kHz/audio_{k}.wav matches line k of
+reference_transcripts.txt" convention with stable clip IDs. Each JSONL line holds:
+    id, audio_path (relative to src/), sha256, sample_rate, duration, reference, tags
+
+ManifestIndex reads the manifest lazily: opening it only records the byte offset of every line,
+records are parsed on demand, and a column (e.g., duration) is parsed once the first time it's needed.
+Filtering, sharding and ordering return lightweight views over the same index.
+The manifest is the source of truth the scripts read clips and references from. load_manifest only goes back to
+the audio files and reference transcripts when a stat shows one of them was added, removed or modified since the
+manifest was built (or when it's missing); otherwise opening it reads nothing but the manifest itself.
+Run "python manifest.py" to rebuild it explicitly.
+"""
+
+SRC_DIR = Path(__file__).resolve().parent
+DEFAULT_MANIFEST_PATH = SRC_DIR / "audio" / "manifest.jsonl"
+DEFAULT_AUDIO_DIR = SRC_DIR / "audio" / "16kHz"
+DEFAULT_REFERENCE_PATH = SRC_DIR / "transcripts" / "reference_transcripts.txt"
+HASH_CACHE_PATH = SRC_DIR / ".cache" / "manifest_hashes.json"
+SOURCES_PATH = SRC_DIR / ".cache" / "manifest_sources.json"
+
+# What each message was designed to test (see text_to_speech.py)
+CLIP_TAGS = {
+    "audio_0": ["general", "homophones", "contractions"],
+    "audio_1": ["general", "numbers"],
+    "audio_2": ["general", "proper_nouns"],
+    "audio_3": ["general", "word_boundaries"],
+    "audio_4": ["general", "quotations"],
+    "audio_5": ["general", "colloquial"],
+    "audio_6": ["jargon", "acronyms"],
+    "audio_7": ["jargon", "acronyms", "numbers"],
+    "audio_8": ["jargon", "acronyms", "proper_nouns"],
+    "audio_9": ["jargon", "acronyms", "word_boundaries"],
+    "audio_10": ["jargon", "acronyms", "quotations", "numbers"],
+    "audio_11": ["jargon", "acronyms", "colloquial"],
+}
+
+def source_records(audio_dir=DEFAULT_AUDIO_DIR, reference_path=DEFAULT_REFERENCE_PATH):
+    """
+    Derives the manifest records from a folder of audio_{k}.wav clips and the line-aligned reference transcripts.
+    This is the only place that still relies on the line-number convention.
+    Audio hashes are cached by file size and mtime, so unchanged clips aren't rehashed on every load.
+
+    Args:
+        audio_dir (str): Folder of audio_{k}.wav clips.
+        reference_path (str): Reference transcripts, one per line.
+
+    Returns:
+        list of dict: The records, in clip order.
+    """
+    with open(reference_path, "r") as file:
+        references = [line.strip() for line in file]
+
+    hashes = {}
+    if HASH_CACHE_PATH.exists():
+        with open(HASH_CACHE_PATH, "r") as file:
+            hashes = json.load(file)
+    num_hashes = len(hashes)
+
+    records = []
+    audio_paths = sorted(Path(audio_dir).glob("audio_*.wav"), key=lambda path: int(re.findall(r"\d+", path.stem)[0]))
+    for audio_path in audio_paths:
+        k = int(re.findall(r"\d+", audio_path.stem)[0])
+        source = str(audio_path.resolve())
+        stat = os.stat(source)
+        signature = [stat.st_size, stat.st_mtime_ns]
+        if hashes.get(source, {}).get("signature") != signature:
+            hashes[source] = {"signature": signature, "sha256": hashlib.sha256(audio_path.read_bytes()).hexdigest()}
+            num_hashes = -1
+
+        info = sf.info(audio_path)
+        records.append({
+            "id": audio_path.stem,
+            "audio_path": audio_path.resolve().relative_to(SRC_DIR).as_posix(),
+            "sha256": hashes[source]["sha256"],
+            "sample_rate": info.samplerate,
+            "duration": round(info.frames / info.samplerate, 3),
+            "reference": references[k] if k < len(references) and references[k] else None,
+            "tags": CLIP_TAGS.get(audio_path.stem, []),
+        })
+
+    if num_hashes != len(hashes):
+        HASH_CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = HASH_CACHE_PATH.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp_path, "w") as file:
+            json.dump(hashes, file)
+        os.replace(tmp_path, HASH_CACHE_PATH)
+    return records
+
+def source_signature(audio_dir=DEFAULT_AUDIO_DIR, reference_path=DEFAULT_REFERENCE_PATH):
+    """
+    Stats the files a manifest is built from, without reading them.
+
+    Args:
+        audio_dir (str): Folder of audio_{k}.wav clips.
+        reference_path (str): Reference transcripts, one per line.
+
+    Returns:
+        dict: Resolved path -> [size, mtime in ns] of the reference transcripts and every clip.
+    """
+    paths = [Path(reference_path)] + sorted(Path(audio_dir).glob("audio_*.wav"))
+    signature = {}
+    for path in paths:
+        stat = os.stat(path)
+        signature[str(path.resolve())] = [stat.st_size, stat.st_mtime_ns]
+    return signature
+
+def _recorded_signatures():
+    if not SOURCES_PATH.exists():
+        return {}
+    with open(SOURCES_PATH, "r") as file:
+        return json.load(file)
+
+def record_sources(manifest_path, signature):
+    """
+    Remembers which version of the sources a manifest was built from, so load_manifest can trust it without rescanning.
+
+    Args:
+        manifest_path (str): Path of the manifest .jsonl.
+        signature (dict): The output of source_signature at build time.
+    """
+    signatures = _recorded_signatures()
+    signatures[str(Path(manifest_path).resolve())] = signature
+    SOURCES_PATH.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = SOURCES_PATH.with_suffix(f".{os.getpid()}.tmp")
+    with open(tmp_path, "w") as file:
+        json.dump(signatures, file)
+    os.replace(tmp_path, SOURCES_PATH)
+
+def build_manifest(audio_dir=DEFAULT_AUDIO_DIR, reference_path=DEFAULT_REFERENCE_PATH, manifest_path=DEFAULT_MANIFEST_PATH, records=None, signature=None):
+    """
+    Builds the manifest from a folder of audio_{k}.wav clips and the line-aligned reference transcripts.
+
+    Args:
+        audio_dir (str): Folder of audio_{k}.wav clips.
+        reference_path (str): Reference transcripts, one per line.
+        manifest_path (str): Output .jsonl path.
+        records (list of dict): Records already derived with source_records, to skip scanning the sources again.
+        signature (dict): The source_signature taken before those records were derived.
+
+    Returns:
+        int: The number of clips in the manifest.
+    """
+    # Stat before reading, so a source edited while building shows up as changed on the next load
+    if signature is None:
+        signature = source_signature(audio_dir, reference_path)
+    records = records if records is not None else source_records(audio_dir, reference_path)
+    # Write to a temporary file first so readers never see a half-written manifest
+    tmp_path = Path(manifest_path).with_suffix(f".{os.getpid()}.tmp")
+    with open(tmp_path, "w") as file:
+        for record in records:
+            file.write(json.dumps(record, ensure_ascii=False) + "\n")
+    os.replace(tmp_path, manifest_path)
+    record_sources(manifest_path, signature)
+    return len(records)
+
+class _ManifestStore:
+    def __init__(self, manifest_path):
+        # Only remember where each line starts; nothing is parsed yet
+        self.manifest_path = Path(manifest_path)
+        self.offsets = []
+        with open(self.manifest_path, "rb") as file:
+            offset = 0
+            for line in file:
+                if line.strip():
+                    self.offsets.append(offset)
+                offset += len(line)
+        self.columns = {}
+        self.record = lru_cache(maxsize=4096)(self._read_record)
+
+    def _read_record(self, row):
+        with open(self.manifest_path, "rb") as file:
+            file.seek(self.offsets[row])
+            return json.loads(file.readline())
+
+    def column(self, name):
+        # Parse a column for every row once, then serve it from memory
+        if name not in self.columns:
+            with open(self.manifest_path, "rb") as file:
+                self.columns[name] = [json.loads(line).get(name) for line in file if line.strip()]
+        return self.columns[name]
+
+class ManifestIndex:
+    def __init__(self, manifest_path=DEFAULT_MANIFEST_PATH, _store=None, _rows=None):
+        """
+        Args:
+            manifest_path (str): Path of the manifest .jsonl.
+        """
+        self._store = _store or _ManifestStore(manifest_path)
+        self._rows = list(range(len(self._store.offsets))) if _rows is None else _rows
+
+    def _view(self, rows):
+        return ManifestIndex(_store=self._store, _rows=rows)
+
+    def __len__(self):
+        return len(self._rows)
+
+    def __iter__(self):
+        for row in self._rows:
+            yield self._store.record(row)
+
+    def __getitem__(self, clip_id):
+        """
+        Looks up a record by its clip ID.
+
+        Args:
+            clip_id (str): The clip ID, e.g. "audio_0".
+
+        Returns:
+            dict: The manifest record.
+        """
+        ids = self._store.column("id")
+        for row in self._rows:
+            if ids[row] == clip_id:
+                return self._store.record(row)
+        raise KeyError(clip_id)
+
+    def ids(self):
+        ids = self._store.column("id")
+        return [ids[row] for row in self._rows]
+
+    def filter(self, tag=None, has_reference=None, predicate=None):
+        """
+        Selects a subset of the clips.
+
+        Args:
+            tag (str): Keep clips with this tag.
+            has_reference (bool): Keep clips with (True) or without (False) a reference transcript.
+            predicate (callable): Keep records for which predicate(record) is true. Parses the selected records.
+
+        Returns:
+            ManifestIndex: A view over the matching clips.
+        """
+        rows = self._rows
+        if tag is not None:
+            tags = self._store.column("tags")
+            rows = [row for row in rows if tag in (tags[row] or [])]
+        if has_reference is not None:
+            references = self._store.column("reference")
+            rows = [row for row in rows if bool(references[row]) == has_reference]
+        if predicate is not None:
+            rows = [row for row in rows if predicate(self._store.record(row))]
+        return self._view(rows)
+
+    def shard(self, index, num_shards):
+        """
+        Selects a deterministic shard of the clips. A clip's shard depends only on its ID,
+        so adding clips to the corpus never moves existing clips between shards.
+
+        Args:
+            index (int): Shard number, from 0 to num_shards - 1.
+            num_shards (int): Total number of shards.
+
+        Returns:
+            ManifestIndex: A view over the clips of this shard.
+        """
+        ids = self._store.column("id")
+        return self._view([
+            row for row in self._rows
+            if int(hashlib.sha1(ids[row].encode()).hexdigest(), 16) % num_shards == index
+        ])
+
+    def order_by_duration(self, descending=False):
+        durations = self._store.column("duration")
+        return self._view(sorted(self._rows, key=lambda row: durations[row], reverse=descending))
+
+def load_manifest(manifest_path=DEFAULT_MANIFEST_PATH, audio_dir=DEFAULT_AUDIO_DIR, reference_path=DEFAULT_REFERENCE_PATH):
+    """
+    Opens the manifest, (re)building it from the audio clips and reference transcripts if it is missing
+    or no longer matches them (e.g., after editing reference_transcripts.txt or re-recording a clip).
+    The sources are only read when their sizes or mtimes differ from when the manifest was built.
+
+    Args:
+        manifest_path (str): Path of the manifest .jsonl.
+        audio_dir (str): Folder of audio_{k}.wav clips the manifest is built from.
+        reference_path (str): Reference transcripts the manifest is built from.
+
+    Returns:
+        ManifestIndex: The lazily-loaded index.
+    """
+    if not Path(manifest_path).exists():
+        build_manifest(audio_dir, reference_path, manifest_path)
+        return ManifestIndex(manifest_path)
+
+    signature = source_signature(audio_dir, reference_path)
+    if _recorded_signatures().get(str(Path(manifest_path).resolve())) == signature:
+        return ManifestIndex(manifest_path)
+
+    # Something was touched (or this checkout never built the manifest): compare the contents before rewriting it
+    records = source_records(audio_dir, reference_path)
+    with open(manifest_path, "r") as file:
+        if [json.loads(line) for line in file if line.strip()] == records:
+            record_sources(manifest_path, signature)
+            return ManifestIndex(manifest_path)
+    print(f"{Path(manifest_path).name} is out of date with the audio or reference transcripts; rebuilding it")
+    build_manifest(audio_dir, reference_path, manifest_path, records, signature)
+    return ManifestIndex(manifest_path)
+
+if __name__ == "__main__":
+
+    # Rebuild the manifest and summarize it
+    num_clips = build_manifest()
+    manifest = load_manifest()
+    print(f"Wrote {num_clips} clips to {DEFAULT_MANIFEST_PATH}")
+    print(f"Clips without a reference: {manifest.filter(has_reference=False).ids()}")
+    print(f"Jargon clips, longest first: {manifest.filter(tag='jargon').order_by_duration(descending=True).ids()}")
@@ -0,0 +1,80 @@
+import json
+import os
+import time
+from pathlib import Path
+from tracing import span
+
+"""
+run_journal.py
+
+Append-only journal of completed work items, so interrupted multi-hour runs resume instead of starting over.
+Each finished (stage, item) is appended as one JSON line and fsync'd before the run moves on, so a crash
+can at worst lose the item that was in progress. A half-written last line (from a crash mid-write) is dropped on open.
+"""
+
+class RunJournal:
+    def __init__(self, journal_path):
+        """
+        Args:
+            journal_path (str): Path of the .jsonl journal. Created on the first record.
+        """
+        self.journal_path = Path(journal_path)
+        self.entries = {}
+        if self.journal_path.exists():
+            with open(self.journal_path, "rb+") as file:
+                data = file.read()
+                # Cut off a torn last line, so the next record starts on a fresh line instead of being glued onto it
+                complete = data.rfind(b"\n") + 1
+                if complete < len(data):
+                    file.truncate(complete)
+            for line in data[:complete].decode(errors="replace").splitlines():
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                self.entries[(entry["stage"], entry["item"])] = entry.get("result")
+
+    def is_done(self, stage, item):
+        return (stage, str(item)) in self.entries
+
+    def result(self, stage, item):
+        return self.entries.get((stage, str(item)))
+
+    def completed(self, stage):
+        """
+        Returns every completed item of a stage.
+
+        Args:
+            stage (str): Name of the stage.
+
+        Returns:
+            dict: item -> recorded result.
+        """
+        return {item: result for (entry_stage, item), result in self.entries.items() if entry_stage == stage}
+
+    def record(self, stage, item, result=None):
+        """
+        Durably marks an item as completed.
+
+        Args:
+            stage (str): Name of the stage (e.g., "transcribe:whisper_base" or an output folder).
+            item (str): Identifier of the work item within the stage.
+            result: Optional JSON-serializable result to keep with the entry.
+        """
+        os.makedirs(self.journal_path.parent, exist_ok=True)
+        entry = {"stage": stage, "item": str(item), "result": result, "time": time.time()}
+        with open(self.journal_path, "a") as file:
+            file.write(json.dumps(entry) + "\n")
+            file.flush()
+            os.fsync(file.fileno())
+        self.entries[(stage, str(item))] = result
+
+def write_file_atomically(file_path, text):
+    # Write to a temporary file first so an interrupt never leaves a half-written output behind
+    tmp_path = f"{file_path}.tmp"
+    with span("file_write", path=Path(file_path).name):
+        with open(tmp_path, "w") as file:
+            file.write(text)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(tmp_path, file_path)
@@ -0,0 +1,253 @@
+import argparse
+import importlib
+import sys
+from pathlib import Path
+from manifest import load_manifest
+from run_journal import RunJournal, write_file_atomically
+
+# Make the model and judge helpers importable from here
+SRC_DIR = Path(__file__).resolve().parent
+sys.path.append(str(SRC_DIR / "make_transcripts"))
+sys.path.append(str(SRC_DIR / "llm_judge"))
+sys.path.append(str(SRC_DIR / "wer"))
+
+"""
+run_shard.py
+
+Sharded evaluation for spreading the corpus across several nodes without a scheduler service.
+`--shard i/N` selects a deterministic subset of the manifest (a clip's shard depends only on its ID),
+and every stage appends its shard-local results to a journal under --shard-dir, so a shard that gets
+interrupted resumes where it stopped. Point --shard-dir at a shared mount, or copy the shard files to one node.
+
+Once every shard has finished a stage, `merge` combines them into the same outputs a single-node run writes
+(src/transcripts/<model>_transcripts.txt, src/wer/wer_results.txt, src/llm_judge/<mode>/<model>/evaluation_result_{i}.txt),
+after checking that no clip is missing, duplicated, or in the wrong shard.
+
+Usage:
+    python run_shard.py transcribe --model whisper_base --shard 0/4
+    python run_shard.py wer --model whisper_base --shard 0/4
+    python run_shard.py judge --model whisper_base --mode raw --shard 0/4
+    python run_shard.py merge transcribe --model whisper_base --num-shards 4
+"""
+
+DEFAULT_SHARD_DIR = SRC_DIR / "shards"
+MODEL_NAMES = ["whisper_base", "whisper_tiny", "moonshine"]
+JUDGE_MODES = {"raw": "evaluate_with_llm_judge", "metaprompt": "evaluate_with_meta_prompting"}
+# Folder under src/llm_judge that the single-node script of each mode writes to (run_llm_raw.py, run_llm_metaprompt.py)
+JUDGE_OUTPUT_DIRS = {"raw": "base", "metaprompt": "metaprompt"}
+
+def parse_shard(shard):
+    """
+    Parses a shard specification.
+
+    Args:
+        shard (str): "i/N", e.g. "0/4" for the first of four shards.
+
+    Returns:
+        tuple: (index, num_shards).
+    """
+    try:
+        index, num_shards = (int(part) for part in shard.split("/"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Expected a shard like 0/4, got {shard!r}")
+    if not 0 <= index < num_shards:
+        raise argparse.ArgumentTypeError(f"Shard index must be between 0 and {num_shards - 1}, got {index}")
+    return index, num_shards
+
+def stage_name(stage, model_name, mode=None):
+    return f"{stage}:{model_name}" + (f":{mode}" if mode else "")
+
+def shard_path(shard_dir, stage, index, num_shards):
+    return Path(shard_dir) / stage.replace(":", "/") / f"shard-{index}-of-{num_shards}.jsonl"
+
+def evaluation_records():
+    # The clips a single-node run evaluates, in the order it evaluates them
+    return load_manifest().filter(has_reference=True)
+
+def run_transcribe(model_name, index, num_shards, shard_dir=DEFAULT_SHARD_DIR):
+    """
+    Transcribes the clips of one shard with the same code path (and transcript cache) as create_<model>_transcripts.py.
+
+    Args:
+        model_name (str): One of MODEL_NAMES.
+        index (int): Shard number.
+        num_shards (int): Total number of shards.
+        shard_dir (str): Where shard-local results are written.
+    """
+    from transcript_cache import TranscriptCache
+    create_module = importlib.import_module(f"create_{model_name}_transcripts")
+    evaluate_fn = getattr(create_module, f"evaluate_{model_name}")
+
+    stage = stage_name("transcribe", model_name)
+    journal = RunJournal(shard_path(shard_dir, stage, index, num_shards))
+    cache = TranscriptCache()
+    params = {"precision": "fp32", "backend": "torch"}
+    for record in evaluation_records().shard(index, num_shards):
+        if journal.is_done(stage, record["id"]):
+            continue
+        input_path = SRC_DIR / record["audio_path"]
+        transcribe_clip = lambda: evaluate_fn(input_audio=input_path, input_reference=record["reference"], **params)[0]
+        transcript, _, _ = cache.transcribe(input_path, model_name, transcribe_clip, params)
+        journal.record(stage, record["id"], transcript)
+        print(f"[{index}/{num_shards}] Transcribed {record['id']}")
+
+def run_wer(model_name, index, num_shards, shard_dir=DEFAULT_SHARD_DIR):
+    """
+    Scores the shard's transcripts against their references. Needs the shard's transcribe stage to be finished.
+
+    Args:
+        model_name (str): One of MODEL_NAMES.
+        index (int): Shard number.
+        num_shards (int): Total number of shards.
+        shard_dir (str): Where shard-local results are written.
+    """
+    from compare_models_by_wer import evaluate_wer
+    transcripts = load_shard_results(shard_dir, stage_name("transcribe", model_name), index, num_shards)
+
+    stage = stage_name("wer", model_name)
+    journal = RunJournal(shard_path(shard_dir, stage, index, num_shards))
+    for record in evaluation_records().shard(index, num_shards):
+        if journal.is_done(stage, record["id"]):
+            continue
+        if record["id"] not in transcripts:
+            raise ValueError(f"{record['id']} hasn't been transcribed yet; run the transcribe stage of this shard first")
+        error_rate = evaluate_wer([record["reference"].strip()], [transcripts[record["id"]].strip()])[0]
+        journal.record(stage, record["id"], error_rate)
+
+def run_judge(model_name, mode, index, num_shards, shard_dir=DEFAULT_SHARD_DIR):
+    """
+    Has the LLM judge compare each reference with its transcript. Needs the shard's transcribe stage to be finished.
+
+    Args:
+        model_name (str): One of MODEL_NAMES.
+        mode (str): A key of JUDGE_MODES.
+        index (int): Shard number.
+        num_shards (int): Total number of shards.
+        shard_dir (str): Where shard-local results are written.
+    """
+    import llm_judge_helper
+    judge_fn = getattr(llm_judge_helper, JUDGE_MODES[mode])
+    transcripts = load_shard_results(shard_dir, stage_name("transcribe", model_name), index, num_shards)
+
+    stage = stage_name("judge", model_name, mode)
+    journal = RunJournal(shard_path(shard_dir, stage, index, num_shards))
+    for record in evaluation_records().shard(index, num_shards):
+        if journal.is_done(stage, record["id"]):
+            continue
+        if record["id"] not in transcripts:
+            raise ValueError(f"{record['id']} hasn't been transcribed yet; run the transcribe stage of this shard first")
+        journal.record(stage, record["id"], judge_fn(record["reference"].strip(), transcripts[record["id"]].strip()))
+        print(f"[{index}/{num_shards}] Judged {record['id']}")
+
+def load_shard_results(shard_dir, stage, index, num_shards):
+    file_path = shard_path(shard_dir, stage, index, num_shards)
+    if not file_path.exists():
+        raise FileNotFoundError(f"Missing shard file {file_path}")
+    return RunJournal(file_path).completed(stage)
+
+def collect_shards(stage, num_shards, shard_dir=DEFAULT_SHARD_DIR):
+    """
+    Combines the results of every shard of a stage, making sure each clip was produced exactly once and by the right shard.
+
+    Args:
+        stage (str): Stage name, e.g. "transcribe:whisper_base".
+        num_shards (int): Total number of shards.
+        shard_dir (str): Where the shard-local results are.
+
+    Returns:
+        list: The results, in the order of a single-node run.
+    """
+    records = evaluation_records()
+    problems = []
+    results = {}
+    for index in range(num_shards):
+        try:
+            shard_results = load_shard_results(shard_dir, stage, index, num_shards)
+        except FileNotFoundError as error:
+            problems.append(str(error))
+            continue
+        expected = set(records.shard(index, num_shards).ids())
+        for clip_id, result in shard_results.items():
+            if clip_id in results:
+                problems.append(f"{clip_id} appears in more than one shard")
+            if clip_id not in expected:
+                problems.append(f"{clip_id} doesn't belong to shard {index}/{num_shards}")
+            results[clip_id] = result
+    missing = [clip_id for clip_id in records.ids() if clip_id not in results]
+    if missing:
+        problems.append(f"Missing results for {missing}")
+    if problems:
+        raise ValueError(f"Can't merge {stage}:\n  " + "\n  ".join(problems))
+    return [results[clip_id] for clip_id in records.ids()]
+
+def merge(stage, model_name, num_shards, mode=None, shard_dir=DEFAULT_SHARD_DIR):
+    """
+    Writes the merged results of a stage to the same files a single-node run produces.
+
+    Args:
+        stage (str): "transcribe", "wer" or "judge".
+        model_name (str): One of MODEL_NAMES.
+        num_shards (int): Total number of shards.
+        mode (str): A key of JUDGE_MODES, for the judge stage.
+        shard_dir (str): Where the shard-local results are.
+
+    Returns:
+        Path: The merged output file (or folder, for the judge stage).
+    """
+    results = collect_shards(stage_name(stage, model_name, mode if stage == "judge" else None), num_shards, shard_dir)
+
+    if stage == "transcribe":
+        output_path = SRC_DIR / "transcripts" / f"{model_name}_transcripts.txt"
+        write_file_atomically(output_path, "\n".join(results) + "\n")
+        return output_path
+
+    if stage == "wer":
+        # Replace this model's line of wer_results.txt, keeping the other models' lines
+        output_path = SRC_DIR / "wer" / "wer_results.txt"
+        lines = {}
+        if output_path.exists():
+            with open(output_path, "r") as file:
+                for line in file:
+                    if " = " in line:
+                        lines[line.split(" = ", 1)[0]] = line
+        lines[f"{model_name}_error"] = f"{model_name}_error = {results}\n"
+        order = [f"{name}_error" for name in MODEL_NAMES]
+        keys = sorted(lines, key=lambda key: order.index(key) if key in order else len(order))
+        write_file_atomically(output_path, "".join(lines[key] for key in keys))
+        return output_path
+
+    output_folder = SRC_DIR / "llm_judge" / JUDGE_OUTPUT_DIRS[mode] / model_name
+    output_folder.mkdir(parents=True, exist_ok=True)
+    for i, result in enumerate(results):
+        write_file_atomically(output_folder / f"evaluation_result_{i+1}.txt", result)
+    return output_folder
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Run one shard of the evaluation, or merge finished shards.")
+    parser.add_argument("--shard-dir", default=DEFAULT_SHARD_DIR, help="Where shard-local results are written")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    for command in ["transcribe", "wer", "judge"]:
+        subparser = subparsers.add_parser(command)
+        subparser.add_argument("--model", choices=MODEL_NAMES, required=True)
+        subparser.add_argument("--shard", type=parse_shard, required=True, help="i/N, e.g. 0/4")
+        if command == "judge":
+            subparser.add_argument("--mode", choices=list(JUDGE_MODES), default="raw")
+
+    merge_parser = subparsers.add_parser("merge")
+    merge_parser.add_argument("stage", choices=["transcribe", "wer", "judge"])
+    merge_parser.add_argument("--model", choices=MODEL_NAMES, required=True)
+    merge_parser.add_argument("--num-shards", type=int, required=True)
+    merge_parser.add_argument("--mode", choices=list(JUDGE_MODES), default="raw")
+
+    args = parser.parse_args()
+    if args.command == "transcribe":
+        run_transcribe(args.model, *args.shard, shard_dir=args.shard_dir)
+    elif args.command == "wer":
+        run_wer(args.model, *args.shard, shard_dir=args.shard_dir)
+    elif args.command == "judge":
+        run_judge(args.model, args.mode, *args.shard, shard_dir=args.shard_dir)
+    else:
+        output_path = merge(args.stage, args.model, args.num_shards, args.mode, shard_dir=args.shard_dir)
+        print(f"Merged {args.num_shards} shards into {output_path}")
@@ -0,0 +1,231 @@
+import numpy as np
+from pathlib import Path
+from chunk_audio import stream_audio_chunks
+
+"""
+segment_speech.py
+
+Energy-based voice activity detection (VAD) in pure NumPy.
+Radio traffic is mostly dead air, so instead of cutting audio on fixed 30-second boundaries,
+we find the speech regions, pack them into segments under a maximum duration (cutting at pauses),
+and only pass speech to the STT models. Each segment keeps its time offset so the transcripts
+can be stitched back together afterwards.
+"""
+
+def frame_energy_db(audio, sample_rate=16000, frame_ms=30):
+    """
+    Computes the RMS energy of non-overlapping frames in decibels.
+
+    Args:
+        audio (np.ndarray): Mono audio samples.
+        sample_rate (int): Sample rate of the audio.
+        frame_ms (int): Frame length in milliseconds.
+
+    Returns:
+        np.ndarray: The energy of each frame in dB.
+    """
+    frame_len = int(sample_rate * frame_ms / 1000)
+    num_frames = len(audio) // frame_len
+    frames = np.asarray(audio[:num_frames * frame_len], dtype=np.float32).reshape(num_frames, frame_len)
+    rms = np.sqrt(np.mean(frames ** 2, axis=1) + 1e-12)
+    return 20 * np.log10(rms)
+
+def frame_flatness(audio, sample_rate=16000, frame_ms=30):
+    """
+    Computes the spectral flatness of non-overlapping frames: the geometric over the arithmetic mean of the
+    power spectrum. Voiced speech is harmonic and scores low; hiss and static are spread evenly and score high.
+
+    Args:
+        audio (np.ndarray): Mono audio samples.
+        sample_rate (int): Sample rate of the audio.
+        frame_ms (int): Frame length in milliseconds.
+
+    Returns:
+        np.ndarray: The flatness of each frame, between 0 and 1.
+    """
+    frame_len = int(sample_rate * frame_ms / 1000)
+    num_frames = len(audio) // frame_len
+    frames = np.asarray(audio[:num_frames * frame_len], dtype=np.float32).reshape(num_frames, frame_len)
+    power = np.abs(np.fft.rfft(frames * np.hanning(frame_len).astype(np.float32), axis=1)) ** 2 + 1e-12
+    return np.exp(np.mean(np.log(power), axis=1)) / np.mean(power, axis=1)
+
+SILENCE_DB = -60
+MARGIN_DB = 10
+# White noise scores about 0.56 and voiced speech well under 0.2
+MAX_FLATNESS = 0.35
+
+def detect_speech_regions(energy, frame_ms=30, threshold_db=None, min_silence=0.3, min_speech=0.1, flatness=None, max_flatness=MAX_FLATNESS):
+    """
+    Finds runs of speech frames in a frame energy curve.
+    A frame is speech when it's loud enough and, if flatness is given, not noise-like.
+
+    Args:
+        energy (np.ndarray): Frame energies in dB from frame_energy_db.
+        frame_ms (int): Frame length in milliseconds.
+        threshold_db (float): Energy threshold for speech. Adapts to the noise floor if None.
+        min_silence (float): Pauses shorter than this (in seconds) are bridged.
+        min_speech (float): Speech runs shorter than this (in seconds) are dropped as clicks.
+        flatness (np.ndarray): Optional frame spectral flatness from frame_flatness.
+        max_flatness (float): Frames flatter than this are treated as noise, however loud.
+
+    Returns:
+        list of tuple: (start_frame, end_frame) pairs, end exclusive.
+    """
+    if len(energy) == 0:
+        return []
+
+    # Sit a fixed margin above the noise floor, but never below digital silence.
+    # A steady level (continuous speech, compressed radio, constant static) has no floor to measure against,
+    # so there the energy only rules out digital silence and the flatness check tells speech from static
+    if threshold_db is None:
+        noise_floor = np.percentile(energy, 10)
+        steady = energy.max() - noise_floor < MARGIN_DB
+        threshold_db = SILENCE_DB if steady else max(noise_floor + MARGIN_DB, SILENCE_DB)
+    is_speech = energy > threshold_db
+    if flatness is not None:
+        is_speech &= flatness < max_flatness
+
+    # Locate the rising and falling edges of the speech mask
+    edges = np.diff(np.concatenate([[0], is_speech.astype(np.int8), [0]]))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+
+    # Bridge short pauses, then drop runs that are too short to be words
+    frames_per_second = 1000 / frame_ms
+    regions = []
+    for start, end in zip(starts, ends):
+        if regions and start - regions[-1][1] < min_silence * frames_per_second:
+            regions[-1] = (regions[-1][0], end)
+        else:
+            regions.append((start, end))
+    return [(start, end) for start, end in regions if end - start >= min_speech * frames_per_second]
+
+def segment_speech(audio, sample_rate=16000, max_duration=30.0, frame_ms=30, padding=0.1, max_gap=0.75, **vad_kwargs):
+    """
+    Splits audio into speech-only segments no longer than max_duration.
+    Neighboring speech regions are merged while they fit and the silence between them is short, and regions
+    that are too long are cut at their quietest frame so we avoid cutting mid-word.
+
+    Args:
+        audio (np.ndarray): Mono audio samples.
+        sample_rate (int): Sample rate of the audio.
+        max_duration (float): Maximum length of a segment in seconds.
+        frame_ms (int): Frame length in milliseconds.
+        padding (float): Seconds of context kept on either side of each segment.
+        max_gap (float): Longest silence (in seconds) merged into a segment; longer gaps start a new segment.
+        **vad_kwargs: Extra keyword arguments for detect_speech_regions.
+
+    Returns:
+        list of tuple: (start_sample, end_sample) pairs, end exclusive.
+    """
+    energy = frame_energy_db(audio, sample_rate, frame_ms)
+    flatness = frame_flatness(audio, sample_rate, frame_ms)
+    regions = detect_speech_regions(energy, frame_ms, flatness=flatness, **vad_kwargs)
+
+    frame_len = int(sample_rate * frame_ms / 1000)
+    max_frames = int((max_duration - 2 * padding) * 1000 / frame_ms)
+    max_gap_frames = max_gap * 1000 / frame_ms
+
+    # Cut overly long regions at the quietest frame in the back half of each window
+    split_regions = []
+    for start, end in regions:
+        while end - start > max_frames:
+            search_from = start + max_frames // 2
+            cut = search_from + int(np.argmin(energy[search_from:start + max_frames]))
+            split_regions.append((start, cut))
+            start = cut
+        split_regions.append((start, end))
+
+    # Greedily merge neighboring regions while the segment stays under max_duration and the gap is short,
+    # so long stretches of dead air never reach the model
+    segments = []
+    for start, end in split_regions:
+        if segments and start - segments[-1][1] <= max_gap_frames and end - segments[-1][0] <= max_frames:
+            segments[-1] = (segments[-1][0], end)
+        else:
+            segments.append((start, end))
+
+    # Convert frames to samples with some padding on either side
+    pad = int(padding * sample_rate)
+    return [(max(start * frame_len - pad, 0), min(end * frame_len + pad, len(audio))) for start, end in segments]
+
+def iter_speech_segments(file_path, sample_rate=16000, max_duration=30.0, window_length=300, **segment_kwargs):
+    """
+    Streams a (possibly multi-hour) recording and yields its speech segments.
+    The last segment of every window is carried over into the next one, since it may continue past the window edge.
+
+    Args:
+        file_path (str): Path to the input audio file.
+        sample_rate (int): Sample rate passed to the STT models.
+        max_duration (float): Maximum length of a segment in seconds.
+        window_length (int): Seconds of audio read from disk at a time.
+        **segment_kwargs: Extra keyword arguments for segment_speech.
+
+    Yields:
+        tuple: The segment offset in seconds and its float32 samples.
+    """
+    carry = np.zeros(0, dtype=np.float32)
+    carry_offset = 0
+    for _, chunk in stream_audio_chunks(file_path, window_length, sample_rate):
+        audio = np.concatenate([carry, chunk.squeeze(0).numpy()])
+        segments = segment_speech(audio, sample_rate, max_duration, **segment_kwargs)
+
+        # Hold back the final segment until we have seen the audio that follows it
+        carry_start = segments[-1][0] if segments else len(audio)
+        for start, end in segments[:-1]:
+            yield (carry_offset + start) / sample_rate, audio[start:end]
+        carry = audio[carry_start:]
+        carry_offset += carry_start
+
+    for start, end in segment_speech(carry, sample_rate, max_duration, **segment_kwargs):
+        yield (carry_offset + start) / sample_rate, carry[start:end]
+
+def transcribe_speech_segments(file_path, transcribe, sample_rate=16000, max_duration=30.0, **segment_kwargs):
+    """
+    Transcribes only the speech in an audio file.
+
+    Args:
+        file_path (str): Path to the input audio file.
+        transcribe (callable): Takes float32 samples at sample_rate and returns the transcript text.
+        sample_rate (int): Sample rate expected by the transcriber.
+        max_duration (float): Maximum length of a segment in seconds.
+        **segment_kwargs: Extra keyword arguments for segment_speech.
+
+    Returns:
+        list of dict: Segment start/end times (in seconds) with the transcribed text.
+    """
+    results = []
+    for offset, samples in iter_speech_segments(file_path, sample_rate, max_duration, **segment_kwargs):
+        results.append({
+            "start": round(offset, 3),
+            "end": round(offset + len(samples) / sample_rate, 3),
+            "text": transcribe(samples).strip(),
+        })
+    return results
+
+def reassemble_transcript(segment_transcripts):
+    """
+    Stitches segment transcripts back into a single transcript in time order.
+
+    Args:
+        segment_transcripts (list of dict): Output of transcribe_speech_segments.
+
+    Returns:
+        str: The full transcript.
+    """
+    ordered = sorted(segment_transcripts, key=lambda segment: segment["start"])
+    return " ".join(segment["text"] for segment in ordered if segment["text"])
+
+if __name__ == "__main__":
+
+    # Access the current directory (src/)
+    curr_dir = Path(__file__).resolve().parent
+
+    # Report how much of the recording is actually speech
+    input_path = curr_dir / "audio" / "24kHz" / "audio_12_24kHz.wav"
+    total_speech = 0
+    for offset, samples in iter_speech_segments(input_path):
+        duration = len(samples) / 16000
+        total_speech += duration
+        print(f"Segment at {offset:.2f}s, {duration:.2f}s long")
+    print(f"Total speech: {total_speech:.2f}s")
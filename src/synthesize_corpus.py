@@ -0,0 +1,205 @@
+import argparse
+import hashlib
+import json
+import os
+import random
+import tempfile
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+import numpy as np
+import soundfile as sf
+import torch
+from text_to_speech import decode_mp3, get_resampler
+
+"""
+synthesize_corpus.py
+
+Synthesizes a test corpus from a JSONL list of items, each with "text" and optionally "id", "voice" and "model".
+An item without a voice (or with "voice": "all") is synthesized with every voice in VOICES.
+- Requests run concurrently with bounded parallelism, and failed requests are retried with exponential backoff.
+- Each clip is stored as <content hash>.wav, hashed over (backend, model, voice, text, sample rate),
+  so re-running skips every unchanged item and only synthesizes new or edited ones.
+- The backend is pluggable: "openai" calls the OpenAI TTS API through one shared client, and "offline" is a
+  deterministic local stand-in that needs no network access, for testing the pipeline.
+
+Every run writes <output dir>/index.jsonl, mapping each item (and voice) to its clip.
+
+Usage:
+    python synthesize_corpus.py items.jsonl --backend offline --concurrency 8
+"""
+
+VOICES = ["alloy", "echo", "fable", "onyx", "nova", "shimmer"]
+DEFAULT_OUTPUT_DIR = Path(__file__).resolve().parent / "audio" / "synth"
+
+class OpenAIBackend:
+    name = "openai"
+
+    def __init__(self):
+        import openai
+        # One client (and connection pool) shared by every worker thread; retries are handled by synthesize_item
+        self.client = openai.OpenAI(max_retries=0)
+        self.retryable_errors = (openai.RateLimitError, openai.APIConnectionError, openai.APITimeoutError, openai.InternalServerError)
+
+    def synthesize(self, text, voice, model):
+        """
+        Args:
+            text (str): The text to speak.
+            voice (str): One of VOICES.
+            model (str): The TTS model, e.g. "tts-1".
+
+        Returns:
+            tuple: Mono float32 samples and their sample rate (24 kHz for OpenAI's TTS models).
+        """
+        response = self.client.audio.speech.create(model=model, voice=voice, input=text, response_format="mp3")
+        waveform, sample_rate = decode_mp3(response.read())
+        return waveform.mean(dim=0).numpy(), sample_rate
+
+class OfflineBackend:
+    name = "offline"
+    retryable_errors = ()
+
+    def synthesize(self, text, voice, model, sample_rate=24000):
+        # Deterministic stand-in speech: one voiced tone per word (pitch set by voice and word), separated by pauses
+        base_pitch = 90 + 25 * (VOICES.index(voice) if voice in VOICES else 0)
+        pause = np.zeros(int(0.08 * sample_rate), dtype=np.float32)
+        pieces = [pause]
+        for word in text.split():
+            seed = int.from_bytes(hashlib.sha256(f"{voice}:{word}".encode()).digest()[:4], "little")
+            pitch = base_pitch * (1 + (seed % 100) / 200)
+            t = np.arange(int(min(0.05 + 0.055 * len(word), 0.6) * sample_rate)) / sample_rate
+            envelope = np.sin(np.pi * t / t[-1]) if len(t) > 1 else np.ones_like(t)
+            tone = sum(np.sin(2 * np.pi * pitch * harmonic * t) / harmonic for harmonic in (1, 2, 3))
+            pieces += [(0.25 * envelope * tone).astype(np.float32), pause]
+        return np.concatenate(pieces), sample_rate
+
+BACKENDS = {"openai": OpenAIBackend, "offline": OfflineBackend}
+
+def expand_items(items):
+    """
+    Expands items without a voice into one item per voice, filling in defaults.
+
+    Args:
+        items (iterable of dict): Items with "text" and optionally "id", "voice" and "model".
+
+    Returns:
+        list of dict: One item per clip to synthesize.
+    """
+    expanded = []
+    for i, item in enumerate(items):
+        voices = VOICES if item.get("voice", "all") == "all" else [item["voice"]]
+        for voice in voices:
+            expanded.append({"id": item.get("id", f"item_{i}"), "text": item["text"], "voice": voice, "model": item.get("model", "tts-1")})
+    return expanded
+
+def item_key(item, backend_name, sample_rate):
+    content = json.dumps([backend_name, item["model"], item["voice"], item["text"], sample_rate])
+    return hashlib.sha256(content.encode()).hexdigest()[:24]
+
+def synthesize_item(backend, item, output_path, sample_rate=16000, max_retries=5, base_delay=1.0):
+    """
+    Synthesizes one clip, retrying retryable backend errors with exponential backoff and jitter.
+
+    Args:
+        backend: An instance of one of BACKENDS.
+        item (dict): The item to synthesize.
+        output_path (Path): Where to write the .wav clip.
+        sample_rate (int): Sample rate of the written clip.
+        max_retries (int): Retries before giving up on the item.
+        base_delay (float): Delay before the first retry, in seconds; doubled on each retry.
+
+    Returns:
+        Path: The written clip.
+    """
+    for attempt in range(max_retries + 1):
+        try:
+            samples, source_rate = backend.synthesize(item["text"], item["voice"], item["model"])
+            break
+        except backend.retryable_errors:
+            if attempt == max_retries:
+                raise
+            time.sleep(base_delay * 2 ** attempt + random.uniform(0, base_delay))
+
+    if source_rate != sample_rate:
+        samples = get_resampler(source_rate, sample_rate)(torch.from_numpy(samples)).numpy()
+
+    # Write to a uniquely named temporary file first so an interrupted run never leaves a truncated clip
+    # in the cache, and concurrent writers never share a temp file
+    with tempfile.NamedTemporaryFile(dir=output_path.parent, suffix=".tmp", delete=False) as tmp_file:
+        try:
+            sf.write(tmp_file, samples, sample_rate, format="WAV", subtype="PCM_16")
+        except BaseException:
+            os.remove(tmp_file.name)
+            raise
+    os.replace(tmp_file.name, output_path)
+    return output_path
+
+def synthesize_corpus(items, backend_name="offline", output_dir=DEFAULT_OUTPUT_DIR, concurrency=8, sample_rate=16000):
+    """
+    Synthesizes every item that isn't already cached, running up to `concurrency` requests at once.
+
+    Args:
+        items (iterable of dict): Items with "text" and optionally "id", "voice" and "model".
+        backend_name (str): A key of BACKENDS.
+        output_dir (str): Where the clips and index.jsonl are written.
+        concurrency (int): Maximum number of requests in flight.
+        sample_rate (int): Sample rate of the written clips.
+
+    Returns:
+        dict: The number of clips synthesized, skipped (already cached, or the same clip as an earlier item) and failed.
+    """
+    output_dir = Path(output_dir)
+    os.makedirs(output_dir, exist_ok=True)
+    backend = BACKENDS[backend_name]()
+    items = expand_items(items)
+    stats = {"synthesized": 0, "skipped": 0, "failed": 0}
+
+    def finish(future, item):
+        try:
+            future.result()
+            stats["synthesized"] += 1
+        except Exception as error:
+            stats["failed"] += 1
+            print(f"Failed to synthesize {item['id']} ({item['voice']}): {error}")
+
+    index = []
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        # Keep a bounded number of requests queued so thousands of items don't all sit in memory at once
+        pending = deque()
+        submitted = set()
+        for item in items:
+            key = item_key(item, backend.name, sample_rate)
+            output_path = output_dir / f"{key}.wav"
+            index.append(dict(item, key=key, backend=backend.name, audio_path=output_path.name))
+            # Items with the same text, voice and model under different ids share one clip, synthesized once
+            if key in submitted or output_path.exists():
+                stats["skipped"] += 1
+                continue
+            submitted.add(key)
+            if len(pending) >= 2 * concurrency:
+                finish(*pending.popleft())
+            pending.append((executor.submit(synthesize_item, backend, item, output_path, sample_rate), item))
+        while pending:
+            finish(*pending.popleft())
+
+    with open(output_dir / "index.jsonl", "w") as file:
+        for entry in index:
+            file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+    return stats
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Synthesize a TTS test corpus from a JSONL list of items.")
+    parser.add_argument("items", help="JSONL file with one {\"text\", \"id\", \"voice\", \"model\"} item per line")
+    parser.add_argument("--backend", choices=list(BACKENDS), default="offline")
+    parser.add_argument("--output-dir", default=DEFAULT_OUTPUT_DIR)
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args()
+
+    with open(args.items, "r") as file:
+        items = [json.loads(line) for line in file if line.strip()]
+    start = time.perf_counter()
+    stats = synthesize_corpus(items, args.backend, args.output_dir, args.concurrency)
+    print(f"{stats['synthesized']} synthesized, {stats['skipped']} already cached or duplicates, {stats['failed']} failed "
+          f"in {time.perf_counter() - start:.1f}s")
@@ -0,0 +1,298 @@
+import hashlib
+import re
+import string
+from collections import OrderedDict
+from decimal import Decimal
+from functools import lru_cache
+from itertools import islice
+
+"""
+text_normalizer.py
+
+Text normalization applied before scoring, so formatting differences between a reference and a transcript
+("two-five-zero" vs "250", "FL250" vs "fl250", punctuation) don't count as word errors.
+Every option is compiled once into a str.translate table and a few regexes when the normalizer is built:
+- lowercase: fold case.
+- strip_punctuation: replace punctuation (including hyphens and apostrophes) with spaces, after removing
+  thousands separators between digits ("$3,000" -> "3000", matching "three thousand"). Decimal points between
+  digits are kept ("$1.5" -> "1.5"), and clause punctuation (",;:.!?") still ends a spoken number.
+- split_hyphens: split hyphenated words even when other punctuation is kept.
+- split_alphanumeric: split letters from digits inside acronyms ("fl250" -> "fl 250", "j11s" -> "j 11 s").
+- verbalize_numbers: turn number words into digits ("fourteen hundred" -> "1400", "ten zero" -> "10 0",
+  "one point five million" and "1.5 million" -> "1500000"), leaving the pronoun "one" alone ("no one").
+- join_digits: join runs of single digits read out one by one ("2 5 0" -> "250").
+
+Normalized token tuples are cached per text hash, so WER, entity error rate and any other metric
+normalizing the same transcript reuse the same tokens. normalize_lines() streams a corpus in blocks,
+running the string-level steps once per block instead of once per line.
+
+Usage:
+    from text_normalizer import get_normalizer
+    normalizer = get_normalizer()
+    normalizer.normalize("Maintain FL250, two-five-zero.")  # "maintain fl 250 250"
+"""
+
+ONES = {"zero": 0, "one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6, "seven": 7, "eight": 8, "nine": 9}
+TEENS = {
+    "ten": 10, "eleven": 11, "twelve": 12, "thirteen": 13, "fourteen": 14,
+    "fifteen": 15, "sixteen": 16, "seventeen": 17, "eighteen": 18, "nineteen": 19,
+}
+TENS = {"twenty": 20, "thirty": 30, "forty": 40, "fifty": 50, "sixty": 60, "seventy": 70, "eighty": 80, "ninety": 90}
+SCALES = {"hundred": 100, "thousand": 1000, "million": 1000000}
+# "one" after these words is a pronoun ("no one", "any one of them", "that one"), not a number
+PRONOUN_ONE_AFTER = {"no", "some", "any", "every", "each", "the", "this", "that", "which"}
+# Stands in for stripped clause punctuation until numbers are verbalized, so a number never runs across it
+BOUNDARY = "\ue000"
+DIGITS = re.compile(r"\d+(\.\d+)?")
+
+def _number_category(word):
+    if word in ONES:
+        return "ones"
+    if word in TEENS:
+        return "teens"
+    if word in TENS:
+        return "tens"
+    if word in SCALES:
+        return "scale"
+    return None
+
+def _format_number(value):
+    # Decimal keeps "1.5 million" exact; normalize() drops trailing zeros, "f" avoids exponents
+    return format(value.normalize(), "f")
+
+def verbalize_numbers(tokens):
+    """
+    Replaces runs of number words with digits. A run is split wherever the words can't form one number,
+    so digit-by-digit readings stay separate ("ten zero" -> "10", "0"), and at BOUNDARY tokens, which are dropped.
+    Decimals are read with "point" ("one point five" -> "1.5"), and digits followed by a scale word are
+    multiplied out ("1.5 million" -> "1500000").
+
+    Args:
+        tokens (list of str): Lowercase tokens.
+
+    Returns:
+        list of str: The tokens with number words replaced.
+    """
+    output = []
+    total, current, last, decimals = Decimal(0), Decimal(0), None, None
+
+    def flush():
+        nonlocal total, current, last, decimals
+        if decimals:
+            current += Decimal(f"0.{decimals}")
+        if last is not None:
+            output.append(_format_number(total + current))
+        total, current, last, decimals = Decimal(0), Decimal(0), None, None
+
+    for i, token in enumerate(tokens):
+        next_token = tokens[i + 1] if i + 1 < len(tokens) else None
+        category = _number_category(token)
+        if (token == "one" and i > 0 and tokens[i - 1] in PRONOUN_ONE_AFTER
+                and (next_token is None or _number_category(next_token) is None)):
+            category = None
+
+        if decimals is not None:
+            # Digits after "point" are read one by one
+            if category == "ones":
+                decimals += str(ONES[token])
+                continue
+            current += Decimal(f"0.{decimals}")
+            decimals = None
+            # Only a scale can follow a fraction ("one point five million")
+            if category != "scale":
+                flush()
+        if token == "point" and last is not None and _number_category(next_token) == "ones":
+            decimals = ""
+            continue
+        if token == BOUNDARY:
+            flush()
+            continue
+        if category is None and next_token in SCALES and DIGITS.fullmatch(token):
+            flush()
+            current, last = Decimal(token), "digits"
+            continue
+        if category is None:
+            # "one hundred and five": keep going through "and" between a scale and the rest of the number
+            if token == "and" and last == "scale" and i + 1 < len(tokens) and _number_category(tokens[i + 1]) in ("ones", "teens", "tens"):
+                continue
+            flush()
+            output.append(token)
+            continue
+
+        if category == "scale":
+            if last is None:
+                current = 1
+            if SCALES[token] == 100:
+                current *= 100
+            else:
+                total += current * SCALES[token]
+                current = 0
+        else:
+            # A small number only continues the run after a scale, or ones after tens ("twenty five")
+            if last is not None and last != "scale" and not (category == "ones" and last == "tens"):
+                flush()
+            current += ONES[token] if category == "ones" else TEENS.get(token, TENS.get(token))
+        last = category
+    flush()
+    return output
+
+def join_digit_runs(tokens):
+    """
+    Joins consecutive single-digit tokens, e.g. ["2", "5", "0"] -> ["250"].
+
+    Args:
+        tokens (list of str): Normalized tokens.
+
+    Returns:
+        list of str: The tokens with digit runs joined.
+    """
+    output = []
+    run = []
+    for token in tokens:
+        if len(token) == 1 and token.isdigit():
+            run.append(token)
+            continue
+        if run:
+            output.append("".join(run))
+            run = []
+        output.append(token)
+    if run:
+        output.append("".join(run))
+    return output
+
+class TextNormalizer:
+    def __init__(self, lowercase=True, strip_punctuation=True, split_hyphens=True, split_alphanumeric=True,
+                 verbalize_numbers=True, join_digits=True, cache_size=100000):
+        """
+        Args:
+            lowercase (bool): Fold case.
+            strip_punctuation (bool): Replace punctuation with spaces.
+            split_hyphens (bool): Split hyphenated words (implied by strip_punctuation).
+            split_alphanumeric (bool): Split letters from digits inside tokens.
+            verbalize_numbers (bool): Turn number words into digits.
+            join_digits (bool): Join runs of single digits.
+            cache_size (int): Number of normalized texts kept in the token cache.
+        """
+        self.config = {
+            "lowercase": lowercase, "strip_punctuation": strip_punctuation, "split_hyphens": split_hyphens,
+            "split_alphanumeric": split_alphanumeric, "verbalize_numbers": verbalize_numbers, "join_digits": join_digits,
+        }
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+
+        # Compile every character-level step into one translate table
+        replaced = ""
+        if strip_punctuation:
+            replaced += string.punctuation + "‘’“”–—°"
+        elif split_hyphens:
+            replaced += "-–—"
+        # Periods are left to self._boundaries, which keeps the decimal points
+        self._table = str.maketrans({character: " " for character in replaced.replace(".", "")})
+        self._thousands = re.compile(r"(?<=\d),(?=\d{3}(?!\d))") if strip_punctuation else None
+        self._boundaries = re.compile(r"[,;:!?]|(?<!\d)\.|\.(?!\d)") if strip_punctuation else None
+        self._alphanumeric = re.compile(r"(?<=[^\W\d_])(?=\d)|(?<=\d)(?=[^\W\d_])") if split_alphanumeric else None
+
+    def _normalize_string(self, text):
+        # String-level steps: work on a single line or on a whole block of lines joined by newlines
+        if self.config["lowercase"]:
+            text = text.lower()
+        if self._thousands is not None:
+            text = self._thousands.sub("", text)
+        if self._boundaries is not None:
+            text = self._boundaries.sub(f" {BOUNDARY} ", text)
+        text = text.translate(self._table)
+        if self._alphanumeric is not None:
+            text = self._alphanumeric.sub(" ", text)
+        return text
+
+    def _normalize_tokens(self, tokens):
+        if self.config["verbalize_numbers"]:
+            tokens = verbalize_numbers(tokens)
+        else:
+            tokens = [token for token in tokens if token != BOUNDARY]
+        if self.config["join_digits"]:
+            tokens = join_digit_runs(tokens)
+        return tuple(tokens)
+
+    def tokens(self, text):
+        """
+        Normalizes a text into tokens, served from the cache when the same text was normalized before.
+
+        Args:
+            text (str): The raw text.
+
+        Returns:
+            tuple of str: The normalized tokens.
+        """
+        key = hashlib.blake2b(text.encode(), digest_size=16).digest()
+        tokens = self._cache.get(key)
+        if tokens is not None:
+            self._cache.move_to_end(key)
+            return tokens
+
+        tokens = self._normalize_tokens(self._normalize_string(text).split())
+        self._cache[key] = tokens
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return tokens
+
+    def normalize(self, text):
+        return " ".join(self.tokens(text))
+
+    def normalize_lines(self, lines, block_size=10000):
+        """
+        Streams normalized lines over a corpus of any size, bypassing the token cache.
+
+        Args:
+            lines (iterable of str): The raw lines, e.g. an open file.
+            block_size (int): Number of lines whose string-level steps run together.
+
+        Yields:
+            tuple of str: The normalized tokens of each line, in order.
+        """
+        lines = iter(lines)
+        while True:
+            block = [line.rstrip("\n") for line in islice(lines, block_size)]
+            if not block:
+                return
+            for line in self._normalize_string("\n".join(block)).split("\n"):
+                yield self._normalize_tokens(line.split())
+
+    def normalize_file(self, input_path, output_path, block_size=10000):
+        """
+        Normalizes a text file line by line without loading it into memory.
+
+        Args:
+            input_path (str): The raw text file.
+            output_path (str): Where to write the normalized lines.
+            block_size (int): Number of lines whose string-level steps run together.
+
+        Returns:
+            int: The number of lines written.
+        """
+        num_lines = 0
+        with open(input_path, "r") as input_file, open(output_path, "w") as output_file:
+            for tokens in self.normalize_lines(input_file, block_size):
+                output_file.write(" ".join(tokens) + "\n")
+                num_lines += 1
+        return num_lines
+
+@lru_cache(maxsize=None)
+def get_normalizer(**config):
+    """
+    Returns the shared normalizer of a configuration, so every metric reuses the same compiled steps and token cache.
+
+    Args:
+        **config: Keyword arguments of TextNormalizer.
+
+    Returns:
+        TextNormalizer: The shared normalizer.
+    """
+    return TextNormalizer(**config)
+
+if __name__ == "__main__":
+    import sys
+
+    # Normalize a text file: python text_normalizer.py input.txt output.txt
+    num_lines = get_normalizer().normalize_file(sys.argv[1], sys.argv[2])
+    print(f"Normalized {num_lines} lines into {sys.argv[2]}")
@@ -1,46 +1,68 @@
+import io
+import os
+from functools import lru_cache
 from openai import OpenAI
 from pydub import AudioSegment
+import numpy as np
+import soundfile as sf
+import torch
 import torchaudio
-import os
 
 # Remember to not leave this in the open.
-os.environ["OPENAI_API_KEY"] = ""
+os.environ.setdefault("OPENAI_API_KEY", "")
+
+@lru_cache(maxsize=None)
+def get_client():
+    # One client (and connection pool) for every clip, instead of a new one per call
+    return OpenAI()
+
+@lru_cache(maxsize=None)
+def get_resampler(orig_freq, new_freq):
+    # Building the resampling kernel is the expensive part, so build it once per rate pair
+    return torchaudio.transforms.Resample(orig_freq=orig_freq, new_freq=new_freq)
+
+def decode_mp3(mp3_bytes):
+    """
+    Decodes MP3 bytes in memory.
+
+    Args:
+        mp3_bytes (bytes): The encoded audio.
+
+    Returns:
+        tuple: A float32 (channels, samples) waveform in [-1, 1] and its sample rate.
+    """
+    audio = AudioSegment.from_file(io.BytesIO(mp3_bytes), format="mp3")
+    samples = np.array(audio.get_array_of_samples(), dtype=np.float32).reshape(-1, audio.channels).T
+    return torch.from_numpy(samples / (1 << (8 * audio.sample_width - 1))), audio.frame_rate
 
 # This helper function generates an audio file given an input model, voice, and an input sentence.
 # Here, I save the output as a .wav file for lossless audio
-def text_to_speech(model="tts-1", voice="alloy", input="Hello World!", filename="output"):
+def text_to_speech(model="tts-1", voice="alloy", input="Hello World!", filename="output", keep_24khz=True):
     
     # OpenAI's TTS model generates audio at 24 kHz
     # Our SST model demands 16 kHz audio for its input.
-    temp_filename = f"{filename}_24kHz.mp3"
-    
-    # Generate the audio stream into a temporary file
-    client = OpenAI()
-    response = client.audio.speech.create(
+    # Stream the response into memory instead of a temporary .mp3, so parallel calls never share a file
+    buffer = io.BytesIO()
+    with get_client().audio.speech.with_streaming_response.create(
         model=model,
         voice=voice,
         input=input,
-    )
-
-    # Write the streamed content to a temporary file
-    with open(temp_filename, "wb") as file:
+    ) as response:
         for chunk in response.iter_bytes():  # Stream the response content in chunks
-            file.write(chunk)
-            
-    # Convert the file into a .wav file for the SST model.
-    mp3_audio = AudioSegment.from_file(temp_filename, format="mp3")
-    wav_filename = f"{filename}_24kHz.wav"
-    mp3_audio.export(wav_filename, format="wav")
+            buffer.write(chunk)
 
-    # Resample the audio to 16 kHz as requested
-    waveform, sample_rate = torchaudio.load(wav_filename)
+    # Decode once, in memory
+    waveform, sample_rate = decode_mp3(buffer.getvalue())
+
+    # Optionally keep the lossless 24 kHz .wav as well
+    if keep_24khz:
+        sf.write(f"{filename}_24kHz.wav", waveform.T.numpy(), sample_rate, subtype="PCM_16")
+
+    # Resample once with the cached kernel, then write the 16 kHz .wav for the SST model
     target_sample_rate = 16000
     if sample_rate != target_sample_rate:
-        waveform = torchaudio.transforms.Resample(orig_freq=sample_rate, new_freq=target_sample_rate)(waveform)
-    torchaudio.save(f"{filename}.wav", waveform, target_sample_rate)
-
-    # Remove the temporary file
-    os.remove(temp_filename)
+        waveform = get_resampler(sample_rate, target_sample_rate)(waveform)
+    sf.write(f"{filename}.wav", waveform.T.numpy(), target_sample_rate, subtype="PCM_16")
 
 """
 
@@ -1,18 +1,19 @@
-import torchaudio
-from torchaudio.functional import resample
+import sys
 from transformers import AutoModelForSpeechSeq2Seq, AutoProcessor
 from jiwer import wer
 from pathlib import Path
 import einops
 import requests
-import signal
-import os
-import subprocess
 import json
 import xlsxwriter
 from pptx import Presentation
 from pptx.util import Pt
 
+# Make the shared helpers in src/ importable when running this script directly
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from feature_store import load_features
+from ollama_manager import OllamaManager
+
 system_prompt = (
         "**GPT Agent Prompt**\n\n"
         "You are tasked with analyzing a transcript and producing a 2D JSON structure that represents an F2T2TEA table. "
@@ -113,8 +114,12 @@ system_prompt = (
     ) 
 
 class TranscriptProcessor:
-    def __init__(self):
-        pass
+    def __init__(self, llm_manager=None):
+        """
+        Args:
+            llm_manager (OllamaManager): Manages the local LLM server. Defaults to llama3.1:70b on the default Ollama URL.
+        """
+        self.llm_manager = llm_manager or OllamaManager(model="llama3.1:70b")
 
     def generate_completion(self, prompt):
         """
@@ -126,25 +131,10 @@ class TranscriptProcessor:
         Returns:
             str: The response from the Ollama API.
         """
-        url = "http://localhost:11434/api/generate"
-
-        payload = {
-            "model": "llama3.1:70b",
-            "prompt": prompt,
-            "stream": False,
-            "options": {
-                "temperature": 0.7  # Default temperature
-            }
-        }
-
         try:
-            response = requests.post(url, json=payload, stream=False)
-            response.raise_for_status()
+            return self.llm_manager.generate(prompt, options={"temperature": 0.7})
 
-            # Return a single response object
-            return response.json().get("response", "No response received.")
-
-        except requests.exceptions.RequestException as e:
+        except (requests.exceptions.RequestException, RuntimeError) as e:
             print(f"Error: {e}")
             return None
 
@@ -221,13 +211,12 @@ class TranscriptProcessor:
 
     def stop_llm_process(self):
         """
-        Sends a signal to stop the LLM process running on the specified port.
+        Unloads the model and stops the LLM server if this processor started it.
         """
-        try:
-            subprocess.run(["pkill", "-f", "ollama-server"], check=True)
+        if self.llm_manager.stop():
             print("LLM process stopped successfully.")
-        except subprocess.CalledProcessError:
-            print("LLM process is not running or could not be stopped.")
+        else:
+            print("LLM process was not started by this processor; unloaded the model and left the server running.")
 
     def evaluate_whisper_base(self, input_audio, input_reference):
         """
@@ -240,17 +229,11 @@ class TranscriptProcessor:
         Returns:
             tuple: Transcription and Word Error Rate (WER).
         """
-        audio, sr = torchaudio.load(input_audio)
-
-        if sr != 16000:
-            audio = resample(audio, sr, 16000)
-            print(f"Resampled audio to 16kHz")
-
         model = AutoModelForSpeechSeq2Seq.from_pretrained("openai/whisper-base.en")
         processor = AutoProcessor.from_pretrained("openai/whisper-base.en")
 
         print("Preprocessing audio...")
-        input_features = processor.feature_extractor(audio.squeeze().numpy(), sampling_rate=16000, return_tensors="pt").input_features
+        input_features = load_features(input_audio, processor.feature_extractor)
 
         print("Transcribing audio...")
         predicted_ids = model.generate(input_features)
@@ -278,6 +261,9 @@ class TranscriptProcessor:
         """
         json_data = []
 
+        # Start the LLM server and load the model in the background while Whisper transcribes
+        self.llm_manager.preload(wait=False)
+
         # Step 1: Transcribe audio and calculate WER
         for idx, (audio_file, reference) in enumerate(zip(audio_files, reference_transcripts), start=1):
             print(f"Processing audio file {idx}/{len(audio_files)}: {audio_file}")
@@ -294,6 +280,7 @@ class TranscriptProcessor:
         # Step 3: Generate slides from JSON
         self.json_to_slides(json_data, pptx_file)
         print(f"PowerPoint presentation saved to {pptx_file}")
+        print(f"LLM latency: {self.llm_manager.report()}")
 
 if __name__ == "__main__":
     processor = TranscriptProcessor()
@@ -0,0 +1,401 @@
+import argparse
+import json
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+import requests
+
+"""
+ollama_manager.py
+
+Manages the lifecycle of the local Ollama server used to turn transcripts into F2T2TEA tables.
+- start() attaches to a server that is already running, or launches one (`ollama serve`) and polls its health
+  endpoint until it answers, so a dead server fails fast with its own error output instead of a failed request.
+- preload() loads the model into memory with `keep_alive`, so it stays resident between requests. It can run in the
+  background (e.g., while Whisper transcribes) so the first extraction doesn't pay the model load.
+- Every request is timed, and report() separates the cold start (server start, model load, first request)
+  from warm request latency.
+- stop() unloads the model and terminates the server only if this manager launched it.
+
+StandInServer is a small local stand-in for the Ollama API (with a simulated model load delay) for testing
+the pipeline without Ollama or a GPU.
+
+Usage:
+    python ollama_manager.py check --model tinyllama
+    python ollama_manager.py check --stand-in
+    python ollama_manager.py stand-in --port 11435
+"""
+
+DEFAULT_URL = "http://localhost:11434"
+DEFAULT_LOG_PATH = Path(__file__).resolve().parent.parent / ".cache" / "ollama" / "server.log"
+
+class OllamaManager:
+    def __init__(self, model="tinyllama", base_url=DEFAULT_URL, keep_alive="30m", command=None, startup_timeout=60, log_path=DEFAULT_LOG_PATH):
+        """
+        Args:
+            model (str): The model to preload and generate with.
+            base_url (str): URL of the Ollama server.
+            keep_alive (str): How long the server keeps the model loaded after the last request, e.g. "30m" or "-1" for forever.
+            command (list of str): Command that launches the server when none is running. Defaults to `ollama serve`.
+            startup_timeout (float): Seconds to wait for a launched server to become healthy.
+            log_path (str): Where a launched server's output goes.
+        """
+        self.model = model
+        self.base_url = base_url.rstrip("/")
+        self.keep_alive = keep_alive
+        self.command = command or ["ollama", "serve"]
+        self.startup_timeout = startup_timeout
+        self.log_path = Path(log_path)
+        self.process = None
+        self.session = requests.Session()
+        self._preload_thread = None
+        self._preload_error = None
+        self.timings = {"server_start": None, "model_load": None, "requests": []}
+
+    def is_healthy(self, timeout=2):
+        try:
+            return self.session.get(f"{self.base_url}/api/version", timeout=timeout).ok
+        except requests.exceptions.RequestException:
+            return False
+
+    def wait_until_healthy(self, timeout=None, interval=0.05, max_interval=1.0):
+        """
+        Polls the health endpoint with exponential backoff.
+
+        Args:
+            timeout (float): Seconds to wait. Defaults to startup_timeout.
+            interval (float): Delay before the first retry, in seconds.
+            max_interval (float): Longest delay between two polls.
+
+        Raises:
+            RuntimeError: If the launched server exits or the timeout expires first.
+        """
+        deadline = time.perf_counter() + (self.startup_timeout if timeout is None else timeout)
+        while not self.is_healthy():
+            if self.process is not None and self.process.poll() is not None:
+                output = self.log_path.read_text(errors="replace").strip()
+                raise RuntimeError(f"The LLM server exited with code {self.process.returncode}:\n{output[-2000:]}")
+            if time.perf_counter() > deadline:
+                raise RuntimeError(f"The LLM server at {self.base_url} did not become healthy within {self.startup_timeout}s")
+            time.sleep(interval)
+            interval = min(2 * interval, max_interval)
+
+    def start(self):
+        """
+        Attaches to a running server, or launches one and waits until it's healthy.
+
+        Returns:
+            bool: Whether this manager launched the server.
+
+        Raises:
+            RuntimeError: If the server can't be launched or doesn't become healthy.
+        """
+        if self.process is not None and self.process.poll() is None:
+            return True
+        if self.is_healthy():
+            return False
+
+        start = time.perf_counter()
+        host = self.base_url.split("://")[-1]
+        self.log_path.parent.mkdir(parents=True, exist_ok=True)
+        # Log to a file rather than a pipe nobody reads, which would eventually block the server.
+        # Own process group, so stop() also reaches the runner processes the server spawns
+        with open(self.log_path, "wb") as log_file:
+            try:
+                self.process = subprocess.Popen(
+                    self.command, env=dict(os.environ, OLLAMA_HOST=host),
+                    stdout=log_file, stderr=subprocess.STDOUT, start_new_session=True,
+                )
+            except OSError as error:
+                # e.g. ollama isn't installed or isn't on PATH
+                raise RuntimeError(f"Could not launch the LLM server with `{' '.join(self.command)}`: {error}") from error
+        try:
+            self.wait_until_healthy()
+        except RuntimeError:
+            self._terminate()
+            raise
+        self.timings["server_start"] = time.perf_counter() - start
+        return True
+
+    def resident_models(self):
+        """
+        Returns:
+            list of str: The models currently loaded in the server's memory.
+        """
+        response = self.session.get(f"{self.base_url}/api/ps", timeout=5)
+        response.raise_for_status()
+        return [model["name"] for model in response.json().get("models", [])]
+
+    def _load(self):
+        start = time.perf_counter()
+        # A generate request without a prompt only loads the model
+        response = self.session.post(
+            f"{self.base_url}/api/generate", json={"model": self.model, "keep_alive": self.keep_alive}, timeout=None,
+        )
+        response.raise_for_status()
+        self.timings["model_load"] = time.perf_counter() - start
+
+    def preload(self, wait=True):
+        """
+        Starts the server if needed and loads the model with keep_alive.
+
+        Args:
+            wait (bool): Block until the model is loaded. Otherwise the server starts and the model loads in a
+                background thread, and the next generate() waits for it.
+        """
+        if not wait:
+            def run():
+                try:
+                    self.start()
+                    self._load()
+                except (requests.exceptions.RequestException, RuntimeError) as error:
+                    self._preload_error = error
+            self._preload_thread = threading.Thread(target=run, daemon=True)
+            self._preload_thread.start()
+            return
+        self.start()
+        self._load()
+
+    def _wait_for_preload(self):
+        if self._preload_thread is not None:
+            self._preload_thread.join()
+            self._preload_thread = None
+            if self._preload_error is not None:
+                error, self._preload_error = self._preload_error, None
+                raise error
+
+    def generate(self, prompt, options=None, timeout=None):
+        """
+        Generates a completion, starting the server if needed.
+
+        Args:
+            prompt (str): The input prompt for the model.
+            options (dict): Ollama model options, e.g. {"temperature": 0}.
+            timeout (float): Seconds to wait for the response. Defaults to no limit.
+
+        Returns:
+            str: The generated text.
+
+        Raises:
+            requests.exceptions.RequestException: If the request fails.
+            RuntimeError: If the server can't be started.
+        """
+        self._wait_for_preload()
+        self.start()
+        payload = {"model": self.model, "prompt": prompt, "stream": False, "keep_alive": self.keep_alive, "options": options or {}}
+
+        start = time.perf_counter()
+        response = self.session.post(f"{self.base_url}/api/generate", json=payload, timeout=timeout)
+        response.raise_for_status()
+        result = response.json()
+        self.timings["requests"].append({
+            "seconds": time.perf_counter() - start,
+            # Ollama reports how much of the request went to loading the model, in nanoseconds
+            "load_seconds": result.get("load_duration", 0) / 1e9,
+        })
+        return result.get("response", "No response received.")
+
+    def report(self):
+        """
+        Summarizes the cold start and warm latency.
+
+        Returns:
+            dict: Server start and model load times, the first request's latency, and the mean and max of later requests.
+        """
+        latencies = [request["seconds"] for request in self.timings["requests"]]
+        warm = latencies[1:]
+        return {
+            "server_start_s": self.timings["server_start"],
+            "model_load_s": self.timings["model_load"],
+            "first_request_s": latencies[0] if latencies else None,
+            "first_request_load_s": self.timings["requests"][0]["load_seconds"] if latencies else None,
+            "warm_requests": len(warm),
+            "warm_mean_s": sum(warm) / len(warm) if warm else None,
+            "warm_max_s": max(warm) if warm else None,
+        }
+
+    def unload(self):
+        try:
+            self.session.post(f"{self.base_url}/api/generate", json={"model": self.model, "keep_alive": 0}, timeout=30)
+        except requests.exceptions.RequestException:
+            pass
+
+    def _terminate(self, timeout=10):
+        if self.process is None:
+            return
+        if self.process.poll() is None:
+            os.killpg(self.process.pid, signal.SIGTERM)
+            try:
+                self.process.wait(timeout)
+            except subprocess.TimeoutExpired:
+                os.killpg(self.process.pid, signal.SIGKILL)
+                self.process.wait()
+        self.process = None
+
+    def stop(self, unload=True):
+        """
+        Unloads the model and stops the server if this manager launched it. A server it attached to keeps running.
+
+        Args:
+            unload (bool): Free the model's memory first.
+
+        Returns:
+            bool: Whether a server process was stopped.
+        """
+        if self._preload_thread is not None:
+            self._preload_thread.join()
+            self._preload_thread = None
+        if unload and self.is_healthy():
+            self.unload()
+        launched = self.process is not None
+        self._terminate()
+        return launched
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+class StandInServer:
+    """
+    Local stand-in for the parts of the Ollama API the manager uses (/api/version, /api/ps and /api/generate).
+    The first request for a model sleeps load_delay seconds, then the model stays resident until keep_alive is 0.
+    Responses echo the prompt's last line, or return `response` if given.
+    """
+
+    def __init__(self, port=0, load_delay=2.0, generate_delay=0.05, response=None):
+        self.load_delay = load_delay
+        self.generate_delay = generate_delay
+        self.response = response
+        self.resident = set()
+        self.lock = threading.Lock()
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), self._handler())
+        self.thread = None
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def _handler(self):
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def send_json(self, body, status=200):
+                data = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                if self.path == "/api/version":
+                    self.send_json({"version": "stand-in"})
+                elif self.path == "/api/ps":
+                    self.send_json({"models": [{"name": name} for name in sorted(stand_in.resident)]})
+                else:
+                    self.send_json({"error": "not found"}, 404)
+
+            def do_POST(self):
+                if self.path != "/api/generate":
+                    self.send_json({"error": "not found"}, 404)
+                    return
+                request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                model = request.get("model")
+                if not model:
+                    self.send_json({"error": "model is required"}, 400)
+                    return
+
+                start = time.perf_counter()
+                load_duration = 0
+                with stand_in.lock:
+                    if request.get("keep_alive") in (0, "0"):
+                        stand_in.resident.discard(model)
+                        self.send_json({"model": model, "response": "", "done": True, "done_reason": "unload"})
+                        return
+                    if model not in stand_in.resident:
+                        time.sleep(stand_in.load_delay)
+                        stand_in.resident.add(model)
+                        load_duration = time.perf_counter() - start
+
+                prompt = request.get("prompt")
+                if prompt:
+                    time.sleep(stand_in.generate_delay)
+                response = stand_in.response if stand_in.response is not None else (prompt or "").strip().split("\n")[-1]
+                self.send_json({
+                    "model": model, "response": response if prompt else "", "done": True,
+                    "load_duration": int(load_duration * 1e9), "total_duration": int((time.perf_counter() - start) * 1e9),
+                })
+
+        return Handler
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+def stand_in_command(port, load_delay=2.0):
+    """
+    Returns the command that runs a StandInServer as its own process, to use as OllamaManager's launch command.
+    """
+    return [sys.executable, os.path.abspath(__file__), "stand-in", "--port", str(port), "--load-delay", str(load_delay)]
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Start, warm up and check the local LLM server.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    check_parser = subparsers.add_parser("check", help="Start or attach, preload, and time cold and warm requests")
+    check_parser.add_argument("--model", default="tinyllama")
+    check_parser.add_argument("--url", default=DEFAULT_URL)
+    check_parser.add_argument("--keep-alive", default="30m")
+    check_parser.add_argument("--requests", type=int, default=3, help="Number of timed requests")
+    check_parser.add_argument("--stand-in", action="store_true", help="Launch a local stand-in server instead of Ollama")
+    check_parser.add_argument("--stop", action="store_true", help="Unload the model and stop the server afterwards")
+    stand_in_parser = subparsers.add_parser("stand-in", help="Serve the stand-in Ollama API")
+    stand_in_parser.add_argument("--port", type=int, default=11435)
+    stand_in_parser.add_argument("--load-delay", type=float, default=2.0)
+    args = parser.parse_args()
+
+    if args.command == "stand-in":
+        server = StandInServer(args.port, args.load_delay)
+        signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+        print(f"Stand-in LLM server listening on {server.url}", flush=True)
+        try:
+            server.server.serve_forever()
+        finally:
+            server.server.server_close()
+        sys.exit(0)
+
+    url, command = args.url, None
+    if args.stand_in:
+        url, command = "http://127.0.0.1:11435", stand_in_command(11435)
+    manager = OllamaManager(args.model, url, args.keep_alive, command)
+    print("Launched the LLM server." if manager.start() else f"Attached to the LLM server at {url}.")
+    manager.preload()
+    print(f"Resident models: {manager.resident_models()}")
+    for i in range(args.requests):
+        manager.generate(f"Reply with one word.\n{i}", options={"temperature": 0})
+    for key, value in manager.report().items():
+        print(f"  {key}: {value:.3f}" if isinstance(value, float) else f"  {key}: {value}")
+    if args.stop:
+        manager.stop()
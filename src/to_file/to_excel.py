@@ -1,9 +1,10 @@
 import requests
-import signal
-import os
-import subprocess
 import json
 import xlsxwriter
+from ollama_manager import OllamaManager
+
+# Starts or attaches to the local Ollama server and keeps the model resident between requests
+llm_manager = OllamaManager(model="tinyllama")
 
 def generate_completion(prompt):
     """
@@ -15,25 +16,10 @@ def generate_completion(prompt):
     Returns:
         str: The response from the Ollama API.
     """
-    url = "http://localhost:11434/api/generate"
-
-    payload = {
-        "model": "tinyllama",
-        "prompt": prompt,
-        "stream": False,
-        "options": {
-            "temperature": 0  # Default temperature
-        }
-    }
-
     try:
-        response = requests.post(url, json=payload, stream=False)
-        response.raise_for_status()
-
-        # Return a single response object
-        return response.json().get("response", "No response received.")
+        return llm_manager.generate(prompt, options={"temperature": 0})
 
-    except requests.exceptions.RequestException as e:
+    except (requests.exceptions.RequestException, RuntimeError) as e:
         print(f"Error: {e}")
         return None
 
@@ -66,14 +52,12 @@ def json_to_excel(json_data, excel_file):
 
 def stop_llm_process():
     """
-    Sends a signal to stop the LLM process running on the specified port.
+    Unloads the model and stops the LLM server if this script started it.
     """
-    try:
-        # Attempt to stop the server by sending a termination signal
-        subprocess.run(["pkill", "-f", "ollama-server"], check=True)
+    if llm_manager.stop():
         print("LLM process stopped successfully.")
-    except subprocess.CalledProcessError:
-        print("LLM process is not running or could not be stopped.")
+    else:
+        print("LLM process was not started by this script; unloaded the model and left the server running.")
         
 from pptx import Presentation
 from pptx.util import Pt
@@ -232,6 +216,9 @@ if __name__ == "__main__":
         """
     ) 
 
+    # Warm the model up in the background while the transcript is being entered
+    llm_manager.preload(wait=False)
+
     user_prompt = input("Enter the transcript for analysis: ")
 
     # Combine system prompt and user prompt
@@ -0,0 +1,206 @@
+import atexit
+import cProfile
+import functools
+import json
+import os
+import pstats
+import signal
+import shutil
+import subprocess
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+import numpy as np
+
+"""
+tracing.py
+
+Lightweight spans and counters for finding which stage (and which clip) made a run slow.
+Tracing is off by default, and a disabled span() is a single flag check returning a shared no-op context.
+
+Environment variables:
+- STT_TRACE=1: record spans and counters. At exit, a per-stage summary table is printed and a
+  Chrome-trace JSON (open it in chrome://tracing or https://ui.perfetto.dev) is written to STT_TRACE_FILE,
+  or src/.cache/traces/trace_<pid>.json by default.
+- STT_PROFILE_STAGE=<span name>: also profile every occurrence of that stage (works with tracing off).
+- STT_PROFILER=cprofile|py-spy: the profiler to use (cprofile by default). Profiles go to src/.cache/profiles/.
+
+Usage:
+    from tracing import span, count
+    with span("generate", model="whisper_base", clip="audio_3.wav"):
+        ...
+    count("audio_cache_hit")
+"""
+
+DEFAULT_TRACE_DIR = Path(__file__).resolve().parent / ".cache" / "traces"
+DEFAULT_PROFILE_DIR = Path(__file__).resolve().parent / ".cache" / "profiles"
+
+_enabled = os.environ.get("STT_TRACE", "0") not in ("", "0")
+_profile_stage = os.environ.get("STT_PROFILE_STAGE")
+_profiler = os.environ.get("STT_PROFILER", "cprofile")
+_events = []
+_counters = {}
+_null_span = nullcontext()
+_start = time.perf_counter()
+
+def enable():
+    global _enabled
+    _enabled = True
+
+def disable():
+    global _enabled
+    _enabled = False
+
+def is_enabled():
+    return _enabled
+
+def span(name, **args):
+    """
+    Times a stage of the pipeline.
+
+    Args:
+        name (str): Stage name, e.g. "audio_load", "generate", "llm_call".
+        **args: Details shown with the span (clip, model, ...), so slow occurrences can be traced back.
+
+    Returns:
+        A context manager.
+    """
+    if not _enabled and name != _profile_stage:
+        return _null_span
+    return _span(name, args)
+
+@contextmanager
+def _span(name, args):
+    profiler = _start_profiler(name) if name == _profile_stage else None
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        end = time.perf_counter()
+        if profiler is not None:
+            _stop_profiler(name, profiler)
+        if _enabled:
+            _events.append({
+                "name": name, "ph": "X", "pid": os.getpid(), "tid": threading.get_ident(),
+                "ts": (start - _start) * 1e6, "dur": (end - start) * 1e6,
+                "args": {key: str(value) for key, value in args.items()},
+            })
+
+def traced(name):
+    """
+    Decorator version of span(), for timing every call of a function.
+
+    Args:
+        name (str): Stage name.
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def count(name, value=1):
+    """
+    Increments a counter (e.g., cache hits), recorded over time in the trace.
+
+    Args:
+        name (str): Counter name.
+        value (int): Amount to add.
+    """
+    if not _enabled:
+        return
+    _counters[name] = _counters.get(name, 0) + value
+    _events.append({
+        "name": name, "ph": "C", "pid": os.getpid(), "tid": threading.get_ident(),
+        "ts": (time.perf_counter() - _start) * 1e6, "args": {name: _counters[name]},
+    })
+
+def _start_profiler(name):
+    os.makedirs(DEFAULT_PROFILE_DIR, exist_ok=True)
+    if _profiler == "py-spy":
+        if shutil.which("py-spy") is None:
+            print("py-spy isn't installed; falling back to cProfile")
+        else:
+            output_path = DEFAULT_PROFILE_DIR / f"{name}_{os.getpid()}_{time.time_ns()}.svg"
+            return subprocess.Popen(
+                ["py-spy", "record", "--pid", str(os.getpid()), "--output", str(output_path)],
+                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+            )
+    profiler = cProfile.Profile()
+    profiler.enable()
+    return profiler
+
+def _stop_profiler(name, profiler):
+    if isinstance(profiler, subprocess.Popen):
+        # py-spy writes its flame graph when interrupted
+        profiler.send_signal(signal.SIGINT)
+        profiler.wait()
+        return
+    profiler.disable()
+
+    # Accumulate every occurrence of the stage into a single .prof file (open it with snakeviz or pstats)
+    output_path = DEFAULT_PROFILE_DIR / f"{name}_{os.getpid()}.prof"
+    stats = pstats.Stats(profiler)
+    if output_path.exists():
+        stats.add(str(output_path))
+    stats.dump_stats(output_path)
+
+def export_chrome_trace(output_path):
+    """
+    Writes the recorded spans and counters as Chrome-trace JSON, which Perfetto also opens.
+
+    Args:
+        output_path (str): Path of the .json trace.
+    """
+    os.makedirs(Path(output_path).parent, exist_ok=True)
+    with open(output_path, "w") as file:
+        json.dump({"traceEvents": _events, "displayTimeUnit": "ms"}, file)
+
+def summary():
+    """
+    Aggregates the recorded spans per stage.
+
+    Returns:
+        list of dict: One row per stage, slowest total first, with the details of its slowest occurrence.
+    """
+    durations = {}
+    slowest = {}
+    for event in _events:
+        if event["ph"] != "X":
+            continue
+        durations.setdefault(event["name"], []).append(event["dur"] / 1e6)
+        if event["name"] not in slowest or event["dur"] > slowest[event["name"]]["dur"]:
+            slowest[event["name"]] = event
+
+    rows = []
+    for name, values in durations.items():
+        values = np.array(values)
+        rows.append({
+            "stage": name, "count": len(values), "total": values.sum(), "mean": values.mean(),
+            "p50": np.percentile(values, 50), "p95": np.percentile(values, 95), "max": values.max(),
+            "slowest": slowest[name]["args"],
+        })
+    return sorted(rows, key=lambda row: row["total"], reverse=True)
+
+def print_summary():
+    rows = summary()
+    print(f"{'stage':<22}{'count':>7}{'total s':>10}{'mean s':>9}{'p50 s':>9}{'p95 s':>9}{'max s':>9}  slowest")
+    for row in rows:
+        print(
+            f"{row['stage']:<22}{row['count']:>7}{row['total']:>10.3f}{row['mean']:>9.4f}"
+            f"{row['p50']:>9.4f}{row['p95']:>9.4f}{row['max']:>9.4f}  {row['slowest']}"
+        )
+    for name, value in _counters.items():
+        print(f"{name:<22}{value:>7}")
+
+@atexit.register
+def _report():
+    if not _enabled or not _events:
+        return
+    output_path = os.environ.get("STT_TRACE_FILE") or DEFAULT_TRACE_DIR / f"trace_{os.getpid()}.json"
+    export_chrome_trace(output_path)
+    print_summary()
+    print(f"Trace written to {output_path}")
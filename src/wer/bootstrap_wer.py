@@ -0,0 +1,171 @@
+import argparse
+import itertools
+import json
+import sys
+from pathlib import Path
+import numpy as np
+from jiwer import process_words
+
+# Make the shared helpers in src/ importable when running this script directly
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from manifest import load_manifest
+from text_normalizer import get_normalizer
+
+"""
+bootstrap_wer.py
+
+Paired bootstrap confidence intervals and significance for WER differences between models.
+Point WERs over 12 utterances say little about whether one model is actually better, so we resample
+utterances with replacement (the same resample for every model, which is what makes it paired) and look at
+the distribution of each model's corpus WER and of every pairwise WER difference.
+
+Each resample is stored as per-utterance counts, so a chunk of resamples is one (resamples x utterances)
+count matrix and every model's resampled error totals are a single matrix product. All model pairs are
+compared at once from the same resamples, and chunking bounds memory on 100k-utterance corpora.
+"""
+
+def utterance_errors(ref_transcripts, stt_transcripts, normalizer=None):
+    """
+    Counts the word errors (substitutions + deletions + insertions) and reference words of every utterance.
+
+    Args:
+        ref_transcripts (list of str): Reference transcripts.
+        stt_transcripts (list of str): STT transcripts, aligned with ref_transcripts.
+        normalizer (TextNormalizer): Optional normalizer applied to both sides before alignment.
+
+    Returns:
+        tuple: (errors, words) as integer arrays with one entry per utterance.
+    """
+    if len(ref_transcripts) != len(stt_transcripts):
+        raise ValueError(f"Got {len(ref_transcripts)} reference transcripts but {len(stt_transcripts)} STT transcripts")
+    errors = np.zeros(len(ref_transcripts), dtype=np.int64)
+    words = np.zeros(len(ref_transcripts), dtype=np.int64)
+    for i, (ref_transcript, stt_transcript) in enumerate(zip(ref_transcripts, stt_transcripts)):
+        if normalizer is not None:
+            ref_transcript, stt_transcript = normalizer.normalize(ref_transcript), normalizer.normalize(stt_transcript)
+        words[i] = len(ref_transcript.split())
+        if not words[i]:
+            errors[i] = len(stt_transcript.split())
+            continue
+        output = process_words(ref_transcript, stt_transcript or "<empty>")
+        errors[i] = output.substitutions + output.deletions + output.insertions
+    return errors, words
+
+def bootstrap_wers(errors, words, num_resamples=10000, seed=0, max_chunk_bytes=256 * 1024 ** 2):
+    """
+    Computes every model's corpus WER on each bootstrap resample.
+
+    Args:
+        errors (np.ndarray): (models x utterances) word error counts.
+        words (np.ndarray): (utterances,) reference word counts.
+        num_resamples (int): Number of bootstrap resamples.
+        seed (int): Seed of the random generator, for reproducible intervals.
+        max_chunk_bytes (int): Memory budget of one chunk of resamples.
+
+    Returns:
+        np.ndarray: (models x resamples) resampled WERs.
+    """
+    rng = np.random.default_rng(seed)
+    num_utterances = errors.shape[1]
+    # Errors and words share the same resamples, so stack them and multiply once.
+    # float64 keeps the sums exact (integers below 2^53), unlike float32 past 2^24 words per resample
+    totals = np.vstack([errors, words]).T.astype(np.float64)
+
+    # Each chunk holds indices, offsets, bincounts and float64 counts (about 32 bytes) for every (resample, utterance)
+    chunk_size = int(max(1, min(num_resamples, max_chunk_bytes // (32 * num_utterances))))
+    samples = np.empty((errors.shape[0], num_resamples))
+    for start in range(0, num_resamples, chunk_size):
+        size = min(chunk_size, num_resamples - start)
+        indices = rng.integers(0, num_utterances, size=(size, num_utterances), dtype=np.int32)
+
+        # How many times each utterance was drawn in each resample, with one bincount over the whole chunk
+        offsets = (np.arange(size, dtype=np.int64) * num_utterances)[:, None]
+        counts = np.bincount((indices + offsets).ravel(), minlength=size * num_utterances)
+        counts = counts.reshape(size, num_utterances).astype(np.float64)
+
+        resampled = counts @ totals
+        samples[:, start:start + size] = (resampled[:, :-1] / np.maximum(resampled[:, -1:], 1)).T
+    return samples
+
+def paired_bootstrap(model_errors, words, num_resamples=10000, alpha=0.05, seed=0):
+    """
+    Compares every pair of models with a paired bootstrap.
+
+    Args:
+        model_errors (dict): model name -> (utterances,) word error counts.
+        words (np.ndarray): (utterances,) reference word counts.
+        num_resamples (int): Number of bootstrap resamples.
+        alpha (float): 1 - confidence level of the intervals.
+        seed (int): Seed of the random generator.
+
+    Returns:
+        dict: Each model's WER and confidence interval, and each pair's WER difference, interval and p-value.
+    """
+    model_names = list(model_errors)
+    errors = np.vstack([model_errors[name] for name in model_names])
+    words = np.asarray(words)
+    point = errors.sum(axis=1) / max(words.sum(), 1)
+    samples = bootstrap_wers(errors, words, num_resamples, seed)
+    quantiles = [100 * alpha / 2, 100 * (1 - alpha / 2)]
+
+    model_low, model_high = np.percentile(samples, quantiles, axis=1)
+    models = {
+        name: {"wer": float(point[i]), "ci": [float(model_low[i]), float(model_high[i])]}
+        for i, name in enumerate(model_names)
+    }
+
+    # Every pair at once: (pairs x resamples) differences from the same resamples
+    pairs = list(itertools.combinations(range(len(model_names)), 2))
+    if not pairs:
+        return {"models": models, "pairs": {}}
+    first, second = np.array(pairs).T
+    deltas = samples[first] - samples[second]
+    delta_low, delta_high = np.percentile(deltas, quantiles, axis=1)
+    # Two-sided p-value: how often the resampled difference lands on the other side of zero
+    p_values = np.minimum(1.0, 2 * np.minimum((deltas <= 0).mean(axis=1), (deltas >= 0).mean(axis=1)))
+
+    comparisons = {}
+    for k, (i, j) in enumerate(pairs):
+        comparisons[f"{model_names[i]} vs {model_names[j]}"] = {
+            "wer_difference": float(point[i] - point[j]),
+            "ci": [float(delta_low[k]), float(delta_high[k])],
+            "p_value": float(p_values[k]),
+            "significant": bool(p_values[k] < alpha),
+        }
+    return {"models": models, "pairs": comparisons}
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Paired bootstrap confidence intervals for WER differences between models.")
+    parser.add_argument("--resamples", type=int, default=10000)
+    parser.add_argument("--alpha", type=float, default=0.05)
+    parser.add_argument("--normalize", action="store_true", help="Normalize case, punctuation and numbers before scoring")
+    args = parser.parse_args()
+    normalizer = get_normalizer() if args.normalize else None
+
+    # Access the current (src/wer) and parent (src/) directory via Pathlib
+    curr_dir = Path(__file__).resolve().parent
+    parent_dir = curr_dir.parent
+
+    # Count the errors of every model on every utterance.
+    # Line k of every transcripts file belongs to the k-th manifest clip with a reference
+    ref_transcripts = [record["reference"] for record in load_manifest().filter(has_reference=True)]
+    model_errors = {}
+    for model_name in ["whisper_base", "whisper_tiny", "moonshine"]:
+        with open(parent_dir / f"transcripts/{model_name}_transcripts.txt", "r") as file:
+            stt_transcripts = [line.strip() for line in file]
+        model_errors[model_name], words = utterance_errors(ref_transcripts, stt_transcripts, normalizer)
+
+    report = paired_bootstrap(model_errors, words, args.resamples, args.alpha)
+    confidence = f"{1 - args.alpha:.0%}"
+    for model_name, result in report["models"].items():
+        print(f"{model_name:<14} WER {result['wer']:.2%}  {confidence} CI [{result['ci'][0]:.2%}, {result['ci'][1]:.2%}]")
+    for pair, result in report["pairs"].items():
+        print(
+            f"{pair:<30} dWER {result['wer_difference']:+.2%}  {confidence} CI [{result['ci'][0]:+.2%}, {result['ci'][1]:+.2%}]"
+            f"  p={result['p_value']:.3f}{'  *' if result['significant'] else ''}"
+        )
+
+    # Store the report next to the WER results
+    with open(curr_dir / ("bootstrap_wer_normalized.json" if args.normalize else "bootstrap_wer.json"), "w") as file:
+        json.dump(report, file, indent=2)
@@ -1,6 +1,13 @@
+import argparse
+import sys
 from pathlib import Path
 from jiwer import wer
 
+# Make the shared helpers in src/ importable when running this script directly
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from text_normalizer import get_normalizer
+from tracing import span
+
 # Easily load lines from a file
 def load_lines_from_file(filepath):
     lines = []
@@ -11,7 +18,8 @@ def load_lines_from_file(filepath):
     return lines
     
 # Evaluate the WER% between a reference transcript and its STT variant
-def evaluate_wer(ref_transcripts, stt_transcripts):
+# Pass a TextNormalizer to score normalized text (case, punctuation, numbers) instead of the raw lines
+def evaluate_wer(ref_transcripts, stt_transcripts, normalizer=None):
     
     # Verify that we have an equal number of both transcripts
     if len(ref_transcripts) != len(stt_transcripts):
@@ -22,12 +30,21 @@ def evaluate_wer(ref_transcripts, stt_transcripts):
     # Rounded to 4 digits after the decimal point to make sure they aren't incredibly long.
     error_rates = ["" for _ in range(len(ref_transcripts))]
     for i, (ref_transcript, stt_transcript) in enumerate(zip(ref_transcripts, stt_transcripts)):
-        error_rate = wer(ref_transcript, stt_transcript)
+        if normalizer is not None:
+            ref_transcript = normalizer.normalize(ref_transcript)
+            stt_transcript = normalizer.normalize(stt_transcript)
+        with span("wer", line=i + 1):
+            error_rate = wer(ref_transcript, stt_transcript)
         error_rates[i] = round(error_rate, 4)
     return error_rates
 
 if __name__ == "__main__":
     
+    parser = argparse.ArgumentParser(description="Compare the WER% of every STT model against the reference transcripts.")
+    parser.add_argument("--normalize", action="store_true", help="Normalize case, punctuation and numbers before scoring")
+    args = parser.parse_args()
+    normalizer = get_normalizer() if args.normalize else None
+    
     # Access the current (src/wer) and parent (src/) directory via Pathlib
     curr_dir = Path(__file__).resolve().parent
     parent_dir = curr_dir.parent
@@ -47,9 +64,9 @@ if __name__ == "__main__":
     moonshine_transcripts = load_lines_from_file(moonshine_path)
     
     # Evaluate the WER between each transcript with one another
-    whisper_base_error = evaluate_wer(ref_transcripts, whisper_base_transcripts)
-    whisper_tiny_error = evaluate_wer(ref_transcripts, whisper_tiny_transcripts)
-    moonshine_error = evaluate_wer(ref_transcripts, moonshine_transcripts)
+    whisper_base_error = evaluate_wer(ref_transcripts, whisper_base_transcripts, normalizer)
+    whisper_tiny_error = evaluate_wer(ref_transcripts, whisper_tiny_transcripts, normalizer)
+    moonshine_error = evaluate_wer(ref_transcripts, moonshine_transcripts, normalizer)
     
     # Store the errors into a file
     whisper_base_str = f"whisper_base_error = {whisper_base_error}\n"
@@ -57,7 +74,7 @@ if __name__ == "__main__":
     moonshine_str = f"moonshine_error = {moonshine_error}\n"
     
     file_lines = [whisper_base_str, whisper_tiny_str, moonshine_str]
-    output_path = parent_dir / "wer/wer_results.txt"
+    output_path = parent_dir / ("wer/wer_results_normalized.txt" if args.normalize else "wer/wer_results.txt")
     with open(output_path, "w") as file:
         file.writelines(file_lines)
     
\ No newline at end of file
@@ -0,0 +1,272 @@
+import argparse
+import hashlib
+import json
+import sys
+from pathlib import Path
+import numpy as np
+from jiwer import process_words
+
+# Make the shared helpers in src/ importable when running this script directly
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from manifest import load_manifest
+from text_normalizer import get_normalizer
+
+"""
+confusion_index.py
+
+Corpus-wide word confusion index, for finding errors like vaq -> vacu, awacs -> awacus or cas -> cs
+without scanning transcripts by eye. Every (reference, transcript) pair of every model is normalized and
+aligned once; each substitution, deletion and insertion is stored with interned token IDs in flat NumPy arrays:
+    model, clip, ref token, hyp token, operation, count
+Queries (top-K confusions per model, per term, per clip tag) are array masks and one aggregation over the index,
+so they never re-align the corpus. The index is saved as an .npz plus a JSON vocabulary, along with the hash
+of every transcripts file it was built from; load_index rebuilds it when any of them changed.
+
+Usage:
+    python confusion_index.py build
+    python confusion_index.py top --model whisper_tiny --tag jargon -k 10
+    python confusion_index.py top --term CAS
+"""
+
+DEFAULT_INDEX_DIR = Path(__file__).resolve().parent.parent / ".cache" / "confusion_index"
+TRANSCRIPTS_DIR = Path(__file__).resolve().parent.parent / "transcripts"
+OPERATIONS = ["substitute", "delete", "insert"]
+EPSILON = ""
+
+class ConfusionIndex:
+    def __init__(self, models, clips, tags, vocab, arrays, sources=None):
+        """
+        Args:
+            models (list of str): Model names; the "model" array indexes into it.
+            clips (list of str): Clip IDs; the "clip" array indexes into it.
+            tags (dict): clip ID -> list of tags.
+            vocab (list of str): Interned tokens; ID 0 is the empty token of insertions and deletions.
+            arrays (dict): Equal-length "model", "clip", "ref", "hyp", "op" and "count" arrays.
+            sources (dict): Transcript file -> SHA-256 the index was built from.
+        """
+        self.models = models
+        self.clips = clips
+        self.tags = tags
+        self.vocab = vocab
+        self.token_ids = {token: i for i, token in enumerate(vocab)}
+        self.arrays = arrays
+        self.sources = sources or {}
+
+    @classmethod
+    def build(cls, transcripts, records, normalizer=None):
+        """
+        Aligns every pair once and accumulates the confusions.
+
+        Args:
+            transcripts (dict): model name -> list of transcripts, aligned with records.
+            records (list of dict): Manifest records with "id", "reference" and "tags".
+            normalizer (TextNormalizer): Applied to both sides before alignment. Defaults to get_normalizer().
+
+        Returns:
+            ConfusionIndex: The index.
+        """
+        normalizer = normalizer or get_normalizer()
+        token_ids = {EPSILON: 0}
+        intern = lambda token: token_ids.setdefault(token, len(token_ids))
+        events = []
+
+        for model_id, (model_name, stt_transcripts) in enumerate(transcripts.items()):
+            for clip_id, (record, stt_transcript) in enumerate(zip(records, stt_transcripts)):
+                ref_tokens = normalizer.tokens(record["reference"])
+                hyp_tokens = normalizer.tokens(stt_transcript)
+                if not ref_tokens:
+                    events.extend((model_id, clip_id, 0, intern(token), 2) for token in hyp_tokens)
+                    continue
+                alignment = process_words(" ".join(ref_tokens), " ".join(hyp_tokens) or "<empty>").alignments[0]
+                for chunk in alignment:
+                    if chunk.type == "substitute":
+                        for i, j in zip(range(chunk.ref_start_idx, chunk.ref_end_idx), range(chunk.hyp_start_idx, chunk.hyp_end_idx)):
+                            events.append((model_id, clip_id, intern(ref_tokens[i]), intern(hyp_tokens[j]), 0))
+                    elif chunk.type == "delete":
+                        events.extend((model_id, clip_id, intern(ref_tokens[i]), 0, 1) for i in range(chunk.ref_start_idx, chunk.ref_end_idx))
+                    elif chunk.type == "insert" and hyp_tokens:
+                        events.extend((model_id, clip_id, 0, intern(hyp_tokens[j]), 2) for j in range(chunk.hyp_start_idx, chunk.hyp_end_idx))
+
+        # Collapse repeated events into counts
+        events = np.array(events, dtype=np.int64).reshape(-1, 5)
+        unique, counts = np.unique(events, axis=0, return_counts=True)
+        arrays = {
+            "model": unique[:, 0].astype(np.int16),
+            "clip": unique[:, 1].astype(np.int32),
+            "ref": unique[:, 2].astype(np.int32),
+            "hyp": unique[:, 3].astype(np.int32),
+            "op": unique[:, 4].astype(np.int8),
+            "count": counts.astype(np.int32),
+        }
+        return cls(
+            list(transcripts), [record["id"] for record in records],
+            {record["id"]: record.get("tags", []) for record in records}, list(token_ids), arrays,
+        )
+
+    def save(self, index_dir=DEFAULT_INDEX_DIR):
+        index_dir = Path(index_dir)
+        index_dir.mkdir(parents=True, exist_ok=True)
+        np.savez_compressed(index_dir / "index.npz", **self.arrays)
+        with open(index_dir / "vocab.json", "w") as file:
+            json.dump({
+                "models": self.models, "clips": self.clips, "tags": self.tags,
+                "vocab": self.vocab, "sources": self.sources,
+            }, file)
+
+    @classmethod
+    def load(cls, index_dir=DEFAULT_INDEX_DIR):
+        index_dir = Path(index_dir)
+        with open(index_dir / "vocab.json", "r") as file:
+            meta = json.load(file)
+        with np.load(index_dir / "index.npz") as data:
+            arrays = {name: data[name] for name in data.files}
+        return cls(meta["models"], meta["clips"], meta["tags"], meta["vocab"], arrays, meta["sources"])
+
+    def is_stale(self, transcripts_dir=TRANSCRIPTS_DIR):
+        """
+        Checks whether any transcripts file changed (or disappeared) since the index was built.
+
+        Args:
+            transcripts_dir (str): Folder holding the <model>_transcripts.txt files.
+
+        Returns:
+            bool: True if the index no longer matches the transcripts.
+        """
+        for file_name, sha256 in self.sources.items():
+            transcripts_path = Path(transcripts_dir) / file_name
+            if not transcripts_path.exists() or hashlib.sha256(transcripts_path.read_bytes()).hexdigest() != sha256:
+                return True
+        return False
+
+    def _mask(self, model=None, term=None, tag=None, operation=None):
+        mask = np.ones(len(self.arrays["count"]), dtype=bool)
+        if model is not None:
+            if model not in self.models:
+                raise ValueError(f"Unknown model '{model}'. The index covers {self.models}.")
+            mask &= self.arrays["model"] == self.models.index(model)
+        if tag is not None:
+            clip_ids = [i for i, clip in enumerate(self.clips) if tag in self.tags.get(clip, [])]
+            mask &= np.isin(self.arrays["clip"], clip_ids)
+        if term is not None:
+            # A term matches on either side, through any of its normalized tokens
+            term_ids = [self.token_ids[token] for token in get_normalizer().tokens(term) if token in self.token_ids]
+            mask &= np.isin(self.arrays["ref"], term_ids) | np.isin(self.arrays["hyp"], term_ids)
+        if operation is not None:
+            mask &= self.arrays["op"] == OPERATIONS.index(operation)
+        return mask
+
+    def top_confusions(self, k=10, model=None, term=None, tag=None, operation=None):
+        """
+        Finds the most frequent confusions, optionally restricted to a model, a term, a clip tag or an operation.
+
+        Args:
+            k (int): Number of confusions to return.
+            model (str): Only count this model's errors.
+            term (str): Only count confusions involving this term (as reference or hypothesis).
+            tag (str): Only count clips with this manifest tag, e.g. "jargon".
+            operation (str): One of OPERATIONS.
+
+        Returns:
+            list of dict: ref, hyp, operation and count, most frequent first.
+        """
+        mask = self._mask(model, term, tag, operation)
+        ref, hyp, op = self.arrays["ref"][mask], self.arrays["hyp"][mask], self.arrays["op"][mask]
+        if not len(ref):
+            return []
+
+        # Aggregate over models and clips by (ref, hyp, op), then keep the k largest
+        keys = (ref.astype(np.int64) * len(self.vocab) + hyp) * len(OPERATIONS) + op
+        unique, inverse = np.unique(keys, return_inverse=True)
+        totals = np.bincount(inverse, weights=self.arrays["count"][mask]).astype(np.int64)
+        top = np.argsort(-totals, kind="stable")[:k]
+        return [
+            {
+                "ref": self.vocab[int(unique[i] // len(OPERATIONS) // len(self.vocab))],
+                "hyp": self.vocab[int(unique[i] // len(OPERATIONS) % len(self.vocab))],
+                "operation": OPERATIONS[int(unique[i] % len(OPERATIONS))],
+                "count": int(totals[i]),
+            }
+            for i in top
+        ]
+
+    def error_counts(self, tag=None):
+        """
+        Counts substitutions, deletions and insertions per model.
+
+        Args:
+            tag (str): Only count clips with this manifest tag.
+
+        Returns:
+            dict: model -> operation -> count.
+        """
+        mask = self._mask(tag=tag)
+        counts = np.zeros((len(self.models), len(OPERATIONS)), dtype=np.int64)
+        np.add.at(counts, (self.arrays["model"][mask], self.arrays["op"][mask]), self.arrays["count"][mask])
+        return {model: dict(zip(OPERATIONS, counts[i].tolist())) for i, model in enumerate(self.models)}
+
+def build_index(model_names, index_dir=DEFAULT_INDEX_DIR):
+    """
+    Builds the index over every model's transcripts in src/transcripts and saves it.
+
+    Args:
+        model_names (list of str): Models with a <model>_transcripts.txt file.
+        index_dir (str): Where to save the index.
+
+    Returns:
+        ConfusionIndex: The index.
+    """
+    records = list(load_manifest().filter(has_reference=True))
+    transcripts, sources = {}, {}
+    for model_name in model_names:
+        transcripts_path = TRANSCRIPTS_DIR / f"{model_name}_transcripts.txt"
+        with open(transcripts_path, "r") as file:
+            transcripts[model_name] = [line.strip() for line in file]
+        sources[transcripts_path.name] = hashlib.sha256(transcripts_path.read_bytes()).hexdigest()
+
+    index = ConfusionIndex.build(transcripts, records)
+    index.sources = sources
+    index.save(index_dir)
+    return index
+
+def load_index(index_dir=DEFAULT_INDEX_DIR):
+    """
+    Loads the saved index, rebuilding it for the same models if their transcripts changed since it was built.
+
+    Args:
+        index_dir (str): Where the index is saved.
+
+    Returns:
+        ConfusionIndex: An index that matches the current transcripts.
+    """
+    index = ConfusionIndex.load(index_dir)
+    if index.is_stale():
+        print("The transcripts changed since the confusion index was built; rebuilding it")
+        index = build_index(index.models, index_dir)
+    return index
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Build or query the corpus-wide word confusion index.")
+    parser.add_argument("--index-dir", default=DEFAULT_INDEX_DIR)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    build_parser = subparsers.add_parser("build")
+    build_parser.add_argument("--models", nargs="+", default=["whisper_base", "whisper_tiny", "moonshine", "whisper_jargon"])
+    top_parser = subparsers.add_parser("top")
+    top_parser.add_argument("-k", type=int, default=10)
+    top_parser.add_argument("--model")
+    top_parser.add_argument("--term")
+    top_parser.add_argument("--tag")
+    top_parser.add_argument("--operation", choices=OPERATIONS)
+    args = parser.parse_args()
+
+    if args.command == "build":
+        index = build_index(args.models, args.index_dir)
+        print(f"Indexed {int(index.arrays['count'].sum())} errors over {len(index.clips)} clips and {len(index.models)} models")
+        for model, counts in index.error_counts().items():
+            print(f"  {model}: {counts}")
+    else:
+        index = load_index(args.index_dir)
+        if args.model is not None and args.model not in index.models:
+            parser.error(f"argument --model: '{args.model}' isn't in the index (choose from {', '.join(index.models)})")
+        for row in index.top_confusions(args.k, args.model, args.term, args.tag, args.operation):
+            print(f"{row['count']:>5}  {row['operation']:<11}{row['ref'] or '-'} -> {row['hyp'] or '-'}")
@@ -0,0 +1,268 @@
+import json
+import sys
+from collections import Counter
+from pathlib import Path
+from jiwer import process_words
+
+# Make the shared helpers in src/ importable when running this script directly
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from manifest import load_manifest
+from text_normalizer import get_normalizer
+
+"""
+entity_error_rate.py
+
+Lexicon-driven entity/jargon error rate. Plain WER weighs "VAQ-135" the same as "the", so this scores
+only the domain terms (codenames, units, acronyms) listed in jargon_lexicon.tsv:
+- Every term and its variants are normalized and compiled once into a token-level Aho-Corasick automaton,
+  so each transcript is scanned in linear time no matter how many terms the lexicon has.
+- Each term found in a reference is looked up at its aligned position in the hypothesis. It's a hit when the
+  same term (any variant) is there; otherwise the aligned hypothesis words are recorded as a confusion,
+  e.g. vaq 135 -> "vacu 135".
+- Terms found in a hypothesis but not at a reference occurrence count as false alarms.
+
+The report has the overall entity error rate (misses / reference occurrences) and per-term recall and confusions.
+"""
+
+DEFAULT_LEXICON_PATH = Path(__file__).resolve().parent / "jargon_lexicon.tsv"
+
+def load_lexicon(lexicon_path=DEFAULT_LEXICON_PATH):
+    """
+    Reads a lexicon file: one term per line, optionally followed by a tab and |-separated variants.
+
+    Args:
+        lexicon_path (str): Path of the .tsv lexicon. Lines starting with # are comments.
+
+    Returns:
+        dict: term -> list of variants.
+    """
+    lexicon = {}
+    with open(lexicon_path, "r") as file:
+        for line in file:
+            line = line.rstrip("\n")
+            if not line.strip() or line.startswith("#"):
+                continue
+            term, _, variants = line.partition("\t")
+            lexicon[term.strip()] = [variant.strip() for variant in variants.split("|") if variant.strip()]
+    return lexicon
+
+class LexiconMatcher:
+    def __init__(self, lexicon, normalizer=None):
+        """
+        Builds the token-level Aho-Corasick automaton.
+
+        Args:
+            lexicon (dict): term -> list of variants, e.g. from load_lexicon.
+            normalizer (TextNormalizer): Applied to terms and transcripts alike. Defaults to get_normalizer().
+        """
+        self.normalizer = normalizer or get_normalizer()
+        self.terms = list(lexicon)
+
+        # goto[node]: token -> child, output[node]: (term id, pattern length) ending exactly here
+        self.goto = [{}]
+        self.output = [[]]
+        for term_id, term in enumerate(self.terms):
+            for pattern in [term] + lexicon[term]:
+                tokens = self.normalizer.tokens(pattern)
+                if not tokens:
+                    continue
+                node = 0
+                for token in tokens:
+                    if token not in self.goto[node]:
+                        self.goto[node][token] = len(self.goto)
+                        self.goto.append({})
+                        self.output.append([])
+                    node = self.goto[node][token]
+                self.output[node].append((term_id, len(tokens)))
+
+        # Breadth-first failure links, plus output links that skip suffixes without matches
+        self.fail = [0] * len(self.goto)
+        self.output_link = [0] * len(self.goto)
+        queue = list(self.goto[0].values())
+        for node in queue:
+            for token, child in self.goto[node].items():
+                queue.append(child)
+                if node:
+                    state = self.fail[node]
+                    while state and token not in self.goto[state]:
+                        state = self.fail[state]
+                    self.fail[child] = self.goto[state].get(token, 0)
+                suffix = self.fail[child]
+                self.output_link[child] = suffix if self.output[suffix] else self.output_link[suffix]
+
+    def find(self, tokens):
+        """
+        Finds the lexicon terms in a token sequence, keeping the leftmost-longest non-overlapping matches.
+
+        Args:
+            tokens (tuple of str): Normalized tokens.
+
+        Returns:
+            list of tuple: (start, end, term id) of each match, in order.
+        """
+        matches = []
+        node = 0
+        for end, token in enumerate(tokens, start=1):
+            while node and token not in self.goto[node]:
+                node = self.fail[node]
+            node = self.goto[node].get(token, 0)
+            state = node
+            while state:
+                for term_id, length in self.output[state]:
+                    matches.append((end - length, end, term_id))
+                state = self.output_link[state]
+
+        selected = []
+        last_end = 0
+        for start, end, term_id in sorted(matches, key=lambda match: (match[0], match[0] - match[1])):
+            if start >= last_end:
+                selected.append((start, end, term_id))
+                last_end = end
+        return selected
+
+def aligned_hyp_span(alignment, start, end):
+    """
+    Finds the hypothesis words aligned with a span of reference words.
+
+    Args:
+        alignment (list): jiwer AlignmentChunks of one reference/hypothesis pair.
+        start (int): First reference token of the span.
+        end (int): One past the last reference token of the span.
+
+    Returns:
+        tuple: (hyp start, hyp end), empty when the whole span was deleted.
+    """
+    hyp_indices = []
+    substituted_edges = set()
+    for chunk in alignment:
+        if chunk.type in ("equal", "substitute"):
+            for offset in range(chunk.ref_end_idx - chunk.ref_start_idx):
+                ref_index = chunk.ref_start_idx + offset
+                if start <= ref_index < end:
+                    hyp_indices.append(chunk.hyp_start_idx + offset)
+                    if chunk.type == "substitute" and ref_index in (start, end - 1):
+                        substituted_edges.add(ref_index)
+    if not hyp_indices:
+        return 0, 0
+    hyp_start, hyp_end = min(hyp_indices), max(hyp_indices) + 1
+
+    # A term split into extra words ("awacs" -> "awa cus") shows up as an insertion next to a substituted edge
+    for chunk in alignment:
+        if chunk.type != "insert":
+            continue
+        if chunk.ref_start_idx == end and end - 1 in substituted_edges and chunk.hyp_start_idx == hyp_end:
+            hyp_end = chunk.hyp_end_idx
+        if chunk.ref_start_idx == start and start in substituted_edges and chunk.hyp_end_idx == hyp_start:
+            hyp_start = chunk.hyp_start_idx
+    return hyp_start, hyp_end
+
+class EntityErrorRate:
+    def __init__(self, lexicon, normalizer=None):
+        """
+        Args:
+            lexicon (dict): term -> list of variants, e.g. from load_lexicon.
+            normalizer (TextNormalizer): Defaults to get_normalizer(), sharing its token cache with the other metrics.
+        """
+        self.matcher = LexiconMatcher(lexicon, normalizer)
+
+    def score_pair(self, reference, hypothesis):
+        """
+        Scores the lexicon terms of one reference/hypothesis pair.
+
+        Args:
+            reference (str): The reference transcript.
+            hypothesis (str): The STT transcript.
+
+        Returns:
+            tuple: A list of (term, hit, aligned hypothesis text) per reference occurrence, and the false alarm terms.
+        """
+        ref_tokens = self.matcher.normalizer.tokens(reference)
+        hyp_tokens = self.matcher.normalizer.tokens(hypothesis)
+        ref_matches = self.matcher.find(ref_tokens)
+        hyp_matches = self.matcher.find(hyp_tokens)
+        if not ref_matches and not hyp_matches:
+            return [], []
+
+        alignment = process_words(" ".join(ref_tokens) or "<empty>", " ".join(hyp_tokens) or "<empty>").alignments[0]
+        used = set()
+        occurrences = []
+        for start, end, term_id in ref_matches:
+            hyp_start, hyp_end = aligned_hyp_span(alignment, start, end)
+            hit = next(
+                (i for i, (match_start, match_end, match_term) in enumerate(hyp_matches)
+                 if match_term == term_id and i not in used and match_start < max(hyp_end, hyp_start + 1) and match_end > hyp_start),
+                None,
+            )
+            if hit is not None:
+                used.add(hit)
+            occurrences.append((self.matcher.terms[term_id], hit is not None, " ".join(hyp_tokens[hyp_start:hyp_end])))
+
+        false_alarms = [self.matcher.terms[term_id] for i, (_, _, term_id) in enumerate(hyp_matches) if i not in used]
+        return occurrences, false_alarms
+
+    def evaluate(self, references, hypotheses):
+        """
+        Scores every pair of a corpus.
+
+        Args:
+            references (list of str): Reference transcripts.
+            hypotheses (list of str): STT transcripts, aligned with references.
+
+        Returns:
+            dict: The overall entity error rate and per-term occurrences, recall, confusions and false alarms.
+        """
+        terms = {}
+        num_occurrences = num_misses = num_false_alarms = 0
+        for reference, hypothesis in zip(references, hypotheses):
+            occurrences, false_alarms = self.score_pair(reference, hypothesis)
+            for term, hit, hyp_text in occurrences:
+                stats = terms.setdefault(term, {"occurrences": 0, "hits": 0, "confusions": Counter(), "false_alarms": 0})
+                stats["occurrences"] += 1
+                stats["hits"] += hit
+                if not hit:
+                    stats["confusions"][hyp_text or "<deleted>"] += 1
+                num_occurrences += 1
+                num_misses += not hit
+            for term in false_alarms:
+                terms.setdefault(term, {"occurrences": 0, "hits": 0, "confusions": Counter(), "false_alarms": 0})["false_alarms"] += 1
+                num_false_alarms += 1
+
+        for stats in terms.values():
+            stats["recall"] = stats["hits"] / stats["occurrences"] if stats["occurrences"] else None
+            stats["confusions"] = dict(stats["confusions"].most_common())
+        return {
+            "entity_error_rate": num_misses / num_occurrences if num_occurrences else 0.0,
+            "occurrences": num_occurrences,
+            "misses": num_misses,
+            "false_alarms": num_false_alarms,
+            "terms": terms,
+        }
+
+if __name__ == "__main__":
+
+    # Access the current (src/wer) and parent (src/) directory via Pathlib
+    curr_dir = Path(__file__).resolve().parent
+    parent_dir = curr_dir.parent
+
+    # Load the reference transcripts from the manifest, in the order the transcripts files are written, and every model's transcripts
+    ref_transcripts = [record["reference"] for record in load_manifest().filter(has_reference=True)]
+    model_names = ["whisper_base", "whisper_tiny", "moonshine", "whisper_jargon"]
+
+    metric = EntityErrorRate(load_lexicon())
+    results = {}
+    for model_name in model_names:
+        with open(parent_dir / f"transcripts/{model_name}_transcripts.txt", "r") as file:
+            stt_transcripts = [line.strip() for line in file]
+        results[model_name] = report = metric.evaluate(ref_transcripts, stt_transcripts)
+
+        print(f"{model_name}: entity error rate {report['entity_error_rate']:.2%} "
+              f"({report['misses']}/{report['occurrences']} missed, {report['false_alarms']} false alarms)")
+        confusions = [
+            (count, term, hyp_text) for term, stats in report["terms"].items() for hyp_text, count in stats["confusions"].items()
+        ]
+        for count, term, hyp_text in sorted(confusions, reverse=True)[:5]:
+            print(f"  {term} -> \"{hyp_text}\" x{count}")
+
+    # Store the per-term results next to the WER results
+    with open(curr_dir / "entity_error_rate.json", "w") as file:
+        json.dump(results, file, indent=2)